@@ -0,0 +1,270 @@
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+from business.config import Config
+
+STREAM_BATCH_SIZE = 500  # Rows read from a result in one call to the worker threads
+MAX_BODY_SIZE = 16 * 1024 * 1024
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """An error returned to the client with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiServer:
+    """
+    Local HTTP/JSON service exposing the BusinessManager of shared connections, so several
+    users reuse one connection pool and its caches. Blocking database calls run on worker
+    threads, and a semaphore per backend bounds how many run at the same time.
+
+    Routes, where {backend} is the name given to a connection string:
+        GET    /backends
+        GET    /{backend}/databases
+        GET    /{backend}/databases/{db}/collections
+        GET    /{backend}/databases/{db}/collections/{coll}/documents?filter=&sort=&order=&limit=&skip=
+        POST   /{backend}/databases/{db}/collections/{coll}/documents   body: the document
+        PATCH  /{backend}/databases/{db}/collections/{coll}/documents   body: {"document": {...}, "field": "name"}
+        DELETE /{backend}/databases/{db}/collections/{coll}/documents   body: {"document": {...}}
+        POST   /{backend}/query                                        body: {"query": "..."}
+    Lists of rows are streamed as a chunked JSON array.
+    """
+
+    def __init__(self, connections, backends, host="127.0.0.1", port=8765, max_concurrency=None):
+        """
+        Initializes the server.
+        Args:
+            connections (ConnectionManager): Opens and shares the connections.
+            backends (dict): Backend name -> connection string.
+            max_concurrency (int): Maximum number of database calls running at the same time per backend.
+        """
+        if max_concurrency is None:
+            max_concurrency = Config.get_instance().get_setting("api_max_concurrency", 4)
+        self.connections = connections
+        # Closing the least recently used connection could pull it from under a request streaming from it
+        connections.max_connections = max(connections.max_connections, len(set(backends.values())))
+        self.backends = backends
+        self.host = host
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * max(len(backends), 1))
+        self._semaphores = {}  # Created in the event loop, one per backend
+        self._routes = [
+            ("GET", r"/backends", self.list_backends),
+            ("GET", r"/(?P<backend>[^/]+)/databases", self.list_databases),
+            ("GET", r"/(?P<backend>[^/]+)/databases/(?P<database>[^/]+)/collections", self.list_collections),
+            ("GET", r"/(?P<backend>[^/]+)/databases/(?P<database>[^/]+)/collections/(?P<collection>[^/]+)/documents", self.fetch_documents),
+            ("POST", r"/(?P<backend>[^/]+)/databases/(?P<database>[^/]+)/collections/(?P<collection>[^/]+)/documents", self.insert_document),
+            ("PATCH", r"/(?P<backend>[^/]+)/databases/(?P<database>[^/]+)/collections/(?P<collection>[^/]+)/documents", self.update_document),
+            ("DELETE", r"/(?P<backend>[^/]+)/databases/(?P<database>[^/]+)/collections/(?P<collection>[^/]+)/documents", self.delete_document),
+            ("POST", r"/(?P<backend>[^/]+)/query", self.execute_raw_query),
+        ]
+
+    def run(self):
+        """Serves requests until interrupted"""
+        try:
+            asyncio.run(self.serve())
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def serve(self):
+        """Starts listening and serves requests forever"""
+        self._semaphores = {name: asyncio.Semaphore(self.max_concurrency) for name in self.backends}
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"Serving {', '.join(self.backends)} on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        """Reads one request, answers it and closes the connection"""
+        try:
+            try:
+                method, path, query, body = await self._read_request(reader)
+                handler, params = self._route(method, path)
+                await handler(writer, query=query, body=body, **params)
+            except HttpError as e:
+                await self._send_json(writer, e.status, {"error": str(e)})
+            except (ValueError, KeyError, TypeError) as e:
+                await self._send_json(writer, 400, {"error": str(e)})
+            except Exception as e:
+                await self._send_json(writer, 500, {"error": str(e)})
+        except ConnectionError:
+            pass  # The client went away
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Parses the request line, the headers and the JSON body of a request"""
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, "Request body too large")
+        body = None
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except json.JSONDecodeError as e:
+                raise HttpError(400, f"Invalid JSON body: {e}")
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), unquote(url.path).rstrip("/") or "/", query, body
+
+    def _route(self, method, path):
+        """Returns the handler of a request and the parameters taken from its path"""
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = re.fullmatch(pattern, path)
+            if match:
+                if route_method == method:
+                    return handler, match.groupdict()
+                allowed = True
+        if allowed:
+            raise HttpError(405, f"Method {method} not allowed on {path}")
+        raise HttpError(404, f"Not found: {path}")
+
+    async def _call(self, backend, function, *args):
+        """Runs a blocking BusinessManager call on a worker thread, within the concurrency limit of its backend"""
+        if backend not in self.backends:
+            raise HttpError(404, f"Unknown backend: {backend}")
+        loop = asyncio.get_running_loop()
+        async with self._semaphores[backend]:
+            manager = await loop.run_in_executor(self._executor, self.connections.open, self.backends[backend])
+            return await loop.run_in_executor(self._executor, function, manager, *args)
+
+    async def _send_json(self, writer, status, payload):
+        """Sends a complete JSON response"""
+        body = json.dumps(payload, default=str).encode()
+        writer.write(self._headers(status, {"Content-Length": str(len(body))}) + body)
+        await writer.drain()
+
+    async def _send_rows(self, writer, backend, rows):
+        """Streams rows (a list or an iterator read on worker threads) as a chunked JSON array"""
+        writer.write(self._headers(200, {"Transfer-Encoding": "chunked"}))
+        first = True
+        try:
+            if isinstance(rows, list):
+                for start in range(0, len(rows), STREAM_BATCH_SIZE):
+                    first = await self._write_batch(writer, rows[start:start + STREAM_BATCH_SIZE], first)
+            else:
+                iterator = iter(rows)
+                loop = asyncio.get_running_loop()
+                async with self._semaphores[backend]:
+                    while True:
+                        batch = await loop.run_in_executor(self._executor, _next_batch, iterator)
+                        if not batch:
+                            break
+                        first = await self._write_batch(writer, batch, first)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # The status was already sent, the response is cut short so the client sees it is incomplete
+            print(f"Error streaming rows: {e}")
+            return
+        self._write_chunk(writer, b"[]" if first else b"]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _write_batch(self, writer, batch, first):
+        """Writes a batch of rows of a streamed array and waits for the client to read them"""
+        text = ",".join(json.dumps(row, default=str) for row in batch)
+        self._write_chunk(writer, ("[" if first else ",").encode() + text.encode())
+        await writer.drain()
+        return False
+
+    @staticmethod
+    def _write_chunk(writer, data):
+        writer.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+    @staticmethod
+    def _headers(status, extra):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "Content-Type: application/json", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    async def list_backends(self, writer, query, body):
+        await self._send_json(writer, 200, [
+            {"backend": name, "open": self.connections.is_open(connection_string)}
+            for name, connection_string in self.backends.items()
+        ])
+
+    async def list_databases(self, writer, query, body, backend):
+        databases = await self._call(backend, lambda manager: manager.get_databases())
+        await self._send_rows(writer, backend, [{"database": name} for name in databases])
+
+    async def list_collections(self, writer, query, body, backend, database):
+        collections = await self._call(backend, lambda manager: manager.get_collections(database))
+        await self._send_rows(writer, backend, [{"collection": name} for name in collections])
+
+    async def fetch_documents(self, writer, query, body, backend, database, collection):
+        sort_order = -1 if query.get("order", "asc").lower() in ("desc", "-1") else 1
+        documents = await self._call(backend, lambda manager: manager.fetch_documents(
+            database, collection, query.get("sort") or None, sort_order, query.get("filter") or None,
+            int(query.get("limit", 100)), int(query.get("skip", 0))
+        ))
+        await self._send_rows(writer, backend, documents)
+
+    async def insert_document(self, writer, query, body, backend, database, collection):
+        if isinstance(body, list) and all(isinstance(document, dict) for document in body):
+            inserted = await self._call(backend, lambda manager: manager.insert_documents(
+                database, collection, manager.convert_documents(database, collection, body)
+            ))
+            await self._send_json(writer, 201, {"inserted": inserted})
+            return
+        if not isinstance(body, dict):
+            raise HttpError(400, "The body must be the document to insert, or a list of documents")
+        result = await self._call(backend, lambda manager: manager.insert_document(database, collection, body))
+        await self._send_json(writer, 201, {"inserted": str(result) if result is not None else None})
+
+    async def update_document(self, writer, query, body, backend, database, collection):
+        if not isinstance(body, dict) or not isinstance(body.get("document"), dict) or body.get("field") not in body["document"]:
+            raise HttpError(400, 'The body must be {"document": {...}, "field": "name of the updated field"}')
+        updated = await self._call(backend, lambda manager: manager.update_document(database, collection, body["document"], body["field"]))
+        await self._send_json(writer, 200, {"updated": bool(updated)})
+
+    async def delete_document(self, writer, query, body, backend, database, collection):
+        if not isinstance(body, dict) or not isinstance(body.get("document"), dict):
+            raise HttpError(400, 'The body must be {"document": {...}}')
+        deleted = await self._call(backend, lambda manager: manager.delete_document(database, collection, body["document"]))
+        await self._send_json(writer, 200, {"deleted": bool(deleted)})
+
+    async def execute_raw_query(self, writer, query, body, backend):
+        if not isinstance(body, dict) or not isinstance(body.get("query"), str):
+            raise HttpError(400, 'The body must be {"query": "..."}')
+        rows = await self._call(backend, lambda manager: manager.stream_raw_query(body["query"]))
+        # Read the first batch before the headers are sent, so a failing query still gets an error status
+        iterator = iter(rows)
+        first_batch = await self._call(backend, lambda manager: _next_batch(iterator))
+        await self._send_rows(writer, backend, _prepend(first_batch, iterator))
+
+
+def _next_batch(iterator):
+    """Reads the next rows of an iterator, on a worker thread"""
+    batch = []
+    for row in iterator:
+        batch.append(row)
+        if len(batch) >= STREAM_BATCH_SIZE:
+            break
+    return batch
+
+
+def _prepend(batch, iterator):
+    yield from batch
+    yield from iterator
@@ -0,0 +1,71 @@
+import threading
+from business.config import Config
+
+
+class BulkOperation:
+    """Deletes or updates a selection of documents in chunks, in a background thread"""
+
+    def __init__(self, manager, database_name, collection_name, documents, update=None, batch_size=None):
+        """
+        Initializes the operation.
+        Args:
+            manager (BusinessManager): Manager of the connection to write to.
+            documents (list): The selected documents, as loaded.
+            update (dict): Fields to set on every document, or None to delete them.
+            batch_size (int): Number of documents sent to the database per call.
+        """
+        self.manager = manager
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self.documents = documents
+        self.update = update
+        self.batch_size = batch_size or Config.get_instance().get_setting("bulk_batch_size", 1000)
+        self.total = len(documents)
+        self.processed = 0  # Documents sent to the database so far
+        self.affected = 0  # Documents the database reported as deleted or updated
+        self.error = None
+        self.finished = False
+        self._cancelled = threading.Event()
+
+    def start(self):
+        """Starts the operation in a background thread"""
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        """Stops the operation after the current chunk, chunks already written are kept"""
+        self._cancelled.set()
+
+    def _run(self):
+        try:
+            key_field = self.manager.get_primary_key(self.database_name, self.collection_name)
+            for start in range(0, self.total, self.batch_size):
+                if self._cancelled.is_set():
+                    break
+                chunk = self.documents[start:start + self.batch_size]
+                if key_field and all(key_field in document for document in chunk):
+                    self.affected += self._write_by_keys(key_field, [document[key_field] for document in chunk])
+                else:
+                    self.affected += self._write_by_documents(chunk)
+                self.processed += len(chunk)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+
+    def _write_by_keys(self, key_field, keys):
+        """Writes a chunk in a single call selecting the documents by key"""
+        if self.update is None:
+            return self.manager.delete_documents(self.database_name, self.collection_name, key_field, keys)
+        return self.manager.update_documents(self.database_name, self.collection_name, key_field, keys, self.update)
+
+    def _write_by_documents(self, chunk):
+        """Writes a chunk as one bulk write matching every field, for collections without a primary key"""
+        if self.update is None:
+            operations = [{"op": "delete", "filter": document} for document in chunk]
+        else:
+            operations = [
+                {"op": "update", "filter": {key: value for key, value in document.items() if key not in self.update}, "update": self.update}
+                for document in chunk
+            ]
+        results = self.manager.bulk_write(self.database_name, self.collection_name, operations, ordered=False)
+        return sum(result["count"] for result in results if result["status"] == "ok")
@@ -1,13 +1,30 @@
+import threading
+import time
+from business.collection_stats import CollectionStats
+from business.document_codec import DocumentCodec
+from business.schema_profiler import SchemaProfiler
+
 
 class BusinessManager:
-    def __init__(self, repository):
+    def __init__(self, repository, metadata_cache=None, connection_name=None, query_history=None):
         self.repository = repository
+        self.metadata_cache = metadata_cache
+        self.query_history = query_history
+        self.connection_name = connection_name
+        self.schema_profiler = SchemaProfiler(repository, metadata_cache=metadata_cache, connection_name=connection_name)
+        self.collection_stats = CollectionStats(repository, metadata_cache=metadata_cache, connection_name=connection_name)
+        self._codecs = {}  # (database, collection) -> DocumentCodec of the current schema profile
+        self._codecs_lock = threading.Lock()
 
     def connect(self):
         """Connects to MongoDB using the provided URI"""
         self.repository.connect()
         return self.repository
 
+    def close(self):
+        """Closes the connection to the database"""
+        self.repository.close()
+
     def get_databases(self):
         """Returns the list of databases"""
         db_list = self.repository.list_database_names()
@@ -18,34 +35,121 @@ class BusinessManager:
         self.repository.set_database_name(database_name)
         return self.repository.list_collections()
 
-    def fetch_documents(self, database_name, collection_name, order_by=None, sort_order=1, query=None, limit=10, skip=0):
-        """Fetches documents from a collection"""
+    def get_database_tree(self):
+        """Returns every database with its collections, and stores them in the metadata cache"""
+        tree = {database_name: self.get_collections(database_name) for database_name in self.get_databases()}
+        if self.metadata_cache:
+            self.metadata_cache.save_databases(self.connection_name, tree)
+        return tree
+
+    def get_cached_database_tree(self):
+        """Returns the databases and collections saved by the last session, or None"""
+        if not self.metadata_cache:
+            return None
+        return self.metadata_cache.get_databases(self.connection_name)
+
+    def fetch_documents(self, database_name, collection_name, order_by=None, sort_order=1, query=None, limit=10, skip=0, lazy=False):
+        """Fetches documents from a collection, lazy lets the client keep large nested values encoded until expanded"""
+        self.repository.set_database_name(database_name)
+        return self.repository.fetch_documents(collection_name, order_by, sort_order, query, limit, skip, lazy)
+
+    def get_collection_schema(self, database_name, collection_name):
+        """
+        Returns the schema of a collection, built from its cached schema profile. The fields declared
+        by the database (the columns of a MySQL table) are always listed, with their declared type.
+        """
+        schema = self.schema_profiler.get_profile(database_name, collection_name).to_schema()
+        self.repository.set_database_name(database_name)
+        schema.update(self.repository.get_declared_types(collection_name))
+        return schema
+
+    def get_schema_profile(self, database_name, collection_name, refresh=False):
+        """Returns the field statistics of a collection"""
+        return self.schema_profiler.get_profile(database_name, collection_name, refresh)
+
+    def get_key_boundaries(self, database_name, collection_name, key_field, chunk_count):
+        """Returns up to chunk_count - 1 keys splitting a collection into key ranges of about the same size"""
+        self.repository.set_database_name(database_name)
+        return self.repository.get_key_boundaries(collection_name, key_field, chunk_count)
+
+    def fetch_range(self, database_name, collection_name, key_field, lower=None, upper=None):
+        """Returns the documents whose key_field is in [lower, upper), sorted by key"""
+        self.repository.set_database_name(database_name)
+        return self.repository.fetch_range(collection_name, key_field, lower, upper)
+
+    def stream_range(self, database_name, collection_name, key_field, lower=None, upper=None, batch_size=1000):
+        """Returns an iterator over the documents whose key_field is in [lower, upper), read batch_size at a time"""
         self.repository.set_database_name(database_name)
-        return self.repository.fetch_documents(collection_name, order_by, sort_order, query, limit, skip)
+        return self.repository.stream_range(collection_name, key_field, lower, upper, batch_size)
+
+    def chunk_digest(self, database_name, collection_name, key_field, lower=None, upper=None, server_side=True, ignore_fields=None):
+        """Returns the count and digest of the documents whose key_field is in [lower, upper), leaving out ignore_fields"""
+        self.repository.set_database_name(database_name)
+        return self.repository.chunk_digest(collection_name, key_field, lower, upper, server_side, ignore_fields)
+
+    def get_collection_stats(self, database_name, refresh=False):
+        """Returns (size statistics of every collection, fetched_at) of a database, cached for a few minutes"""
+        return self.collection_stats.get_stats(database_name, refresh)
+
+    def get_cached_collection_stats(self, database_name):
+        """Returns the last (statistics, fetched_at) of a database whatever their age, or None"""
+        return self.collection_stats.get_cached_stats(database_name)
+
+    def refresh_schema_async(self, database_name, collection_name, callback=None):
+        """Refreshes the schema profile of a collection in the background"""
+        self.schema_profiler.refresh_async(database_name, collection_name, callback)
+
+    def prefetch_schema(self, database_name, collection_name):
+        """Profiles a collection in the background when its cached profile is missing or older than schema_max_age"""
+        self.schema_profiler.prefetch(database_name, collection_name)
+
+    def get_type_converters(self):
+        """Returns the functions converting text to each data type of the database"""
+        return self.repository.get_type_converters()
+
+    def to_storable(self, value):
+        """Returns a value read from any database in a form this database can store"""
+        return self.repository.to_storable(value)
+
+    def get_codec(self, database_name, collection_name):
+        """
+        Returns the codec converting text values to the types of a collection, compiled again when
+        its schema profile is refreshed. Types declared by the database (the columns of a MySQL
+        table) take precedence over those seen in the sample.
+        """
+        profile = self.schema_profiler.get_profile(database_name, collection_name)
+        key = (database_name, collection_name)
+        with self._codecs_lock:
+            codec = self._codecs.get(key)
+        if codec is not None and codec.version == profile.profiled_at:
+            return codec
+        self.repository.set_database_name(database_name)
+        field_types = profile.to_schema()
+        field_types.update(self.repository.get_declared_types(collection_name))
+        codec = DocumentCodec(field_types, self.repository.get_type_converters(), profile.profiled_at)
+        with self._codecs_lock:
+            self._codecs[key] = codec
+        return codec
+
+    def convert_document(self, database_name, collection_name, document):
+        """Converts the text values of a document to the types of the collection schema"""
+        return self.get_codec(database_name, collection_name).convert_document(document)
+
+    def convert_documents(self, database_name, collection_name, documents):
+        """Converts the text values of a batch of documents to the types of the collection schema"""
+        return self.get_codec(database_name, collection_name).convert_documents(documents)
+
+    def convert_value(self, database_name, collection_name, field, value):
+        """Converts a text value to the type of a field of the collection schema"""
+        try:
+            return self.get_codec(database_name, collection_name).convert_value(field, value)
+        except ValueError as e:
+            raise ValueError(f"Error converting value for field '{field}': {e}")
 
     def insert_document(self, database_name, collection_name, document):
         """Inserts a document into a collection"""
+        converted_document = self.convert_document(database_name, collection_name, document)
         self.repository.set_database_name(database_name)
-        schema = self.repository.get_collection_schema(collection_name)
-        converters = self.repository.get_type_converters()
-        converted_document = {}
-        for field, value in document.items():
-            # Get the expected type from the schema
-            expected_type = schema.get(field, str)  # Default to str if the field type is unknown
-
-            # Get the converter for the expected type
-            converter = converters.get(expected_type)
-
-            if converter:
-                # Convert the value using the type converter
-                try:
-                    converted_document[field] = converter(value)
-                except Exception as e:
-                    raise ValueError(f"Error converting field '{field}' with value '{value}': {e}")
-            else:
-                # Fallback to the raw value if no converter is defined
-                converted_document[field] = value
-
         return self.repository.insert_document(collection_name, converted_document)
 
     def delete_document(self, database_name, collection_name, document):
@@ -55,27 +159,116 @@ class BusinessManager:
 
     def update_document(self, database_name, collection_name, document, updated_property):
         """Updates a document in a collection"""
+        value = self.convert_value(database_name, collection_name, updated_property, document[updated_property])
         self.repository.set_database_name(database_name)
-        schema = self.repository.get_collection_schema(collection_name)
-        converters = self.repository.get_type_converters()
-
-        value = document[updated_property]
-        expected_type = schema.get(updated_property, str)  # Default to str if type is unknown
-        converter = converters.get(expected_type)
-
-        if converter:
-            try:
-                value = converter(value)
-            except Exception as e:
-                raise ValueError(f"Error converting value for field '{updated_property}': {e}")
 
         filter_query = {key: value for key, value in document.items() if key != updated_property}
         update_property = {updated_property: value}
         return self.repository.update_document(collection_name, filter_query, update_property)
 
+    def insert_documents(self, database_name, collection_name, documents, skip_duplicates=False):
+        """
+        Inserts documents into a collection in one call, without type conversion, returning how many were
+        inserted. With skip_duplicates, documents whose unique key exists are left out instead of failing.
+        """
+        self.repository.set_database_name(database_name)
+        return self.repository.insert_documents(collection_name, documents, skip_duplicates)
+
+    def delete_documents(self, database_name, collection_name, key_field, keys):
+        """Deletes the documents whose key_field is one of keys, returning how many were deleted"""
+        self.repository.set_database_name(database_name)
+        return self.repository.delete_documents(collection_name, key_field, keys)
+
+    def update_documents(self, database_name, collection_name, key_field, keys, update_query):
+        """Sets the fields of update_query on the documents whose key_field is one of keys"""
+        self.repository.set_database_name(database_name)
+        return self.repository.update_documents(collection_name, key_field, keys, update_query)
+
+    def bulk_write(self, database_name, collection_name, operations, ordered=True):
+        """Executes several write operations at once, returning one result per operation"""
+        self.repository.set_database_name(database_name)
+        return self.repository.bulk_write(collection_name, operations, ordered)
+
+    def get_primary_key(self, database_name, collection_name):
+        """Returns the name of the field that identifies the documents of a collection, or None"""
+        self.repository.set_database_name(database_name)
+        return self.repository.get_primary_key(collection_name)
+
+    def get_column_types(self, database_name, collection_name):
+        """Returns the type declared by the database for each field of a collection, empty for schemaless collections"""
+        self.repository.set_database_name(database_name)
+        return self.repository.get_column_types(collection_name)
+
+    def watch_collection(self, database_name, collection_name, query=None, document_keys=None, stop_event=None, resume_token=None):
+        """Yields the changes made to a collection, after the change of resume_token if one is given"""
+        self.repository.set_database_name(database_name)
+        return self.repository.watch_collection(collection_name, query, document_keys, stop_event, resume_token)
+
+    def compile_local_filter(self, query):
+        """Returns a function that evaluates a filter on loaded documents, or None if only the database can"""
+        return self.repository.compile_local_filter(query)
+
     def execute_raw_query(self, query):
-        """Executes a raw query"""
-        return self.repository.execute_raw_query(query)
+        """Executes a raw query, recording it with its timing in the query history"""
+        started_at = time.perf_counter()
+        try:
+            results = self.repository.execute_raw_query(query)
+        except Exception as e:
+            if self.query_history:
+                self.query_history.record(self.connection_name, query, time.perf_counter() - started_at, error=str(e))
+            raise
+        elapsed = time.perf_counter() - started_at
+        if self.query_history:
+            self.query_history.record(self.connection_name, query, elapsed, results)
+        return results
+
+    def execute_raw_query_into(self, query, store):
+        """
+        Executes a raw query, streaming its rows into a ResultStore rather than a list, and
+        records it in the query history (with its rows unless the store spilled them to disk)
+        """
+        started_at = time.perf_counter()
+        try:
+            store.extend(self.repository.stream_raw_query(query))
+        except Exception as e:
+            store.close()  # The caller never gets the store, delete its spill file here
+            if self.query_history:
+                self.query_history.record(self.connection_name, query, time.perf_counter() - started_at, error=str(e))
+            raise
+        if self.query_history:
+            self.query_history.record(self.connection_name, query, time.perf_counter() - started_at, store.to_list(), row_count=len(store))
+        return store
+
+    def stream_raw_query(self, query):
+        """Yields the results of a raw query as they arrive, without loading them all in memory"""
+        return self.repository.stream_raw_query(query)
+
+    def split_script(self, script):
+        """Splits a script into the statements of the database's query language"""
+        return self.repository.split_script(script)
+
+    def execute_script(self, statements, transaction=False):
+        """Executes statements one after the other, yielding and recording the result of each one"""
+        results = self.repository.execute_script(statements, transaction)
+        try:
+            for result in results:
+                if self.query_history:
+                    self.query_history.record(self.connection_name, result["statement"], result["elapsed"], result["rows"], result["error"])
+                yield result
+        finally:
+            results.close()  # Stopping early must release the connection and roll back a transaction
+
+    def search_query_history(self, text=None):
+        """Returns the recent raw queries of the connection, optionally only those containing text"""
+        return self.query_history.search(self.connection_name, text) if self.query_history else []
+
+    def get_slowest_queries(self):
+        """Returns the slowest raw queries of the connection in the last week"""
+        return self.query_history.slowest(self.connection_name) if self.query_history else []
+
+    def get_cached_query_result(self, query_id):
+        """Returns the cached rows of a query of the history, or None"""
+        return self.query_history.get_result(query_id) if self.query_history else None
 
     def get_syntax_highlighter(self):
         """Returns the syntax highlighter for the query editor"""
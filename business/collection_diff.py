@@ -0,0 +1,176 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from business.config import Config
+from db.document_digest import DIGEST_KIND, canonical_json
+
+MAX_CHUNKS = 4096
+UNKNOWN_SIZE_CHUNKS = 16  # Chunks used when the size of the source collection is unknown
+
+
+def estimate_chunk_count(manager, database_name, collection_name, chunk_size):
+    """Returns the number of key ranges of about chunk_size documents in a collection, from its statistics"""
+    try:
+        stats, _ = manager.get_collection_stats(database_name)
+    except Exception:
+        return UNKNOWN_SIZE_CHUNKS
+    count = next((row["count"] for row in stats if row["collection"] == collection_name), None)
+    if count is None:
+        return UNKNOWN_SIZE_CHUNKS
+    return max(1, min(count // chunk_size + 1, MAX_CHUNKS))
+
+
+class CollectionDiff:
+    """
+    Compares two collections, on the same or on different connections, by primary key range:
+    both sides compute a digest of each chunk in parallel, and only the chunks whose
+    digests differ are read to list the differences. The source is the reference, so
+    "added" documents are only in the target and "removed" documents only in the source.
+    Only MySQL computes digests on the server: a side on another database (e.g. MongoDB),
+    or a MySQL table compared with another database, is read in full to hash its documents.
+    """
+
+    def __init__(self, source, source_database, source_collection, target, target_database, target_collection, key_field=None, chunk_count=None, workers=None, ignore_fields=None):
+        """
+        Initializes the comparison.
+        Args:
+            source (BusinessManager): Manager of the reference connection.
+            target (BusinessManager): Manager of the connection compared with it.
+            key_field (str): Field identifying the documents on both sides, the primary key of the source by default.
+            chunk_count (int): Number of key ranges, one per diff_chunk_size source documents by default.
+            workers (int): Number of chunks compared at the same time.
+            ignore_fields (list): Fields left out of the comparison (e.g. _id between MongoDB and MySQL).
+        """
+        config = Config.get_instance()
+        self.source = source
+        self.source_database = source_database
+        self.source_collection = source_collection
+        self.target = target
+        self.target_database = target_database
+        self.target_collection = target_collection
+        self.key_field = key_field
+        self.chunk_count = chunk_count
+        self.chunk_size = config.get_setting("diff_chunk_size", 10000)
+        self.workers = workers or config.get_setting("diff_workers", 4)
+        self.ignore_fields = set(ignore_fields or [])
+        self.results = queue.Queue()  # Differences are streamed here: {"status", "key", "source", "target"}
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.chunks_mismatched = 0
+        self.documents_compared = 0  # Source documents in the chunks compared so far
+        self.differences = 0
+        self.error = None
+        self.finished = False
+        self._cancelled = threading.Event()
+
+    def start(self):
+        """Starts the comparison in a background thread"""
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        """Stops the comparison, chunks that did not start yet are skipped"""
+        self._cancelled.set()
+
+    def run(self):
+        """Compares the collections, blocking until done (start() runs it in the background)"""
+        executor = None
+        try:
+            key_field = self.key_field = self.key_field or self.source.get_primary_key(self.source_database, self.source_collection)
+            if not key_field:
+                raise Exception("The source collection has no primary key, choose the field to compare on")
+            chunk_count = self.chunk_count or estimate_chunk_count(self.source, self.source_database, self.source_collection, self.chunk_size)
+            boundaries = self.source.get_key_boundaries(self.source_database, self.source_collection, key_field, chunk_count)
+            ranges = list(zip([None] + boundaries, boundaries + [None]))
+            self.chunks_total = len(ranges)
+
+            only_source, only_target = {}, {}  # Unmatched documents, a key may fall in different chunks on each side
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            futures = [executor.submit(self._compare_chunk, key_field, lower, upper) for lower, upper in ranges]
+            for future in as_completed(futures):
+                if self._cancelled.is_set():
+                    break
+                result = future.result()
+                if result is None:
+                    continue
+                count, changed, source_rows, target_rows = result
+                self.chunks_done += 1
+                self.documents_compared += count
+                if changed is None:
+                    continue
+                self.chunks_mismatched += 1
+                for difference in changed:
+                    self._report(difference)
+                only_source.update(source_rows)
+                only_target.update(target_rows)
+            if not self._cancelled.is_set():
+                self._reconcile(only_source, only_target)
+        except Exception as e:
+            self.error = e
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.finished = True
+
+    def _compare_chunk(self, key_field, lower, upper):
+        """
+        Compares one key range, called from the worker threads. Returns None when cancelled,
+        else (source count, None, {}, {}) for a matching chunk, or (source count, changed
+        documents, documents only in the source, documents only in the target) keyed by key.
+        """
+        if self._cancelled.is_set():
+            return None
+        source_digest, target_digest = self._digests(key_field, lower, upper)
+        if source_digest["count"] == target_digest["count"] and source_digest["digest"] == target_digest["digest"]:
+            return source_digest["count"], None, {}, {}
+
+        # Drill down: only the documents of a mismatching chunk are transferred
+        source_rows = self._index(self.source.fetch_range(self.source_database, self.source_collection, key_field, lower, upper), key_field)
+        target_rows = self._index(self.target.fetch_range(self.target_database, self.target_collection, key_field, lower, upper), key_field)
+        changed = []
+        for key in list(source_rows):
+            if key in target_rows:
+                source_document, target_document = source_rows.pop(key), target_rows.pop(key)
+                if canonical_json(self._compared(source_document)) != canonical_json(self._compared(target_document)):
+                    changed.append({"status": "changed", "key": source_document[key_field], "source": source_document, "target": target_document})
+        return source_digest["count"], changed, source_rows, target_rows
+
+    def _digests(self, key_field, lower, upper):
+        """Returns comparable digests of a key range on both sides"""
+        def digest(manager, database, collection, server_side):
+            return manager.chunk_digest(database, collection, key_field, lower, upper, server_side, self.ignore_fields)
+
+        source_digest = digest(self.source, self.source_database, self.source_collection, True)
+        target_digest = digest(self.target, self.target_database, self.target_collection, True)
+        if source_digest["kind"] != target_digest["kind"]:
+            # Server digests of different databases (or columns) cannot be compared, hash the documents here
+            if source_digest["kind"] != DIGEST_KIND:
+                source_digest = digest(self.source, self.source_database, self.source_collection, False)
+            if target_digest["kind"] != DIGEST_KIND:
+                target_digest = digest(self.target, self.target_database, self.target_collection, False)
+        return source_digest, target_digest
+
+    def _compared(self, document):
+        """Returns the fields of a document that are compared"""
+        if not self.ignore_fields:
+            return document
+        return {field: value for field, value in document.items() if field not in self.ignore_fields}
+
+    @staticmethod
+    def _index(documents, key_field):
+        """Indexes documents by the canonical form of their key"""
+        return {canonical_json(document.get(key_field)): document for document in documents}
+
+    def _reconcile(self, only_source, only_target):
+        """Reports the unmatched documents, matching the keys found in different chunks on each side"""
+        for key, source_document in only_source.items():
+            target_document = only_target.pop(key, None)
+            if target_document is None:
+                self._report({"status": "removed", "key": source_document.get(self.key_field), "source": source_document, "target": None})
+            elif canonical_json(self._compared(source_document)) != canonical_json(self._compared(target_document)):
+                self._report({"status": "changed", "key": source_document.get(self.key_field), "source": source_document, "target": target_document})
+        for target_document in only_target.values():
+            self._report({"status": "added", "key": target_document.get(self.key_field), "source": None, "target": target_document})
+
+    def _report(self, difference):
+        self.differences += 1
+        self.results.put(difference)
@@ -0,0 +1,59 @@
+import threading
+import time
+from business.config import Config
+
+
+class CollectionStats:
+    """Fetches the size statistics of the collections of a database and caches them for max_age seconds"""
+
+    def __init__(self, repository, max_age=None, metadata_cache=None, connection_name=None):
+        """
+        Initializes the cache.
+        Args:
+            repository (Repository): Repository of the connection.
+            max_age (int): Seconds after which the statistics of a database are fetched again.
+            metadata_cache (MetadataCache): Keeps the statistics between sessions.
+            connection_name (str): The connection the statistics are cached under.
+        """
+        self.repository = repository
+        self.metadata_cache = metadata_cache
+        self.connection_name = connection_name
+        self.max_age = max_age or Config.get_instance().get_setting("stats_max_age", 300)
+        self._stats = {}  # Database -> (statistics, fetched_at)
+        self._lock = threading.Lock()
+
+    def get_stats(self, database_name, refresh=False):
+        """Returns (statistics, fetched_at) of a database, fetching them when missing, older than max_age or refresh is set"""
+        cached = None if refresh else self.get_cached_stats(database_name)
+        if cached is not None and time.time() - cached[1] <= self.max_age:
+            return cached
+        return self._fetch(database_name)
+
+    def get_cached_stats(self, database_name):
+        """Returns the last (statistics, fetched_at) of a database whatever their age, or None"""
+        with self._lock:
+            cached = self._stats.get(database_name)
+        if cached is None and self.metadata_cache:
+            cached = self.metadata_cache.get_collection_stats(self.connection_name, database_name)
+            if cached is not None:
+                with self._lock:
+                    self._stats.setdefault(database_name, cached)
+        return cached
+
+    def is_fresh(self, fetched_at):
+        """Checks if statistics fetched at fetched_at are younger than max_age"""
+        return time.time() - fetched_at <= self.max_age
+
+    def _fetch(self, database_name):
+        """Reads the statistics from the database and caches them"""
+        self.repository.set_database_name(database_name)
+        stats = self.repository.get_collection_stats()
+        for row in stats:
+            # Share of the allocated space that is free, reclaimable by compact or OPTIMIZE TABLE
+            row["fragmentation"] = row["free_size"] / row["storage_size"] if row["storage_size"] else 0.0
+        fetched_at = time.time()
+        with self._lock:
+            self._stats[database_name] = (stats, fetched_at)
+        if self.metadata_cache:
+            self.metadata_cache.save_collection_stats(self.connection_name, database_name, stats, fetched_at)
+        return stats, fetched_at
@@ -68,6 +68,17 @@ class Config:
         """
         return self._instance._data.get("connections", [])
 
+    def get_setting(self, key, default=None):
+        """
+        Get an application setting.
+        Args:
+            key (str): The name of the setting.
+            default: The value returned when the setting is not defined.
+        Returns:
+            The value of the setting.
+        """
+        return self._instance._data.get("app_settings", {}).get(key, default)
+
     def get_last_connection(self):
         """
         Get the last used connections.
@@ -104,4 +115,29 @@ class Config:
         """
         if connection_string in self._data["connections"]:
             self._instance._data["connections"].remove(connection_string)
+            self._instance._data.get("connection_profiles", {}).pop(connection_string, None)
             self._instance._save_config()
+
+    def get_connection_profile(self, connection_string):
+        """
+        Get the tuning profile of a connection.
+        Args:
+            connection_string (str): The connection string.
+        Returns:
+            dict: Client options (pool size, compression, timeouts...), empty for the defaults.
+        """
+        return dict(self._instance._data.get("connection_profiles", {}).get(connection_string, {}))
+
+    def set_connection_profile(self, connection_string, profile):
+        """
+        Set the tuning profile of a connection, applied the next time it connects.
+        Args:
+            connection_string (str): The connection string.
+            profile (dict): Client options, an empty dict restores the defaults.
+        """
+        profiles = self._instance._data.setdefault("connection_profiles", {})
+        if profile:
+            profiles[connection_string] = dict(profile)
+        else:
+            profiles.pop(connection_string, None)
+        self._instance._save_config()
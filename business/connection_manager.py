@@ -0,0 +1,144 @@
+import threading
+import time
+from business.business_manager import BusinessManager
+from business.config import Config
+from db.mock_client import MockClient
+from db.repository import Repository
+
+MOCK_CONNECTION = "mock://"
+
+
+def client_class(connection_string):
+    """Returns the database client class matching the connection string"""
+    if connection_string == MOCK_CONNECTION:
+        return MockClient
+    if connection_string.startswith("mongodb"):
+        from db.mongodb_client import MongoDBClient
+        return MongoDBClient
+    if connection_string.startswith("mysql"):
+        from db.mySql_client import MySQLClient
+        return MySQLClient
+    raise Exception("Invalid connection string")
+
+
+def create_client(connection_string, profile=None):
+    """Creates the database client matching the connection string, tuned with the options of a profile"""
+    options = dict(profile or {})
+    if connection_string == MOCK_CONNECTION:
+        return MockClient("")
+    if connection_string.startswith("mongodb"):
+        from db.mongodb_client import MongoDBClient
+        return MongoDBClient(
+            connection_string, options.pop("lazy_decoding", False), options.pop("lazy_min_size", 1024),
+            options.pop("preview_length", 200), options
+        )
+    if connection_string.startswith("mysql"):
+        from db.mySql_client import MySQLClient
+        return MySQLClient(
+            connection_string, options.pop("pool_size", 4), options.pop("statement_cache_size", 32),
+            options.pop("preview_length", 200), options
+        )
+    raise Exception("Invalid connection string")
+
+
+class ConnectionManager:
+    """Keeps several live connections, each with its own client and BusinessManager"""
+
+    def __init__(self, max_connections=None, idle_timeout=None, metadata_cache=None, query_history=None):
+        """
+        Initializes the manager.
+        Args:
+            max_connections (int): Maximum number of connections kept open at the same time.
+            idle_timeout (int): Seconds after which an unused connection is closed.
+            metadata_cache (MetadataCache): Where the metadata of the connections is kept between sessions.
+            query_history (QueryHistory): Where the raw queries of the connections are recorded.
+        """
+        config = Config.get_instance()
+        if max_connections is None:
+            max_connections = config.get_setting("max_open_connections", 4)
+        if idle_timeout is None:
+            idle_timeout = config.get_setting("connection_idle_timeout", 600)
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.metadata_cache = metadata_cache
+        self.query_history = query_history
+        self._managers = {}
+        self._last_used = {}
+        self._lock = threading.RLock()
+        self._connect_locks = {}  # Connection string -> lock held while connecting to it
+
+    def open(self, connection_string):
+        """
+        Returns the manager for a connection, connecting to it if it is not open. Connecting
+        only blocks the callers of the same connection, not those of the open ones.
+        """
+        with self._lock:
+            manager = self._managers.get(connection_string)
+            if manager is not None:
+                self._last_used[connection_string] = time.monotonic()
+                return manager
+            connect_lock = self._connect_locks.setdefault(connection_string, threading.Lock())
+        with connect_lock:
+            with self._lock:
+                manager = self._managers.get(connection_string)  # Opened by another caller meanwhile
+            if manager is None:
+                profile = Config.get_instance().get_connection_profile(connection_string)
+                repository = Repository(create_client(connection_string, profile), None)
+                manager = BusinessManager(repository, self.metadata_cache, connection_string, self.query_history)
+                manager.connect()
+            with self._lock:
+                self._managers[connection_string] = manager
+                self._last_used[connection_string] = time.monotonic()
+                evicted = self._enforce_limit(keep=connection_string)
+        for other_connection_string in evicted:
+            self.close(other_connection_string)
+        return manager
+
+    def is_open(self, connection_string):
+        """Checks if a connection is currently open"""
+        with self._lock:
+            return connection_string in self._managers
+
+    def open_connections(self):
+        """Returns the connection strings of the open connections"""
+        with self._lock:
+            return list(self._managers.keys())
+
+    def close(self, connection_string):
+        """Closes a connection and releases its client"""
+        with self._lock:
+            manager = self._managers.pop(connection_string, None)
+            self._last_used.pop(connection_string, None)
+        if manager is not None:
+            try:
+                manager.close()
+            except Exception as e:
+                print(f"Error closing connection {connection_string}: {e}")
+
+    def close_idle(self, keep=None):
+        """
+        Closes the connections that were not used within the idle timeout.
+        Args:
+            keep (str): Connection string that must stay open (e.g. the active one).
+        Returns:
+            list: The connection strings that were closed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                connection_string for connection_string, last_used in self._last_used.items()
+                if connection_string != keep and now - last_used > self.idle_timeout
+            ]
+        for connection_string in idle:
+            self.close(connection_string)
+        return idle
+
+    def close_all(self):
+        """Closes every open connection"""
+        for connection_string in self.open_connections():
+            self.close(connection_string)
+
+    def _enforce_limit(self, keep):
+        """Returns the least recently used connections above the resource cap, to be closed once the lock is released"""
+        candidates = sorted((c for c in self._last_used if c != keep), key=self._last_used.get)
+        return candidates[:max(0, len(self._managers) - self.max_connections)]
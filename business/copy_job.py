@@ -0,0 +1,257 @@
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from business.collection_diff import estimate_chunk_count
+from business.config import Config
+
+
+class CopyJob:
+    """
+    Copies a collection into another one, on the same or another connection, including between
+    MongoDB and MySQL. The source is split into key ranges copied by parallel workers: each
+    streams its range from a server cursor, converts the values to the types of the target and
+    writes them with batched inserts. With a checkpoint file, an interrupted copy resumes after
+    the last batch recorded. A batch written but not recorded yet is sent again: the first batches
+    of each range after a resume skip the documents whose key already exists in the target.
+    """
+
+    def __init__(self, source, source_database, source_collection, target, target_database, target_collection, key_field=None, chunk_count=None, workers=None, batch_size=None, checkpoint_file=None):
+        """
+        Initializes the copy.
+        Args:
+            source (BusinessManager): Manager of the connection to read.
+            target (BusinessManager): Manager of the connection to write, can be the same.
+            key_field (str): Field the source is split on, its primary key by default.
+            chunk_count (int): Number of key ranges, one per copy_chunk_size source documents by default.
+            workers (int): Number of key ranges copied at the same time.
+            batch_size (int): Number of documents per insert call.
+            checkpoint_file (str): File recording the progress, read back to resume the copy.
+        """
+        config = Config.get_instance()
+        self.source = source
+        self.source_database = source_database
+        self.source_collection = source_collection
+        self.target = target
+        self.target_database = target_database
+        self.target_collection = target_collection
+        self.key_field = key_field
+        self.chunk_count = chunk_count
+        self.chunk_size = config.get_setting("copy_chunk_size", 50000)
+        self.workers = workers or config.get_setting("copy_workers", 4)
+        self.batch_size = batch_size or config.get_setting("bulk_batch_size", 1000)
+        self.checkpoint_file = checkpoint_file
+        self.total = 0  # Estimated from the collection statistics of the source
+        self.processed = 0  # Documents sent to the target so far
+        self.affected = 0  # Documents the target reported as inserted
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.chunks_skipped = 0  # Chunks copied by the run the checkpoint was written by
+        self.read_time = 0.0  # Seconds the workers spent reading and converting, summed over the workers
+        self.write_time = 0.0  # Seconds the workers spent in insert calls, summed over the workers
+        self.batch_times = []  # Seconds taken by each insert call
+        self.error = None
+        self.finished = False
+        self.started_at = None
+        self.finished_at = None
+        self._boundaries = []
+        self._progress = {}  # Chunk index -> {"last_key": last key written, "done": bool}
+        self._resume_window = 0  # Documents per range that may have been written by the interrupted run
+        self._converters = {}  # (field, type of the source value) -> function converting it for the target
+        self._target_types = {}
+        self._type_converters = {}
+        self._to_storable = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def start(self):
+        """Starts the copy in a background thread"""
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        """Stops after the batches being written, the checkpoint lets the copy resume from there"""
+        self._cancelled.set()
+
+    def run(self):
+        """Copies the collection, blocking until done (start() runs it in the background)"""
+        self.started_at = time.perf_counter()
+        executor = None
+        try:
+            key_field = self.key_field = self.key_field or self.source.get_primary_key(self.source_database, self.source_collection)
+            if not key_field:
+                raise Exception("The source collection has no primary key, choose the field to split it on")
+            self.total = self._source_count()
+            checkpoint = self._load_checkpoint()
+            if checkpoint:
+                self._boundaries, self._progress = checkpoint["boundaries"], checkpoint["chunks"]
+                # The interrupted run may have written one batch of its size after the last one recorded
+                self._resume_window = checkpoint.get("batch_size", self.batch_size)
+            else:
+                chunk_count = self.chunk_count or estimate_chunk_count(self.source, self.source_database, self.source_collection, self.chunk_size)
+                self._boundaries = self.source.get_key_boundaries(self.source_database, self.source_collection, key_field, chunk_count)
+                with self._lock:
+                    self._save_checkpoint()
+            ranges = list(zip([None] + self._boundaries, self._boundaries + [None]))
+            self.chunks_total = len(ranges)
+            self._prepare_converters()
+
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            futures = []
+            for index, (lower, upper) in enumerate(ranges):
+                if self._progress.get(index, {}).get("done"):
+                    self.chunks_skipped += 1
+                    self.chunks_done += 1
+                else:
+                    futures.append(executor.submit(self._copy_chunk, index, lower, upper))
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        self.chunks_done += 1
+                except Exception as e:
+                    self.error = self.error or e
+                    self._cancelled.set()  # The other workers stop after their current batch
+        except Exception as e:
+            self.error = e
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+            self.finished_at = time.perf_counter()
+            self.finished = True
+
+    def _source_count(self):
+        """Returns the number of documents of the source from its statistics, or 0 if unknown"""
+        try:
+            stats, _ = self.source.get_collection_stats(self.source_database)
+        except Exception:
+            return 0
+        return next((row["count"] for row in stats if row["collection"] == self.source_collection), 0)
+
+    def _prepare_converters(self):
+        """Reads the schema and the type converters of the target"""
+        try:
+            self._target_types = self.target.get_collection_schema(self.target_database, self.target_collection)
+        except Exception:
+            self._target_types = {}  # The target does not exist yet (MongoDB creates it on the first insert)
+        self._type_converters = self.target.get_type_converters()
+        self._to_storable = self.target.to_storable
+
+    def _value_converter(self, field, value_type):
+        """
+        Returns the function converting the values of a field of a given type for the target. When the
+        target collection has values of another type in that field, the value goes through the converter
+        of that type, from its text (e.g. a MySQL TINYINT 1 to a MongoDB boolean); values that do not
+        convert, and fields without a known type, are only made storable by the target.
+        """
+        expected_type = self._target_types.get(field)
+        converter = self._type_converters.get(expected_type) if isinstance(expected_type, type) else None
+        if converter is None or value_type is expected_type or value_type is type(None):
+            return self._to_storable
+        if expected_type is str and value_type in (dict, list):
+            return self._to_storable  # Into a column read as text (e.g. MySQL JSON): written as JSON, not as a repr
+
+        def convert(value):
+            try:
+                return converter(str(value))
+            except Exception:
+                return self._to_storable(value)
+        return convert
+
+    def _convert(self, document):
+        """Converts the values of a source document for the target"""
+        converted = {}
+        for field, value in document.items():
+            converter = self._converters.get((field, type(value)))
+            if converter is None:
+                converter = self._converters[(field, type(value))] = self._value_converter(field, type(value))
+            converted[field] = converter(value)
+        return converted
+
+    def _copy_chunk(self, index, lower, upper):
+        """Copies one key range, called from the worker threads. Returns False when cancelled."""
+        resume_key = self._progress.get(index, {}).get("last_key")
+        documents = self.source.stream_range(
+            self.source_database, self.source_collection, self.key_field,
+            lower if resume_key is None else resume_key, upper, self.batch_size
+        )
+        try:
+            batch = []
+            last_key = None
+            written = 0
+            read_started_at = time.perf_counter()
+            for document in documents:
+                if self._cancelled.is_set():
+                    return False
+                key = document.get(self.key_field)
+                if resume_key is not None and key == resume_key:
+                    continue  # Written before the interruption
+                batch.append(self._convert(document))
+                last_key = key
+                if len(batch) >= self.batch_size:
+                    self._write(index, batch, last_key, time.perf_counter() - read_started_at, written < self._resume_window)
+                    written += len(batch)
+                    batch = []
+                    read_started_at = time.perf_counter()
+            if self._cancelled.is_set():
+                return False
+            if batch:
+                self._write(index, batch, last_key, time.perf_counter() - read_started_at, written < self._resume_window)
+        finally:
+            documents.close()
+        with self._lock:
+            self._progress[index] = {"last_key": last_key if last_key is not None else resume_key, "done": True}
+            self._save_checkpoint()
+        return True
+
+    def _write(self, index, batch, last_key, read_time, skip_duplicates=False):
+        """Inserts a batch and records the last key written"""
+        started_at = time.perf_counter()
+        inserted = self.target.insert_documents(self.target_database, self.target_collection, batch, skip_duplicates)
+        elapsed = time.perf_counter() - started_at
+        with self._lock:
+            self.processed += len(batch)
+            self.affected += inserted or 0
+            self.read_time += read_time
+            self.write_time += elapsed
+            self.batch_times.append(elapsed)
+            self._progress[index] = {"last_key": last_key, "done": False}
+            self._save_checkpoint()
+
+    def _signature(self):
+        """Identifies the copy a checkpoint belongs to"""
+        return (self.source_database, self.source_collection, self.target_database, self.target_collection, self.key_field)
+
+    def _load_checkpoint(self):
+        """Returns the progress saved by an earlier run of the same copy, or None"""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return None
+        with open(self.checkpoint_file, "rb") as file:
+            checkpoint = pickle.load(file)
+        if checkpoint.get("copy") != self._signature():
+            raise Exception(f"The checkpoint file {self.checkpoint_file} belongs to another copy")
+        return checkpoint
+
+    def _save_checkpoint(self):
+        """Writes the progress to the checkpoint file, called with the lock held"""
+        if not self.checkpoint_file:
+            return
+        temporary_file = self.checkpoint_file + ".tmp"
+        with open(temporary_file, "wb") as file:
+            pickle.dump({"copy": self._signature(), "batch_size": self.batch_size, "boundaries": self._boundaries, "chunks": self._progress}, file)
+        os.replace(temporary_file, self.checkpoint_file)  # A crash never leaves a half-written checkpoint
+
+    def report(self):
+        """Returns the throughput of the copy so far"""
+        elapsed = ((self.finished_at or time.perf_counter()) - self.started_at) if self.started_at else 0
+        batch_times = sorted(self.batch_times)
+        return {
+            "copied": self.affected,
+            "chunks": self.chunks_total,
+            "chunks_skipped": self.chunks_skipped,
+            "elapsed": elapsed,
+            "documents_per_second": self.affected / elapsed if elapsed else 0,
+            "read_seconds": self.read_time,
+            "write_seconds": self.write_time,
+            "batch_p50": batch_times[len(batch_times) // 2] if batch_times else None,
+            "batch_p95": batch_times[int(len(batch_times) * 0.95)] if batch_times else None,
+        }
@@ -0,0 +1,252 @@
+import bisect
+import datetime
+import decimal
+import random
+import re
+import string
+
+DEFAULT_STRING_CARDINALITY = 1000  # Distinct values of the text fields of a spec built from a schema
+DEFAULT_SKEW = 1.0
+ALPHABET = string.ascii_letters + string.digits
+
+
+class DataGenerator:
+    """
+    Generates synthetic documents from a spec, a dict of field name -> field spec:
+        {"type": "int" | "float", "min": 0, "max": 1000}
+        {"type": "str", "min_length": 8, "max_length": 16}
+        {"type": "bool"}
+        {"type": "datetime", "start": "2020-01-01", "end": "2025-01-01"}
+        {"type": "sequence", "start": 1, "prefix": ""}   unique, follows the document number
+        {"type": "object", "fields": {...}}               nested document
+        {"type": "array", "items": {...}, "min_length": 0, "max_length": 5}
+        {"values": ["a", "b", "c"]}                       one of the values
+    Scalar fields also accept "cardinality" (number of distinct values), "skew" (Zipf
+    exponent over those values, 0 for uniform) and "null_rate" (share of None values).
+    """
+
+    def __init__(self, spec, seed=None):
+        """
+        Initializes the generator.
+        Args:
+            spec (dict): Field name -> field spec.
+            seed: Makes the documents reproducible, the same seed and batches give the same documents.
+        """
+        self.spec = spec
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self._fields = [(name, _compile(field_spec)) for name, field_spec in spec.items()]
+
+    def generate(self, start, count):
+        """Returns the documents start to start + count - 1"""
+        rng = random.Random(f"{self.seed}:{start}")
+        fields = self._fields
+        return [{name: generate(rng, index) for name, generate in fields} for index in range(start, start + count)]
+
+
+def _compile(field_spec):
+    """Returns a function (rng, document number) -> value for a field spec"""
+    generate = _compile_value(field_spec)
+    null_rate = field_spec.get("null_rate", 0)
+    if not null_rate:
+        return generate
+
+    def generate_or_null(rng, index):
+        return None if rng.random() < null_rate else generate(rng, index)
+    return generate_or_null
+
+
+def _compile_value(field_spec):
+    """Returns the generator of a field, ignoring its null_rate"""
+    if "values" in field_spec:
+        values = list(field_spec["values"])
+        pick = _rank_picker(len(values), field_spec.get("skew", 0))
+        return lambda rng, index: values[pick(rng)]
+
+    kind = field_spec.get("type", "str")
+    if kind == "object":
+        fields = [(name, _compile(spec)) for name, spec in field_spec.get("fields", {}).items()]
+        return lambda rng, index: {name: generate(rng, index) for name, generate in fields}
+    if kind == "array":
+        item = _compile(field_spec.get("items", {"type": "str"}))
+        low, high = field_spec.get("min_length", 0), field_spec.get("max_length", 5)
+        return lambda rng, index: [item(rng, index) for _ in range(rng.randint(low, high))]
+    if kind == "sequence":
+        first, prefix = field_spec.get("start", 1), field_spec.get("prefix")
+        if prefix is None:
+            return lambda rng, index: first + index
+        return lambda rng, index: f"{prefix}{first + index}"
+    if kind == "bool":
+        return lambda rng, index: rng.random() < 0.5
+
+    cardinality = field_spec.get("cardinality")
+    if not cardinality:
+        return _uniform(kind, field_spec)
+    values = _ranked_values(kind, field_spec, cardinality)
+    pick = _rank_picker(cardinality, field_spec.get("skew", 0))
+    return lambda rng, index: values(pick(rng))
+
+
+def _uniform(kind, field_spec):
+    """Returns the generator of an int, float, str or datetime field drawing any value of its range"""
+    if kind in ("int", "float"):
+        low, high = field_spec.get("min", 0), field_spec.get("max", 1000)
+        if kind == "int":
+            return lambda rng, index: rng.randint(low, high)
+        return lambda rng, index: round(rng.uniform(low, high), 2)
+    if kind == "datetime":
+        start, span = _datetime_range(field_spec)
+        return lambda rng, index: start + datetime.timedelta(seconds=int(rng.random() * span))
+    if kind == "str":
+        low, high = field_spec.get("min_length", 8), field_spec.get("max_length", 16)
+        return lambda rng, index: "".join(rng.choices(ALPHABET, k=rng.randint(low, high)))
+    raise ValueError(f"Unknown field type: {kind}")
+
+
+def _ranked_values(kind, field_spec, cardinality):
+    """Returns a function mapping the ranks 0 to cardinality - 1 to distinct values of a field"""
+    if kind in ("int", "float"):
+        low, high = field_spec.get("min", 0), field_spec.get("max", 1000)
+        step = (high - low) / max(cardinality - 1, 1)
+        if kind == "int":
+            return lambda rank: low + int(rank * step)
+        return lambda rank: round(low + rank * step, 2)
+    if kind == "datetime":
+        start, span = _datetime_range(field_spec)
+        step = span / cardinality
+        return lambda rank: start + datetime.timedelta(seconds=int(rank * step))
+    if kind == "str":
+        prefix, max_length = field_spec.get("prefix", "value_"), field_spec.get("max_length")
+        return lambda rank: f"{prefix}{rank}"[:max_length]
+    raise ValueError(f"Unknown field type: {kind}")
+
+
+def _rank_picker(cardinality, skew):
+    """Returns a function drawing a rank in [0, cardinality), following a Zipf law of exponent skew"""
+    if cardinality < 1:
+        raise ValueError("The cardinality must be at least 1")
+    if not skew:
+        return lambda rng: rng.randrange(cardinality)
+    cumulative = []
+    total = 0.0
+    for rank in range(1, cardinality + 1):
+        total += rank ** -skew
+        cumulative.append(total)
+    return lambda rng: min(bisect.bisect(cumulative, rng.random() * total), cardinality - 1)
+
+
+def _datetime_range(field_spec):
+    """Returns the start and the length in seconds of the range of a datetime field"""
+    start, end = (
+        value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(value)
+        for value in (field_spec.get("start", "2020-01-01"), field_spec.get("end", "2025-01-01"))
+    )
+    return start, (end - start).total_seconds()
+
+
+def spec_from_schema(schema, primary_key=None, sequence_start=1):
+    """
+    Builds a spec from the schema of a collection (get_collection_schema): Python types
+    for MongoDB, column types such as varchar(255) for MySQL. The primary key becomes a
+    sequence starting at sequence_start, except ObjectId keys, left to the database. Other
+    ObjectId fields are skipped, as they cannot be generated without the driver.
+    """
+    spec = {}
+    for field, field_type in schema.items():
+        kind, options = _schema_type(field_type)
+        if kind == "objectid":
+            continue
+        if field == primary_key:
+            spec[field] = {"type": "sequence", "start": sequence_start}
+            if kind == "str" and len(field) + 8 <= options.get("max_length", 255):
+                spec[field]["prefix"] = f"{field}_"
+            continue
+        if kind == "str":
+            # Short columns get bare numbers, so the values stay distinct once cut to the column size
+            prefix = f"{field}_" if len(field) + 5 <= options.get("max_length", 255) else ""
+            options = {"cardinality": DEFAULT_STRING_CARDINALITY, "skew": DEFAULT_SKEW, "prefix": prefix, **options}
+        spec[field] = {"type": kind, **options}
+    return spec
+
+
+def _schema_type(field_type):
+    """Maps a schema type to a field type and its options"""
+    if isinstance(field_type, type):
+        name = field_type.__name__
+        if name == "ObjectId":
+            return "objectid", {}
+        if issubclass(field_type, bool):
+            return "bool", {}
+        if issubclass(field_type, int):
+            return "int", {}
+        if issubclass(field_type, (float, decimal.Decimal)):
+            return "float", {}
+        if issubclass(field_type, datetime.date):
+            return "datetime", {}
+        if issubclass(field_type, dict):
+            return "object", {}
+        if issubclass(field_type, list):
+            return "array", {}
+        return "str", {}
+
+    # MySQL column type, e.g. "int(11) unsigned", "decimal(10,2)", "varchar(255)"
+    match = re.match(r"\s*(\w+)(?:\((\d+)(?:,\s*\d+)?\))?", str(field_type).lower())
+    name, size = (match.group(1), match.group(2)) if match else ("", None)
+    if name == "tinyint" and size == "1" or name in ("bool", "boolean", "bit"):
+        return "bool", {}
+    if name in ("tinyint", "smallint", "mediumint", "int", "integer", "bigint", "year"):
+        return "int", {"min": 0, "max": 100 if name == "tinyint" else 1000000}
+    if name in ("decimal", "numeric", "float", "double", "real"):
+        return "float", {"min": 0, "max": 10000}
+    if name in ("date", "datetime", "timestamp"):
+        return "datetime", {}
+    if name in ("char", "varchar") and size:
+        return "str", {"min_length": min(int(size), 8), "max_length": min(int(size), 16)}
+    return "str", {}
+
+
+def spec_from_profile(profile, primary_key=None, sequence_start=1):
+    """Builds a spec from a schema profile, keeping the null rates and the nested fields seen in its sample"""
+    return _profile_spec(profile, "", primary_key, sequence_start)
+
+
+def _profile_spec(profile, prefix, primary_key, sequence_start):
+    children = {
+        path[len(prefix):]: stats for path, stats in profile.fields.items()
+        if path.startswith(prefix) and "." not in path[len(prefix):]
+    }
+    spec = spec_from_schema({name: stats.dominant_type() or str for name, stats in children.items()}, primary_key, sequence_start)
+    for name, field_spec in spec.items():
+        null_rate = children[name].null_rate()
+        if null_rate and name != primary_key:
+            field_spec["null_rate"] = round(null_rate, 3)
+        if field_spec["type"] == "object":
+            field_spec["fields"] = _profile_spec(profile, f"{prefix}{name}.", None, 1)
+        elif field_spec["type"] == "array" and any(path.startswith(f"{prefix}{name}[].") for path in profile.fields):
+            field_spec["items"] = {"type": "object", "fields": _profile_spec(profile, f"{prefix}{name}[].", None, 1)}
+    return spec
+
+
+def spec_for_collection(manager, database_name, collection_name):
+    """
+    Builds the spec of an existing collection from its schema profile. The columns of a
+    table take their type and length from their declared type, keeping the null rates
+    seen in the profile. An integer primary key continues after the largest key of the
+    collection.
+    """
+    primary_key = manager.get_primary_key(database_name, collection_name)
+    sequence_start = 1
+    if primary_key:
+        last = list(manager.fetch_documents(database_name, collection_name, primary_key, -1, None, 1, 0))
+        if last and isinstance(last[0].get(primary_key), int):
+            sequence_start = last[0][primary_key] + 1
+    profile = manager.get_schema_profile(database_name, collection_name)
+    spec = spec_from_profile(profile, primary_key, sequence_start)
+    column_types = manager.get_column_types(database_name, collection_name)
+    if not column_types:
+        return spec
+    columns = spec_from_schema(column_types, primary_key, sequence_start)
+    for name, field_spec in columns.items():
+        null_rate = spec.get(name, {}).get("null_rate")
+        if null_rate:
+            field_spec["null_rate"] = null_rate
+    return columns
@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from business.config import Config
+
+
+class DataSeeder:
+    """Bulk-loads generated documents into a collection with batched inserts on parallel workers"""
+
+    def __init__(self, manager, database_name, collection_name, generator, count, batch_size=None, workers=None):
+        """
+        Initializes the seeder.
+        Args:
+            manager (BusinessManager): Manager of the connection to load.
+            generator (DataGenerator): Generates the documents.
+            count (int): Number of documents to insert.
+            batch_size (int): Number of documents per insert call.
+            workers (int): Number of batches generated and inserted at the same time.
+        """
+        config = Config.get_instance()
+        self.manager = manager
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self.generator = generator
+        self.total = count
+        self.batch_size = batch_size or config.get_setting("bulk_batch_size", 1000)
+        self.workers = workers or config.get_setting("seed_workers", 4)
+        self.processed = 0  # Documents sent to the database so far
+        self.affected = 0  # Documents the database reported as inserted
+        self.batch_times = []  # Seconds taken by each insert call
+        self.error = None
+        self.finished = False
+        self.started_at = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+
+    def start(self):
+        """Starts loading in a background thread"""
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def cancel(self):
+        """Stops after the batches being inserted, batches already inserted are kept"""
+        self._cancelled.set()
+
+    def run(self):
+        """Loads the documents, blocking until done (start() runs it in the background)"""
+        self.started_at = time.perf_counter()
+        # Only a few batches are in flight, so millions of documents are never all in memory
+        starts = iter(range(0, self.total, self.batch_size))
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            pending = set()
+            while True:
+                while len(pending) < self.workers and not self._cancelled.is_set() and self.error is None:
+                    start = next(starts, None)
+                    if start is None:
+                        break
+                    pending.add(executor.submit(self._insert_batch, start, min(self.batch_size, self.total - start)))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        sent, inserted, elapsed = future.result()
+                    except Exception as e:
+                        self.error = self.error or e
+                        continue
+                    self.processed += sent
+                    self.affected += inserted
+                    self.batch_times.append(elapsed)
+        finally:
+            executor.shutdown(wait=True)
+            self.finished_at = time.perf_counter()
+            self.finished = True
+
+    def _insert_batch(self, start, count):
+        """Generates and inserts one batch, called from the worker threads"""
+        documents = self.generator.generate(start, count)
+        started_at = time.perf_counter()
+        inserted = self.manager.insert_documents(self.database_name, self.collection_name, documents)
+        return count, inserted, time.perf_counter() - started_at
+
+    def report(self):
+        """Returns the throughput of the load so far"""
+        elapsed = ((self.finished_at or time.perf_counter()) - self.started_at) if self.started_at else 0
+        batch_times = sorted(self.batch_times)
+        return {
+            "inserted": self.affected,
+            "elapsed": elapsed,
+            "documents_per_second": self.affected / elapsed if elapsed else 0,
+            "batch_p50": batch_times[len(batch_times) // 2] if batch_times else None,
+            "batch_p95": batch_times[int(len(batch_times) * 0.95)] if batch_times else None,
+        }
@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from business.config import Config
+
+
+class DatabaseSearch:
+    """Runs the same filter against the collections of a database on a bounded worker pool"""
+
+    def __init__(self, manager, database_name, query, field=None, limit=10, max_workers=None, timeout=None):
+        """
+        Initializes the search.
+        Args:
+            manager (BusinessManager): Manager of the connection to search.
+            database_name (str): The database whose collections are searched.
+            query (str): The filter, in the same format as the browse filter.
+            field (str): If given, only collections whose schema has this field are searched.
+            limit (int): Maximum number of documents returned per collection.
+            max_workers (int): Number of collections searched at the same time.
+            timeout (float): Seconds after which a collection is reported as timed out.
+        """
+        config = Config.get_instance()
+        self.manager = manager
+        self.database_name = database_name
+        self.query = query
+        self.field = field
+        self.limit = limit
+        self.max_workers = max_workers or config.get_setting("search_workers", 8)
+        self.timeout = timeout or config.get_setting("search_timeout", 30)
+        self.results = queue.Queue()  # Results are streamed here as collections complete
+        self.finished = False
+        self._cancelled = threading.Event()
+        self._started_at = {}
+
+    def start(self):
+        """Starts the search in a background thread"""
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        """Stops the search, collections that did not start yet are skipped"""
+        self._cancelled.set()
+
+    def _run(self):
+        """Fans the filter out to the collections and collects the results as they complete"""
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            collections = self.manager.get_collections(self.database_name)
+            futures = {executor.submit(self._search_collection, c): c for c in collections}
+            pending = set(futures)
+            while pending and not self._cancelled.is_set():
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.results.put(future.result())
+                now = time.monotonic()
+                for future in list(pending):
+                    collection = futures[future]
+                    started_at = self._started_at.get(collection)
+                    if started_at is not None and now - started_at > self.timeout:
+                        # The worker cannot be interrupted, its result is discarded
+                        pending.discard(future)
+                        self.results.put(self._result(collection, "timeout", elapsed=now - started_at))
+            for future in pending:
+                future.cancel()
+        except Exception as e:
+            self.results.put(self._result(None, "error", error=str(e)))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.finished = True
+
+    def _search_collection(self, collection_name):
+        """Searches one collection, called from the worker threads"""
+        if self._cancelled.is_set():
+            return self._result(collection_name, "cancelled")
+        started_at = self._started_at[collection_name] = time.monotonic()
+        try:
+            if self.field:
+                schema = self.manager.get_collection_schema(self.database_name, collection_name)
+                if self.field not in schema:
+                    return self._result(collection_name, "skipped", elapsed=time.monotonic() - started_at)
+            documents = self.manager.fetch_documents(
+                self.database_name, collection_name, query=self.query, limit=self.limit
+            )
+            status = "match" if documents else "no match"
+            return self._result(collection_name, status, documents, time.monotonic() - started_at)
+        except Exception as e:
+            return self._result(collection_name, "error", elapsed=time.monotonic() - started_at, error=str(e))
+
+    @staticmethod
+    def _result(collection_name, status, documents=None, elapsed=None, error=None):
+        """Builds a search result"""
+        return {
+            "collection": collection_name,
+            "status": status,
+            "documents": documents or [],
+            "elapsed": elapsed,
+            "error": error,
+        }
@@ -0,0 +1,57 @@
+def _keep(value):
+    return value
+
+
+class DocumentCodec:
+    """
+    Converts the text values typed by the user to the types of the fields of a collection.
+    Compiled once per schema version: each field gets its own converter, so converting a
+    value does not look up the schema or the converters of the database again.
+    """
+
+    def __init__(self, field_types, converters, version=None):
+        """
+        Compiles the codec.
+        Args:
+            field_types (dict): Field -> Python type of its values (unknown fields are kept as text).
+            converters (dict): Python type -> function converting a text to it, from get_type_converters.
+            version: Version of the schema the codec was compiled from.
+        """
+        self.version = version
+        self.field_types = dict(field_types)
+        self._converters = {}
+        for field, field_type in self.field_types.items():
+            converter = converters.get(field_type)
+            self._converters[field] = _keep if converter is None or field_type is str else self._compile(field, converter)
+
+    @staticmethod
+    def _compile(field, converter):
+        """Returns the converter of one field, keeping the values that are already typed"""
+        def convert(value):
+            if not isinstance(value, str):
+                return value
+            try:
+                return converter(value)
+            except Exception as e:
+                raise ValueError(f"Error converting field '{field}' with value '{value}': {e}")
+        return convert
+
+    def convert_value(self, field, value):
+        """Converts a value of a field"""
+        return self._converters.get(field, _keep)(value)
+
+    def convert_document(self, document):
+        """Returns a copy of a document with its values converted"""
+        converters = self._converters
+        return {field: converters.get(field, _keep)(value) for field, value in document.items()}
+
+    def convert_documents(self, documents):
+        """Returns copies of a batch of documents with their values converted, field by field"""
+        converted = [dict(document) for document in documents]
+        for field, converter in self._converters.items():
+            if converter is _keep:
+                continue
+            for document in converted:
+                if field in document:
+                    document[field] = converter(document[field])
+        return converted
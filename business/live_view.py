@@ -0,0 +1,49 @@
+import queue
+import threading
+
+
+class LiveView:
+    """Follows the changes of a collection in a background thread"""
+
+    def __init__(self, manager, database_name, collection_name, query=None, document_keys=None, resume_token=None):
+        """
+        Initializes the live view.
+        Args:
+            manager (BusinessManager): Manager of the connection to watch.
+            query (str): Filter of the current view, only matching inserts and updates are sent.
+            document_keys (list): Keys of the documents shown, whose updates are always sent.
+            resume_token: Token of the last change applied, the view follows the changes made after it.
+        """
+        self.manager = manager
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self.query = query
+        self.document_keys = document_keys
+        self.resume_token = resume_token
+        self.changes = queue.Queue()  # Changes are streamed here for the UI to apply
+        self.error = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts following the changes"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops following the changes, the change stream is closed by the background thread"""
+        self._stop_event.set()
+
+    @property
+    def running(self):
+        """Whether the view is still following the changes"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            for change in self.manager.watch_collection(
+                self.database_name, self.collection_name, self.query, self.document_keys, self._stop_event, self.resume_token
+            ):
+                self.changes.put(change)
+        except Exception as e:
+            self.error = e
@@ -0,0 +1,128 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from business.config import Config
+
+
+class MetadataCache:
+    """Databases, collections, schema profiles and collection statistics of each connection, kept in SQLite between sessions"""
+
+    def __init__(self, path=None):
+        """
+        Opens (or creates) the cache file.
+        Args:
+            path (str): Location of the SQLite file, next to the configuration file by default.
+        """
+        if path is None:
+            config = Config.get_instance()
+            default_path = os.path.join(os.path.dirname(os.path.abspath(config.config_file)), "metadata_cache.db")
+            path = config.get_setting("metadata_cache_file", default_path)
+        self.path = path
+        self._lock = threading.Lock()  # The connection is shared by the UI and the background refreshes
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS databases (
+                    connection TEXT, database TEXT, position INTEGER, updated_at REAL,
+                    PRIMARY KEY (connection, database)
+                );
+                CREATE TABLE IF NOT EXISTS collections (
+                    connection TEXT, database TEXT, collection TEXT, position INTEGER,
+                    PRIMARY KEY (connection, database, collection)
+                );
+                CREATE TABLE IF NOT EXISTS schema_profiles (
+                    connection TEXT, database TEXT, collection TEXT, profile BLOB, profiled_at REAL,
+                    PRIMARY KEY (connection, database, collection)
+                );
+                CREATE TABLE IF NOT EXISTS collection_stats (
+                    connection TEXT, database TEXT, stats BLOB, fetched_at REAL,
+                    PRIMARY KEY (connection, database)
+                );
+            """)
+
+    def get_databases(self, connection):
+        """Returns the cached {database: [collections]} of a connection, or None if it was never cached"""
+        with self._lock:
+            databases = self._db.execute(
+                "SELECT database FROM databases WHERE connection = ? ORDER BY position", (connection,)
+            ).fetchall()
+            collections = self._db.execute(
+                "SELECT database, collection FROM collections WHERE connection = ? ORDER BY position", (connection,)
+            ).fetchall()
+        if not databases:
+            return None
+        tree = {database: [] for database, in databases}
+        for database, collection in collections:
+            if database in tree:
+                tree[database].append(collection)
+        return tree
+
+    def save_databases(self, connection, tree):
+        """Replaces the cached databases and collections of a connection"""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM databases WHERE connection = ?", (connection,))
+            self._db.execute("DELETE FROM collections WHERE connection = ?", (connection,))
+            self._db.executemany(
+                "INSERT INTO databases VALUES (?, ?, ?, ?)",
+                [(connection, database, position, now) for position, database in enumerate(tree)]
+            )
+            self._db.executemany(
+                "INSERT INTO collections VALUES (?, ?, ?, ?)",
+                [
+                    (connection, database, collection, position)
+                    for database, collections in tree.items()
+                    for position, collection in enumerate(collections)
+                ]
+            )
+
+    def get_schema_profile(self, connection, database_name, collection_name):
+        """Returns the cached schema profile of a collection, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT profile FROM schema_profiles WHERE connection = ? AND database = ? AND collection = ?",
+                (connection, database_name, collection_name)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            return None  # Written by another version, or a type that can no longer be imported
+
+    def save_schema_profile(self, connection, database_name, collection_name, profile):
+        """Stores the schema profile of a collection"""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO schema_profiles VALUES (?, ?, ?, ?, ?)",
+                (connection, database_name, collection_name, pickle.dumps(profile), profile.profiled_at)
+            )
+
+    def get_collection_stats(self, connection, database_name):
+        """Returns the cached (collection statistics, fetched_at) of a database, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT stats, fetched_at FROM collection_stats WHERE connection = ? AND database = ?",
+                (connection, database_name)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0]), row[1]
+        except Exception:
+            return None
+
+    def save_collection_stats(self, connection, database_name, stats, fetched_at):
+        """Stores the collection statistics of a database"""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO collection_stats VALUES (?, ?, ?, ?)",
+                (connection, database_name, pickle.dumps(stats), fetched_at)
+            )
+
+    def close(self):
+        """Closes the cache file"""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,113 @@
+class PendingChanges:
+    """Inserts, updates and deletes of a collection staged locally until they are committed together"""
+
+    def __init__(self, manager, database_name, collection_name):
+        self.manager = manager
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self.primary_key = manager.get_primary_key(database_name, collection_name)
+        self.changes = []  # Dicts with "op", "original" (the document as loaded) and "values"
+
+    def __len__(self):
+        return len(self.changes)
+
+    def row_key(self, document):
+        """Returns the value identifying a document: its primary key, or all of its fields"""
+        if self.primary_key and self.primary_key in document:
+            return self.primary_key, document[self.primary_key]
+        return repr(sorted(document.items(), key=lambda item: item[0]))
+
+    def find(self, document):
+        """Returns the staged update or delete of a loaded document, or None"""
+        key = self.row_key(document)
+        for change in self.changes:
+            if change["op"] == "insert":
+                continue
+            # The grid shows the staged values, so the document may already include them
+            if self.row_key(change["original"]) == key or self.row_key({**change["original"], **change["values"]}) == key:
+                return change
+        return None
+
+    def stage_insert(self, document):
+        """Stages a new document, converted to the types of the collection"""
+        values = self.manager.convert_document(self.database_name, self.collection_name, document)
+        self.changes.append({"op": "insert", "original": None, "values": values})
+        return values
+
+    def stage_update(self, document, field, value):
+        """Stages a new value for a field of a loaded document, merging edits of the same document"""
+        value = self.manager.convert_value(self.database_name, self.collection_name, field, value)
+        change = self.find(document)
+        if change is None:
+            change = {"op": "update", "original": document, "values": {}}
+            self.changes.append(change)
+        if change["op"] == "update":
+            change["values"][field] = value
+        return value
+
+    def stage_delete(self, document):
+        """Stages the deletion of a loaded document, replacing its staged updates"""
+        change = self.find(document)
+        if change is None:
+            self.changes.append({"op": "delete", "original": document, "values": {}})
+        else:
+            change["op"] = "delete"
+            change["values"] = {}
+
+    def diff(self):
+        """Returns one (operation, document, changes) tuple of texts per staged change"""
+        rows = []
+        for change in self.changes:
+            if change["op"] == "insert":
+                rows.append(("insert", str(change["values"]), ""))
+            elif change["op"] == "delete":
+                rows.append(("delete", str(change["original"]), ""))
+            else:
+                original = change["original"]
+                edits = "; ".join(f"{field}: {original.get(field, '')} -> {value}" for field, value in change["values"].items())
+                rows.append(("update", str(original), edits))
+        return rows
+
+    def to_operations(self):
+        """Returns the staged changes as bulk write operations"""
+        operations = []
+        for change in self.changes:
+            if change["op"] == "insert":
+                operations.append({"op": "insert", "document": change["values"]})
+                continue
+            original = change["original"]
+            if self.primary_key and self.primary_key in original:
+                filter_query = {self.primary_key: original[self.primary_key]}
+            else:
+                filter_query = {key: value for key, value in original.items() if key not in change["values"]}
+            if change["op"] == "update":
+                operations.append({"op": "update", "filter": filter_query, "update": change["values"]})
+            else:
+                operations.append({"op": "delete", "filter": filter_query})
+        return operations
+
+    def delete_count(self):
+        """Returns the number of staged deletes"""
+        return sum(1 for change in self.changes if change["op"] == "delete")
+
+    def commit(self, ordered=True):
+        """
+        Writes every staged change in one bulk write (or transaction) and returns the
+        (change, result) pairs. An update or delete that matched no document is reported
+        as a conflict: the document changed or was deleted since it was loaded. Changes
+        that were not written stay staged.
+        """
+        if not self.changes:
+            return []
+        results = self.manager.bulk_write(self.database_name, self.collection_name, self.to_operations(), ordered)
+        for change, result in zip(self.changes, results):
+            if result["status"] == "ok" and change["op"] != "insert" and result.get("count") == 0:
+                result["status"] = "conflict"
+                result["error"] = "no document matched, it was changed or deleted since it was loaded"
+        report = list(zip(self.changes, results))
+        self.changes = [change for change, result in report if result["status"] != "ok"]
+        return report
+
+    def discard(self):
+        """Drops every staged change"""
+        self.changes = []
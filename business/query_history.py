@@ -0,0 +1,118 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from business.config import Config
+
+WEEK_SECONDS = 7 * 24 * 3600
+
+
+class QueryHistory:
+    """Raw queries run on each connection with their timings, and compressed copies of recent results"""
+
+    def __init__(self, path=None, result_cache_size=None):
+        """
+        Opens (or creates) the history file.
+        Args:
+            path (str): Location of the SQLite file, next to the configuration file by default.
+            result_cache_size (int): Maximum number of compressed bytes kept for cached results.
+        """
+        config = Config.get_instance()
+        if path is None:
+            default_path = os.path.join(os.path.dirname(os.path.abspath(config.config_file)), "query_history.db")
+            path = config.get_setting("query_history_file", default_path)
+        if result_cache_size is None:
+            result_cache_size = config.get_setting("query_result_cache_size", 50 * 1024 * 1024)
+        self.path = path
+        self.result_cache_size = result_cache_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS queries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, connection TEXT, query TEXT, executed_at REAL,
+                    elapsed REAL, row_count INTEGER, bytes INTEGER, error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS queries_by_connection ON queries (connection, executed_at);
+                CREATE TABLE IF NOT EXISTS results (
+                    query_id INTEGER PRIMARY KEY, data BLOB, size INTEGER
+                );
+            """)
+
+    def record(self, connection, query, elapsed, rows=None, error=None, row_count=None):
+        """
+        Records a query run, keeping a compressed copy of its rows while the cache has room.
+        The number of rows of a result that is not cached can be given as row_count.
+        Returns the id of the history entry.
+        """
+        data = None
+        size = None
+        if rows is not None:
+            try:
+                serialized = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+                size = len(serialized)
+                data = zlib.compress(serialized)
+            except Exception:
+                data = None  # Rows of a type that cannot be serialized are not cached
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO queries (connection, query, executed_at, elapsed, row_count, bytes, error) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (connection, query, time.time(), elapsed, len(rows) if rows is not None else row_count, size, error)
+            )
+            query_id = cursor.lastrowid
+            if data is not None and len(data) <= self.result_cache_size // 4:
+                self._db.execute("INSERT INTO results VALUES (?, ?, ?)", (query_id, data, len(data)))
+                self._evict()
+        return query_id
+
+    def _evict(self):
+        """Drops the oldest cached results until they fit in the cache size"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        for query_id, size in self._db.execute("SELECT query_id, size FROM results ORDER BY query_id").fetchall():
+            if total <= self.result_cache_size:
+                break
+            self._db.execute("DELETE FROM results WHERE query_id = ?", (query_id,))
+            total -= size
+
+    def search(self, connection, text=None, limit=200):
+        """Returns the most recent queries of a connection, optionally only those containing text"""
+        query = "SELECT q.*, r.query_id IS NOT NULL FROM queries q LEFT JOIN results r ON r.query_id = q.id WHERE q.connection = ?"
+        params = [connection]
+        if text:
+            query += " AND q.query LIKE ?"
+            params.append(f"%{text}%")
+        query += " ORDER BY q.executed_at DESC LIMIT ?"
+        params.append(limit)
+        return self._entries(query, params)
+
+    def slowest(self, connection, since=None, limit=50):
+        """Returns the slowest queries of a connection run since a timestamp (the last week by default)"""
+        if since is None:
+            since = time.time() - WEEK_SECONDS
+        return self._entries(
+            "SELECT q.*, r.query_id IS NOT NULL FROM queries q LEFT JOIN results r ON r.query_id = q.id"
+            " WHERE q.connection = ? AND q.executed_at >= ? AND q.error IS NULL ORDER BY q.elapsed DESC LIMIT ?",
+            (connection, since, limit)
+        )
+
+    def _entries(self, query, params):
+        """Runs a history query and returns its rows as dicts"""
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        keys = ("id", "connection", "query", "executed_at", "elapsed", "row_count", "bytes", "error", "cached")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def get_result(self, query_id):
+        """Returns the cached rows of a history entry, or None if they are not cached"""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM results WHERE query_id = ?", (query_id,)).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def close(self):
+        """Closes the history file"""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,290 @@
+import pickle
+import sys
+from array import array
+from db.document_matcher import MISSING, sort_key
+from db.lazy_value import expand_value
+
+INTERN_MAX_LENGTH = 64
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+
+class PackedValue(bytes):
+    """A nested value (dict or list) kept serialized until it is read"""
+    __slots__ = ()
+
+    @classmethod
+    def pack(cls, value):
+        """Serializes a value"""
+        return cls(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def unpack(self):
+        """Returns the decoded value"""
+        return pickle.loads(self)
+
+
+class Column:
+    """
+    The values of one field for every row of a page. Integer and float columns
+    are stored in typed arrays, other columns in a list where short strings are
+    interned and nested values are packed.
+    """
+
+    def __init__(self, kind, data, nulls=None, absent=None):
+        self.kind = kind  # "int", "float" or "object"
+        self.data = data
+        self.nulls = nulls or set()  # Rows of typed columns holding None
+        self.absent = absent or set()  # Rows of typed columns where the field is missing
+
+    @classmethod
+    def build(cls, values):
+        """Builds the most compact column able to hold the values (MISSING marks absent fields)"""
+        present = [value for value in values if value is not MISSING and value is not None]
+        kind = "object"
+        if present and all(type(value) is int and _INT64_MIN <= value <= _INT64_MAX for value in present):
+            kind = "int"
+        elif present and all(type(value) is float for value in present):
+            kind = "float"
+
+        if kind == "object":
+            return cls(kind, [cls._pack(value) for value in values])
+        nulls = {index for index, value in enumerate(values) if value is None}
+        absent = {index for index, value in enumerate(values) if value is MISSING}
+        data = array("q" if kind == "int" else "d", (0 if index in nulls or index in absent else value for index, value in enumerate(values)))
+        return cls(kind, data, nulls, absent)
+
+    @classmethod
+    def empty(cls, length):
+        """Builds a column where the field is missing in every row"""
+        return cls("object", [MISSING] * length)
+
+    @staticmethod
+    def _pack(value):
+        """Converts a value to its stored form"""
+        if type(value) is str and len(value) <= INTERN_MAX_LENGTH:
+            return sys.intern(value)
+        if isinstance(value, (dict, list)):
+            return PackedValue.pack(value)
+        return value
+
+    def _fits(self, value):
+        """Checks if a value can be stored in the typed array of the column"""
+        if self.kind == "int":
+            return type(value) is int and _INT64_MIN <= value <= _INT64_MAX
+        return type(value) is float
+
+    def _to_object(self):
+        """Converts a typed column to a list column"""
+        self.data = [self.get(index) for index in range(len(self.data))]
+        self.kind = "object"
+        self.nulls = set()
+        self.absent = set()
+
+    def get(self, index):
+        """Returns the value of a row, or MISSING"""
+        if self.kind == "object":
+            value = self.data[index]
+            return value.unpack() if isinstance(value, PackedValue) else value
+        if index in self.absent:
+            return MISSING
+        if index in self.nulls:
+            return None
+        return self.data[index]
+
+    def set(self, index, value):
+        """Sets the value of a row, converting the column if the value does not fit its array"""
+        if self.kind == "object":
+            self.data[index] = self._pack(value)
+            return
+        self.nulls.discard(index)
+        self.absent.discard(index)
+        if value is None:
+            self.nulls.add(index)
+        elif value is MISSING:
+            self.absent.add(index)
+        elif self._fits(value):
+            self.data[index] = value
+        else:
+            self._to_object()
+            self.data[index] = self._pack(value)
+
+    def append(self, value):
+        """Adds a row at the end of the column"""
+        if self.kind == "object":
+            self.data.append(self._pack(value))
+        else:
+            self.data.append(0)
+            self.set(len(self.data) - 1, value)
+
+    def insert(self, index, value):
+        """Inserts a row before index"""
+        if self.kind == "object":
+            self.data.insert(index, self._pack(value))
+            return
+        self.data.insert(index, 0)
+        self.nulls = {i + 1 if i >= index else i for i in self.nulls}
+        self.absent = {i + 1 if i >= index else i for i in self.absent}
+        self.set(index, value)
+
+    def remove(self, index):
+        """Removes a row from the column"""
+        del self.data[index]
+        if self.kind != "object":
+            self.nulls = {i - 1 if i > index else i for i in self.nulls if i != index}
+            self.absent = {i - 1 if i > index else i for i in self.absent if i != index}
+
+    def take(self, indices):
+        """Returns a new column with the listed rows, the new row i is the old row indices[i]"""
+        if self.kind == "object":
+            return Column(self.kind, [self.data[i] for i in indices])
+        data = array(self.data.typecode, (self.data[i] for i in indices))
+        nulls = {new for new, old in enumerate(indices) if old in self.nulls} if self.nulls else None
+        absent = {new for new, old in enumerate(indices) if old in self.absent} if self.absent else None
+        return Column(self.kind, data, nulls, absent)
+
+
+class ResultPage:
+    """A page of documents stored by column, with row access for editing and deleting"""
+
+    def __init__(self):
+        self._columns = {}  # Field name -> Column, in order of appearance
+        self._length = 0
+        self._sort_keys = {}  # (field name, descending) -> sort key of every row, computed on first use
+
+    @classmethod
+    def from_documents(cls, documents):
+        """Builds a page from a list of documents"""
+        page = cls()
+        length = len(documents)
+        values_by_field = {}
+        for index, document in enumerate(documents):
+            for field, value in document.items():
+                values = values_by_field.get(field)
+                if values is None:
+                    values = values_by_field[field] = [MISSING] * length
+                values[index] = value
+        page._columns = {field: Column.build(values) for field, values in values_by_field.items()}
+        page._length = length
+        return page
+
+    @property
+    def columns(self):
+        """The names of the fields present in the page"""
+        return list(self._columns.keys())
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        """Returns a row as a new document"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("page index out of range")
+        document = {}
+        for field, column in self._columns.items():
+            value = column.get(index)
+            if value is not MISSING:
+                document[field] = value
+        return document
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+
+    def value(self, index, field, default=None):
+        """Returns the value of one field of a row"""
+        column = self._columns.get(field)
+        value = column.get(index) if column else MISSING
+        return default if value is MISSING else value
+
+    def cell_text(self, index, field):
+        """Returns the text shown in the grid for one field of a row"""
+        column = self._columns.get(field)
+        if column is None:
+            return ""
+        value = column.get(index)
+        return "" if value is MISSING else str(value)
+
+    def edit_text(self, index, field):
+        """Returns the text of one field of a row to edit, decoding a value the grid shows as a size badge"""
+        value = self.value(index, field, MISSING)
+        return "" if value is MISSING else str(expand_value(value))
+
+    def set_value(self, index, field, value):
+        """Sets the value of one field of a row"""
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = Column.empty(self._length)
+        column.set(index, value)
+        self._sort_keys.pop((field, False), None)
+        self._sort_keys.pop((field, True), None)
+
+    def append(self, document):
+        """Adds a row at the end of the page"""
+        for field, column in self._columns.items():
+            column.append(document.get(field, MISSING))
+        for field, value in document.items():
+            if field not in self._columns:
+                column = self._columns[field] = Column.empty(self._length)
+                column.append(value)
+        self._length += 1
+        self._sort_keys.clear()
+
+    def insert(self, index, document):
+        """Inserts a row before index"""
+        for field, column in self._columns.items():
+            column.insert(index, document.get(field, MISSING))
+        for field, value in document.items():
+            if field not in self._columns:
+                column = self._columns[field] = Column.empty(self._length)
+                column.insert(index, value)
+        self._length += 1
+        self._sort_keys.clear()
+
+    def replace(self, index, document):
+        """Replaces a row with a new document"""
+        for field, column in self._columns.items():
+            column.set(index, document.get(field, MISSING))
+        for field, value in document.items():
+            if field not in self._columns:
+                self.set_value(index, field, value)
+        self._sort_keys.clear()
+
+    def remove(self, index):
+        """Removes a row"""
+        for column in self._columns.values():
+            column.remove(index)
+        self._length -= 1
+        self._sort_keys.clear()
+
+    def select(self, indices):
+        """Returns a new page with the listed rows, the new row i is the old row indices[i]"""
+        page = ResultPage()
+        page._columns = {field: column.take(indices) for field, column in self._columns.items()}
+        page._length = len(indices)
+        return page
+
+    def sort_keys(self, field, descending=False):
+        """Returns the sort key of every row for a field, computed once and reused by later sorts"""
+        keys = self._sort_keys.get((field, descending))
+        if keys is None:
+            column = self._columns.get(field)
+            keys = [sort_key(column.get(index) if column else MISSING, descending) for index in range(self._length)]
+            self._sort_keys[(field, descending)] = keys
+        return keys
+
+    def sorted_position(self, document, field, descending=False):
+        """Returns the index where a document belongs in the rows, which are ordered by a field"""
+        new_key = sort_key(document.get(field, MISSING), descending)
+        for index, key in enumerate(self.sort_keys(field, descending)):
+            if (key < new_key) if descending else (new_key < key):
+                return index
+        return self._length
+
+    def sorted_indices(self, field, descending=False, indices=None):
+        """Returns the row indices (all, or the listed ones) ordered by a field"""
+        keys = self.sort_keys(field, descending)
+        if indices is None:
+            indices = range(self._length)
+        return sorted(indices, key=keys.__getitem__, reverse=descending)
@@ -0,0 +1,188 @@
+import csv
+import json
+import os
+import pickle
+import sqlite3
+import tempfile
+from collections import OrderedDict
+from business.config import Config
+
+BLOCK_ROWS = 500  # Rows pickled together, the unit of the memory budget and of the spill file
+
+
+class ResultStore:
+    """
+    The rows of a query result, read by index within a fixed memory budget. Rows are kept
+    in blocks; once the result grows past result_memory_rows, the blocks are written to a
+    temporary SQLite file indexed by block number, and only the most recently read ones
+    stay in memory. Small results never touch the disk.
+    """
+
+    def __init__(self, memory_rows=None):
+        """
+        Initializes an empty store.
+        Args:
+            memory_rows (int): Rows kept in memory, result_memory_rows by default.
+        """
+        memory_rows = memory_rows or Config.get_instance().get_setting("result_memory_rows", 10000)
+        self.max_blocks = max(1, memory_rows // BLOCK_ROWS)
+        self._blocks = OrderedDict()  # Block number -> rows, most recently read last
+        self._tail = []  # Rows of the last block, not complete yet
+        self._block_count = 0  # Complete blocks
+        self._columns = {}  # Field name -> None, in order of appearance
+        self._path = None
+        self._db = None
+
+    @classmethod
+    def from_rows(cls, rows, memory_rows=None):
+        """Builds a store from an iterable of rows, which is read once"""
+        store = cls(memory_rows)
+        store.extend(rows)
+        return store
+
+    @property
+    def columns(self):
+        """The names of the fields present in the rows"""
+        return list(self._columns)
+
+    @property
+    def spilled(self):
+        """Whether the rows were written to disk"""
+        return self._db is not None
+
+    def __len__(self):
+        return self._block_count * BLOCK_ROWS + len(self._tail)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def append(self, row):
+        """Adds a row at the end"""
+        for field in row:
+            if field not in self._columns:
+                self._columns[field] = None
+        self._tail.append(row)
+        if len(self._tail) == BLOCK_ROWS:
+            self._complete_block()
+
+    def extend(self, rows):
+        """Adds rows at the end"""
+        for row in rows:
+            self.append(row)
+
+    def _complete_block(self):
+        """Moves the full tail into the blocks, spilling them to disk past the memory budget"""
+        block, self._tail = self._tail, []
+        number = self._block_count
+        self._block_count += 1
+        self._blocks[number] = block
+        if self._db is None:
+            if len(self._blocks) <= self.max_blocks:
+                return
+            self._open_file()
+            self._write_blocks(self._blocks.items())
+        else:
+            self._write_blocks([(number, block)])
+        self._evict()
+
+    def _open_file(self):
+        descriptor, self._path = tempfile.mkstemp(prefix="nvm-result-", suffix=".db")
+        os.close(descriptor)
+        self._db = sqlite3.connect(self._path)
+        # A scratch file: nothing to recover after a crash
+        self._db.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE blocks (number INTEGER PRIMARY KEY, data BLOB);
+        """)
+
+    def _write_blocks(self, blocks):
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO blocks VALUES (?, ?)",
+                ((number, pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)) for number, rows in blocks)
+            )
+
+    def _evict(self):
+        """Drops the least recently read blocks from memory, they are on disk"""
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+    def _block(self, number):
+        """Returns the rows of a complete block, reading it from disk if needed"""
+        rows = self._blocks.get(number)
+        if rows is not None:
+            self._blocks.move_to_end(number)
+            return rows
+        data = self._db.execute("SELECT data FROM blocks WHERE number = ?", (number,)).fetchone()[0]
+        rows = self._blocks[number] = pickle.loads(data)
+        self._evict()
+        return rows
+
+    def __getitem__(self, index):
+        """Returns a row"""
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("result index out of range")
+        number, offset = divmod(index, BLOCK_ROWS)
+        if number == self._block_count:
+            return self._tail[offset]
+        return self._block(number)[offset]
+
+    def rows(self, start, stop):
+        """Returns the rows from start to stop (excluded)"""
+        start, stop = max(0, start), min(stop, len(self))
+        return [self[index] for index in range(start, stop)]
+
+    def __iter__(self):
+        for number in range(self._block_count):
+            yield from self._block(number)
+        yield from self._tail
+
+    def cell_text(self, index, field):
+        """Returns the text shown in the grid for one field of a row"""
+        value = self[index].get(field)
+        return "" if value is None else str(value)
+
+    def to_list(self):
+        """Returns the rows as a list, None if they were spilled to disk"""
+        return None if self.spilled else list(self)
+
+    def export(self, path, file_format="csv"):
+        """
+        Writes the rows to a file, reading them from disk block by block.
+        Args:
+            file_format (str): "csv" (one column per field, nested values as JSON) or "jsonl".
+        """
+        if file_format not in ("csv", "jsonl"):
+            raise ValueError(f"Unknown export format: {file_format}")
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            if file_format == "jsonl":
+                for row in self:
+                    file.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+                return
+            columns = self.columns
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            for row in self:
+                writer.writerow([self._csv_value(row.get(column)) for column in columns])
+
+    @staticmethod
+    def _csv_value(value):
+        if value is None:
+            return ""
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=str, ensure_ascii=False)
+        return str(value)
+
+    def close(self):
+        """Deletes the spill file"""
+        self._blocks.clear()
+        self._tail = []
+        self._block_count = 0
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            os.remove(self._path)
@@ -0,0 +1,173 @@
+import threading
+import time
+from business.config import Config
+
+
+class FieldStats:
+    """Type and null statistics of one field path"""
+
+    def __init__(self, path, top_level):
+        self.path = path
+        self.top_level = top_level
+        self.count = 0  # Documents in which the field is present
+        self.nulls = 0
+        self.types = {}  # Type -> number of values of that type
+
+    def add(self, value):
+        """Records a value of the field"""
+        self.count += 1
+        if value is None:
+            self.nulls += 1
+        else:
+            value_type = type(value)
+            self.types[value_type] = self.types.get(value_type, 0) + 1
+
+    def dominant_type(self):
+        """Returns the most frequent non-null type, or None if only nulls were seen"""
+        if not self.types:
+            return None
+        return max(self.types, key=self.types.get)
+
+    def type_frequencies(self):
+        """Returns the share of each type name among the non-null values"""
+        total = self.count - self.nulls
+        return {value_type.__name__: count / total for value_type, count in self.types.items()} if total else {}
+
+    def null_rate(self):
+        """Returns the share of null values"""
+        return self.nulls / self.count if self.count else 0.0
+
+
+class SchemaProfile:
+    """Statistics of the fields of a collection, built from a sample of documents"""
+
+    def __init__(self):
+        self.sample_size = 0
+        self.fields = {}  # Path -> FieldStats, nested paths use "a.b" and "a[].b" for arrays
+        self.profiled_at = time.time()
+
+    def add_document(self, document):
+        """Records every field of a sampled document"""
+        self.sample_size += 1
+        self._add_fields(document, "")
+
+    def _add_fields(self, document, prefix):
+        for field, value in document.items():
+            path = f"{prefix}{field}"
+            stats = self.fields.get(path)
+            if stats is None:
+                stats = self.fields[path] = FieldStats(path, top_level=not prefix)
+            stats.add(value)
+            if isinstance(value, dict):
+                self._add_fields(value, f"{path}.")
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, dict):
+                        self._add_fields(item, f"{path}[].")
+
+    def to_schema(self):
+        """Returns the top-level fields with their most frequent type, in the format of get_collection_schema"""
+        schema = {}
+        for path, stats in self.fields.items():
+            if stats.top_level:
+                schema[path] = stats.dominant_type() or str
+        return schema
+
+    def presence_rate(self, path):
+        """Returns the share of sampled documents that contain the field"""
+        stats = self.fields.get(path)
+        return stats.count / self.sample_size if stats and self.sample_size else 0.0
+
+
+class SchemaProfiler:
+    """Builds schema profiles from random samples and caches them per collection"""
+
+    def __init__(self, repository, sample_size=None, batch_size=None, max_age=None, metadata_cache=None, connection_name=None):
+        """
+        Initializes the profiler.
+        Args:
+            repository (Repository): Repository of the connection to profile.
+            sample_size (int): Number of documents sampled per collection.
+            batch_size (int): Number of documents read per batch.
+            max_age (int): Seconds after which a cached profile is refreshed in the background.
+            metadata_cache (MetadataCache): Keeps the profiles between sessions.
+            connection_name (str): The connection the profiles are cached under.
+        """
+        config = Config.get_instance()
+        self.repository = repository
+        self.metadata_cache = metadata_cache
+        self.connection_name = connection_name
+        self.sample_size = sample_size or config.get_setting("schema_sample_size", 500)
+        self.batch_size = batch_size or config.get_setting("schema_batch_size", 100)
+        self.max_age = max_age or config.get_setting("schema_max_age", 300)
+        self._profiles = {}  # (database, collection) -> SchemaProfile
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get_profile(self, database_name, collection_name, refresh=False):
+        """
+        Returns the profile of a collection. A cached profile is returned at once,
+        and refreshed in the background when it is older than max_age.
+        """
+        profile = None if refresh else self._cached_profile(database_name, collection_name)
+        if profile is None:
+            return self._profile(database_name, collection_name)
+        if time.time() - profile.profiled_at > self.max_age:
+            self.refresh_async(database_name, collection_name)
+        return profile
+
+    def prefetch(self, database_name, collection_name):
+        """Profiles a collection in the background if it has no profile or a stale one, without waiting"""
+        profile = self._cached_profile(database_name, collection_name)
+        if profile is None or time.time() - profile.profiled_at > self.max_age:
+            self.refresh_async(database_name, collection_name)
+
+    def _cached_profile(self, database_name, collection_name):
+        """Returns the profile kept in memory or, saved by an earlier session, in the metadata cache, or None"""
+        key = (database_name, collection_name)
+        with self._lock:
+            profile = self._profiles.get(key)
+        if profile is None and self.metadata_cache:
+            profile = self.metadata_cache.get_schema_profile(self.connection_name, database_name, collection_name)
+            if profile is not None:
+                with self._lock:
+                    profile = self._profiles.setdefault(key, profile)
+        return profile
+
+    def refresh_async(self, database_name, collection_name, callback=None):
+        """Profiles a collection in a background thread, calling callback(profile) when done"""
+        key = (database_name, collection_name)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                profile = self._profile(database_name, collection_name)
+                if callback:
+                    callback(profile)
+            except Exception as e:
+                print(f"Error profiling {database_name}.{collection_name}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def invalidate(self, database_name, collection_name):
+        """Drops the cached profile of a collection"""
+        with self._lock:
+            self._profiles.pop((database_name, collection_name), None)
+
+    def _profile(self, database_name, collection_name):
+        """Samples the collection and caches the resulting profile"""
+        self.repository.set_database_name(database_name)
+        profile = SchemaProfile()
+        for document in self.repository.sample_documents(collection_name, self.sample_size, self.batch_size):
+            profile.add_document(document)
+        with self._lock:
+            self._profiles[(database_name, collection_name)] = profile
+        if self.metadata_cache:
+            self.metadata_cache.save_schema_profile(self.connection_name, database_name, collection_name, profile)
+        return profile
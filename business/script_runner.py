@@ -0,0 +1,44 @@
+import queue
+import threading
+
+
+class ScriptRunner:
+    """Runs the statements of a script in a background thread, streaming the result of each one"""
+
+    def __init__(self, manager, script, transaction=False):
+        """
+        Initializes the runner.
+        Args:
+            manager (BusinessManager): Manager of the connection to run the script on.
+            script (str): The text of the script, split into statements by the database client.
+            transaction (bool): Run every statement in one transaction, rolled back on the first error.
+        """
+        self.manager = manager
+        self.statements = manager.split_script(script)
+        self.transaction = transaction
+        self.results = queue.Queue()  # Statement results are streamed here as they complete
+        self.error = None
+        self.finished = False
+        self._cancelled = threading.Event()
+
+    def start(self):
+        """Starts running the script in a background thread"""
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        """Stops after the running statement, a transaction is then rolled back"""
+        self._cancelled.set()
+
+    def _run(self):
+        results = self.manager.execute_script(self.statements, self.transaction)
+        try:
+            for index, result in enumerate(results):
+                result["index"] = index
+                self.results.put(result)
+                if self._cancelled.is_set():
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            results.close()  # Releases the connection, rolling back an unfinished transaction
+            self.finished = True
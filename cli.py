@@ -0,0 +1,375 @@
+"""
+Command-line interface: runs the same clients and business logic as the desktop
+application, without a display. Tkinter is never imported.
+
+Examples:
+    python cli.py --connection mongodb://localhost:27017 databases
+    python cli.py --connection mysql://root@localhost:3306 --format csv find shop products --filter "price > 10" --limit 100
+    python cli.py --mock find mock_db products --sort price --desc
+    python cli.py --mock serve --port 8765
+    python cli.py --connection mysql://root@prod:3306 diff shop orders --target mysql://root@replica:3306
+    python cli.py --connection mysql://root@localhost:3306 seed shop products --count 1000000 --workers 8
+    python cli.py --connection mongodb://localhost:27017 copy shop orders --target mysql://root@localhost:3306 --checkpoint orders.ckpt
+    echo 'shop.products.find({}).limit(5)' | python cli.py --connection mongodb://localhost:27017 query -
+"""
+import argparse
+import csv
+import json
+import queue
+import sys
+import time
+from business.config import Config
+from business.collection_diff import CollectionDiff
+from business.connection_manager import ConnectionManager, MOCK_CONNECTION
+from business.copy_job import CopyJob
+from business.data_generator import DataGenerator, spec_for_collection
+from business.data_seeder import DataSeeder
+
+CSV_HEADER_ROWS = 100  # Rows read before writing the CSV header, its columns are the fields seen in them
+PROGRESS_INTERVAL = 2  # Seconds between the progress lines of the seed and copy commands
+
+
+class Stats:
+    """Timings of a command, printed on stderr"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.connected_at = None
+        self.first_row_at = None
+        self.rows = 0
+        self.bytes = 0
+
+    def row_written(self, size):
+        """Records a row written to the output"""
+        if self.first_row_at is None:
+            self.first_row_at = time.perf_counter()
+        self.rows += 1
+        self.bytes += size
+
+    def report(self):
+        """Prints the timings on stderr"""
+        total = time.perf_counter() - self.started_at
+        parts = [f"{self.rows} rows", f"{self.bytes} bytes", f"total {total:.3f}s"]
+        if self.connected_at is not None:
+            parts.append(f"connect {self.connected_at - self.started_at:.3f}s")
+        if self.first_row_at is not None:
+            parts.append(f"first row {self.first_row_at - self.started_at:.3f}s")
+        if total > 0 and self.rows:
+            parts.append(f"{self.rows / total:.0f} rows/s")
+        print(", ".join(parts), file=sys.stderr)
+
+
+def to_json(row):
+    """Serializes a row as one JSON line, values JSON cannot represent (ObjectId, dates...) are written as text"""
+    return json.dumps(row, default=str, ensure_ascii=False)
+
+
+def write_jsonl(rows, output, stats):
+    """Writes rows as JSON Lines"""
+    for row in rows:
+        line = to_json(row) + "\n"
+        output.write(line)
+        stats.row_written(len(line))
+
+
+def write_csv(rows, output, stats):
+    """Writes rows as CSV, nested values are written as JSON"""
+    rows = iter(rows)
+    head = []
+    for row in rows:
+        head.append(row)
+        if len(head) >= CSV_HEADER_ROWS:
+            break
+    columns = []
+    for row in head:
+        columns.extend(field for field in row if field not in columns)
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    skipped = set()
+    for row in _chain(head, rows):
+        values = [_csv_value(row.get(column)) for column in columns]
+        skipped.update(field for field in row if field not in columns)
+        writer.writerow(values)
+        stats.row_written(sum(len(value) for value in values) + len(values))
+    if skipped:
+        print(f"Fields missing from the first {CSV_HEADER_ROWS} rows were not written: {', '.join(sorted(skipped))}", file=sys.stderr)
+
+
+def _chain(head, rest):
+    yield from head
+    yield from rest
+
+
+def _csv_value(value):
+    """Returns the CSV text of a value"""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    return str(value)
+
+
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv}
+
+
+def run_databases(manager, args):
+    """Lists the databases"""
+    return ({"database": name} for name in manager.get_databases())
+
+
+def run_collections(manager, args):
+    """Lists the collections of a database"""
+    return ({"collection": name} for name in manager.get_collections(args.database))
+
+
+def run_find(manager, args):
+    """Runs a browse filter, the same as the filter field of the main window"""
+    sort_order = -1 if args.desc else 1
+    return manager.fetch_documents(args.database, args.collection, args.sort, sort_order, args.filter, args.limit, args.skip)
+
+
+def run_query(manager, args):
+    """Runs a raw query (or a script of several statements) and streams its results"""
+    query = sys.stdin.read() if args.query == "-" else args.query
+    if not args.script:
+        return manager.stream_raw_query(query)
+    return _script_rows(manager, query, args.transaction)
+
+
+def _script_rows(manager, script, transaction):
+    """Yields the rows of every statement of a script, reporting each statement on stderr"""
+    for result in manager.execute_script(manager.split_script(script), transaction):
+        status = result["error"] or (f"{len(result['rows'])} rows" if result["rows"] is not None else f"{result['affected']} affected")
+        print(f"[{result['elapsed']:.3f}s] {' '.join(result['statement'].split())[:80]}: {status}", file=sys.stderr)
+        if result["error"]:
+            raise Exception(result["error"])
+        yield from result["rows"] or []
+
+
+def run_stats(manager, args):
+    """Lists the size statistics of the collections of a database, largest first"""
+    stats, fetched_at = manager.get_collection_stats(args.database, refresh=True)
+    return sorted(stats, key=lambda row: row[args.sort], reverse=True)
+
+
+def run_diff(manager, args):
+    """Compares a collection with another one, on this or another connection, and streams the differences"""
+    target_connections = None
+    target = manager
+    if args.target:
+        target_connections = ConnectionManager()
+        target = target_connections.open(MOCK_CONNECTION if args.target == "mock" else args.target)
+    ignore_fields = [field.strip() for field in args.ignore.split(",")] if args.ignore else None
+    diff = CollectionDiff(
+        manager, args.database, args.collection, target, args.target_database or args.database,
+        args.target_collection or args.collection, args.key, args.chunks, args.workers, ignore_fields
+    )
+    diff.start()
+    try:
+        while not (diff.finished and diff.results.empty()):
+            try:
+                yield diff.results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+    finally:
+        diff.cancel()
+        if target_connections:
+            target_connections.close_all()
+    if diff.error:
+        raise diff.error
+    if not args.quiet:
+        print(
+            f"{diff.chunks_done} of {diff.chunks_total} chunks compared, {diff.chunks_mismatched} read in full, "
+            f"{diff.documents_compared} source documents, {diff.differences} differences",
+            file=sys.stderr
+        )
+
+
+def run_seed(manager, args):
+    """Loads generated documents into a collection and returns the insert throughput"""
+    if args.spec:
+        with open(args.spec, "r") as file:
+            spec = json.load(file)
+    else:
+        spec = spec_for_collection(manager, args.database, args.collection)
+        if not spec:
+            raise Exception("The collection has no documents to take the schema from, give a --spec")
+    seeder = DataSeeder(manager, args.database, args.collection, DataGenerator(spec, args.seed), args.count, args.batch_size, args.workers)
+    seeder.start()
+    reported_at = time.perf_counter()
+    try:
+        while not seeder.finished:
+            time.sleep(0.1)
+            if not args.quiet and time.perf_counter() - reported_at >= PROGRESS_INTERVAL:
+                reported_at = time.perf_counter()
+                print(f"{seeder.processed} of {seeder.total} documents, {seeder.report()['documents_per_second']:.0f} documents/s", file=sys.stderr)
+    except KeyboardInterrupt:
+        seeder.cancel()
+        while not seeder.finished:
+            time.sleep(0.1)
+    if seeder.error:
+        raise seeder.error
+    yield {"database": args.database, "collection": args.collection, **seeder.report()}
+
+
+def run_copy(manager, args):
+    """Copies a collection to this or another connection and returns the throughput"""
+    target_connections = None
+    target = manager
+    if args.target:
+        target_connections = ConnectionManager()
+        target = target_connections.open(MOCK_CONNECTION if args.target == "mock" else args.target)
+    job = CopyJob(
+        manager, args.database, args.collection, target, args.target_database or args.database,
+        args.target_collection or args.collection, args.key, args.chunks, args.workers, args.batch_size, args.checkpoint
+    )
+    job.start()
+    reported_at = time.perf_counter()
+    try:
+        while not job.finished:
+            time.sleep(0.1)
+            if not args.quiet and time.perf_counter() - reported_at >= PROGRESS_INTERVAL:
+                reported_at = time.perf_counter()
+                print(
+                    f"{job.processed} of ~{job.total} documents, {job.chunks_done} of {job.chunks_total} chunks, "
+                    f"{job.report()['documents_per_second']:.0f} documents/s",
+                    file=sys.stderr
+                )
+    except KeyboardInterrupt:
+        job.cancel()
+        while not job.finished:
+            time.sleep(0.1)
+    finally:
+        if target_connections:
+            target_connections.close_all()
+    if job.error:
+        raise job.error
+    yield {"database": args.database, "collection": args.collection, **job.report()}
+
+
+def build_parser():
+    """Builds the command-line parser"""
+    parser = argparse.ArgumentParser(description="Query MongoDB and MySQL databases from the command line.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--connection", "-c", help="Connection string (mongodb://... or mysql://...)")
+    target.add_argument("--mock", action="store_true", help="Use the built-in mock data")
+    parser.add_argument("--config", default="config.json", help="Configuration file (default: config.json)")
+    parser.add_argument("--format", "-f", choices=sorted(WRITERS), default="jsonl", help="Output format (default: jsonl)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Do not print timing statistics on stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("databases", help="List the databases").set_defaults(run=run_databases)
+
+    collections = commands.add_parser("collections", help="List the collections (or tables) of a database")
+    collections.add_argument("database")
+    collections.set_defaults(run=run_collections)
+
+    find = commands.add_parser("find", help="Browse a collection with a filter, sort and page")
+    find.add_argument("database")
+    find.add_argument("collection")
+    find.add_argument("--filter", help="Filter, as typed in the filter field (a MongoDB document or a SQL condition)")
+    find.add_argument("--sort", help="Field to sort by")
+    find.add_argument("--desc", action="store_true", help="Sort in descending order")
+    find.add_argument("--limit", type=int, default=100)
+    find.add_argument("--skip", type=int, default=0)
+    find.set_defaults(run=run_find)
+
+    query = commands.add_parser("query", help="Run a raw query, as in the Raw Query window")
+    query.add_argument("query", help="The query, or - to read it from stdin")
+    query.add_argument("--script", action="store_true", help="Split the input into statements and run them one after the other")
+    query.add_argument("--transaction", action="store_true", help="Run the script in one transaction")
+    query.set_defaults(run=run_query)
+
+    stats = commands.add_parser("stats", help="List the document count, sizes and fragmentation of the collections of a database")
+    stats.add_argument("database")
+    stats.add_argument("--sort", choices=["count", "avg_size", "data_size", "storage_size", "index_size", "fragmentation"], default="storage_size")
+    stats.set_defaults(run=run_stats)
+
+    diff = commands.add_parser("diff", help="Compare a collection with another one by key range and list the differences")
+    diff.add_argument("database")
+    diff.add_argument("collection")
+    diff.add_argument("--target", help="Connection string of the other collection (default: the same connection, mock for the mock data)")
+    diff.add_argument("--target-database", help="Database of the other collection (default: the same name)")
+    diff.add_argument("--target-collection", help="Name of the other collection (default: the same name)")
+    diff.add_argument("--key", help="Field identifying the documents on both sides (default: the primary key)")
+    diff.add_argument("--chunks", type=int, help="Number of key ranges (default: one per diff_chunk_size documents)")
+    diff.add_argument("--workers", type=int, help="Chunks compared at the same time (default: diff_workers setting)")
+    diff.add_argument("--ignore", help="Comma-separated fields left out of the comparison")
+    diff.set_defaults(run=run_diff)
+
+    seed = commands.add_parser("seed", help="Load generated documents into a collection and report the insert throughput")
+    seed.add_argument("database")
+    seed.add_argument("collection")
+    seed.add_argument("--count", "-n", type=int, default=10000)
+    seed.add_argument("--spec", help="JSON file with the field specs (default: built from the schema of the collection)")
+    seed.add_argument("--batch-size", type=int, help="Documents per insert call (default: bulk_batch_size setting)")
+    seed.add_argument("--workers", type=int, help="Parallel insert workers (default: seed_workers setting)")
+    seed.add_argument("--seed", type=int, help="Random seed, to generate the same documents again")
+    seed.set_defaults(run=run_seed)
+
+    copy = commands.add_parser("copy", help="Copy a collection to another connection, database or collection with parallel workers")
+    copy.add_argument("database")
+    copy.add_argument("collection")
+    copy.add_argument("--target", help="Connection string to copy to (default: the same connection, mock for the mock data)")
+    copy.add_argument("--target-database", help="Database to copy to (default: the same name)")
+    copy.add_argument("--target-collection", help="Collection (or table) to copy to (default: the same name)")
+    copy.add_argument("--key", help="Field the source is split on (default: the primary key)")
+    copy.add_argument("--chunks", type=int, help="Number of key ranges (default: one per copy_chunk_size documents)")
+    copy.add_argument("--workers", type=int, help="Key ranges copied at the same time (default: copy_workers setting)")
+    copy.add_argument("--batch-size", type=int, help="Documents per insert call (default: bulk_batch_size setting)")
+    copy.add_argument("--checkpoint", help="File recording the progress; run the same command again to resume an interrupted copy")
+    copy.set_defaults(run=run_copy)
+
+    serve = commands.add_parser("serve", help="Serve the connection to other tools through a local HTTP/JSON API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--name", default="default", help="Name of the connection in the API paths (default: default)")
+    serve.add_argument("--backend", action="append", default=[], metavar="NAME=CONNECTION_STRING", help="Serve another connection as well")
+    serve.add_argument("--max-concurrency", type=int, help="Database calls running at the same time per connection")
+    serve.set_defaults(run=None)
+    return parser
+
+
+def serve(args, connections, connection_string):
+    """Runs the HTTP/JSON API until interrupted"""
+    from business.api_server import ApiServer
+    backends = {args.name: connection_string}
+    for backend in args.backend:
+        name, separator, other_connection_string = backend.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid backend (expected NAME=CONNECTION_STRING): {backend}")
+        backends[name] = other_connection_string
+    try:
+        ApiServer(connections, backends, args.host, args.port, args.max_concurrency).run()
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    Config(args.config)
+    stats = Stats()
+    connections = ConnectionManager()
+    connection_string = MOCK_CONNECTION if args.mock else args.connection
+    try:
+        manager = connections.open(connection_string)
+        stats.connected_at = time.perf_counter()
+        if args.command == "serve":
+            serve(args, connections, connection_string)
+            return 0
+        WRITERS[args.format](args.run(manager, args), sys.stdout, stats)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        pass  # The reader (e.g. head) stopped early
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        connections.close_all()
+    if not args.quiet:
+        stats.report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
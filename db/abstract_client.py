@@ -1,13 +1,26 @@
+import time
 from abc import ABC, abstractmethod
+from db.document_digest import digest_documents
+from db.document_matcher import sort_key
+from db.script_splitter import split_statements
+
+BOUNDARY_SAMPLES_PER_CHUNK = 4  # Sampled keys per chunk when splitting a collection into key ranges
 
 
 class AbstractClient(ABC):
     """Abstract class to define the interface of a database client"""
+    TUNING_OPTIONS = {}  # Options of the tuning profiles: name -> (type, description)
+    TUNING_PRESETS = {}  # Preset name -> profile
+
     @abstractmethod
     def connect(self):
         """Connects to the database"""
         pass
 
+    def close(self):
+        """Closes the connection to the database and releases its resources"""
+        pass
+
     def list_database_names(self):
         """Lists the names of available databases"""
         pass
@@ -18,8 +31,8 @@ class AbstractClient(ABC):
         pass
 
     @abstractmethod
-    def fetch_documents(self, database_name, collection_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0):
-        """Fetches documents (or records) in a collection (or table)"""
+    def fetch_documents(self, database_name, collection_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0, lazy=False):
+        """Fetches documents (or records) in a collection (or table), lazy allows large nested values to stay encoded (LazyValue)"""
         pass
 
     @abstractmethod
@@ -37,21 +50,183 @@ class AbstractClient(ABC):
         """Updates a document (or record) in a collection (or table)"""
         pass
 
+    def insert_documents(self, database_name, collection_name, documents, skip_duplicates=False):
+        """
+        Inserts documents (or records) into a collection (or table) and returns how many were inserted.
+        With skip_duplicates, documents whose unique key already exists are left out instead of failing
+        the insert (only by clients of databases that enforce unique keys).
+        """
+        return sum(1 for document in documents if self.insert_document(database_name, collection_name, document) is not None)
+
+    def delete_documents(self, database_name, collection_name, key_field, keys):
+        """Deletes the documents (or records) whose key_field is one of keys and returns how many were deleted"""
+        return sum(1 for key in keys if self.delete_document(database_name, collection_name, {key_field: key}))
+
+    def update_documents(self, database_name, collection_name, key_field, keys, update_query):
+        """Updates the documents (or records) whose key_field is one of keys and returns how many were updated"""
+        return sum(1 for key in keys if self.update_document(database_name, collection_name, {key_field: key}, update_query))
+
+    def bulk_write(self, database_name, collection_name, operations, ordered=True):
+        """
+        Executes a list of operations, dicts with an "op" key (insert, update or delete)
+        and the "document", "filter" and "update" they need. Returns one result per
+        operation, a dict with a "status" (ok, error or skipped), an "error" message and
+        the "count" of documents inserted, matched or deleted (0 when an update or delete
+        found nothing). Ordered writes stop at the first error.
+        """
+        results = []
+        failed = False
+        for operation in operations:
+            if failed and ordered:
+                results.append({"status": "skipped", "error": None, "count": 0})
+                continue
+            try:
+                if operation["op"] == "insert":
+                    self.insert_document(database_name, collection_name, operation["document"])
+                    count = 1
+                elif operation["op"] == "update":
+                    count = int(bool(self.update_document(database_name, collection_name, operation["filter"], operation["update"])))
+                else:
+                    count = int(bool(self.delete_document(database_name, collection_name, operation["filter"])))
+                results.append({"status": "ok", "error": None, "count": count})
+            except Exception as e:
+                failed = True
+                results.append({"status": "error", "error": str(e), "count": 0})
+        return results
+
+    def get_primary_key(self, database_name, collection_name):
+        """Returns the name of the field that uniquely identifies documents (or records), or None"""
+        return None
+
     @abstractmethod
     def get_type_converters(self):
         """Returns a dictionary with data types and associated conversion functions"""
         pass
 
+    def get_column_types(self, database_name, collection_name):
+        """Returns the type declared by the database for each field (e.g. "varchar(32)"), empty for schemaless collections"""
+        return {}
+
+    def get_declared_types(self, database_name, collection_name):
+        """Returns the Python type of each field declared by the database (the columns of a table), empty for schemaless collections"""
+        return {}
+
+    def to_storable(self, value):
+        """Returns a value read from any database in a form this database can store"""
+        return value
+
     @abstractmethod
     def get_collection_schema(self, database_name, collection_name, sample_size=10):
         """Returns the schema of a collection (or table)"""
         pass
 
+    def sample_documents(self, database_name, collection_name, sample_size=100, batch_size=50):
+        """Yields a random sample of documents (or records), read in batches of batch_size"""
+        yield from self.fetch_documents(database_name, collection_name, limit=sample_size)
+
+    def get_collection_stats(self, database_name):
+        """
+        Returns the size statistics of the collections (or tables) of a database, one dict
+        per collection with the keys "collection", "count", "estimated" (whether count is an
+        estimate), "avg_size", "data_size", "storage_size" (allocated, including free space),
+        "free_size", "index_size", "indexes" and "error". Sizes are in bytes.
+        """
+        raise NotImplementedError("Statistics are not supported by this database")
+
+    def get_key_boundaries(self, database_name, collection_name, key_field, chunk_count):
+        """
+        Returns up to chunk_count - 1 increasing keys that split a collection (or table) into
+        key ranges of about the same size, estimated from a random sample of the keys
+        """
+        if chunk_count <= 1:
+            return []
+        sample = self.sample_documents(database_name, collection_name, chunk_count * BOUNDARY_SAMPLES_PER_CHUNK)
+        keys = sorted({document[key_field] for document in sample if document.get(key_field) is not None}, key=sort_key)
+        boundaries = []
+        for index in range(1, chunk_count):
+            key = keys[len(keys) * index // chunk_count] if keys else None
+            if key is not None and (not boundaries or sort_key(key) > sort_key(boundaries[-1])):
+                boundaries.append(key)
+        return boundaries
+
+    def fetch_field_value(self, database_name, collection_name, key_field, key, field):
+        """Returns the value of one field of the document (or record) whose key_field is key, e.g. to expand a truncated value"""
+        raise NotImplementedError("Reading a single field is not supported by this database")
+
+    def fetch_range(self, database_name, collection_name, key_field, lower=None, upper=None):
+        """
+        Returns the documents (or records) whose key_field is in [lower, upper), sorted by it.
+        A None bound leaves that side of the range open.
+        """
+        raise NotImplementedError("Key ranges are not supported by this database")
+
+    def stream_range(self, database_name, collection_name, key_field, lower=None, upper=None, batch_size=1000):
+        """
+        Yields the documents (or records) whose key_field is in [lower, upper), sorted by it, reading
+        batch_size documents at a time from the server so a large range is never all in memory
+        """
+        yield from self.fetch_range(database_name, collection_name, key_field, lower, upper)
+
+    def chunk_digest(self, database_name, collection_name, key_field, lower=None, upper=None, server_side=True, ignore_fields=None):
+        """
+        Returns the digest of the documents (or records) whose key_field is in [lower, upper), a dict
+        with the "kind", "count" and "digest", leaving out ignore_fields. Digests of the same kind can
+        be compared, including between databases. Clients that can compute a digest on the server
+        return their own kind when server_side is set; the default hashes the documents here, after
+        reading them.
+        """
+        documents = self.fetch_range(database_name, collection_name, key_field, lower, upper)
+        if ignore_fields:
+            documents = ({field: value for field, value in document.items() if field not in ignore_fields} for document in documents)
+        return digest_documents(documents)
+
+    def watch_collection(self, database_name, collection_name, filter_query=None, document_keys=None, stop_event=None, resume_token=None):
+        """
+        Yields the changes made to a collection (or table) as dicts with the keys
+        "operation" (insert, update or delete), "key", "document" and "token", until
+        stop_event is set. A stream started with the token of a change resumes after it.
+        """
+        raise NotImplementedError("Live updates are not supported by this database")
+
+    def compile_local_filter(self, filter_query):
+        """
+        Returns a function that checks if a document matches filter_query, or None
+        if the filter can only be evaluated by the database. The function returns None
+        for a document whose filtered values were only read as a preview.
+        """
+        return None
+
     @abstractmethod
     def execute_raw_query(self, query):
         """Executes a raw query and returns the results"""
         pass
 
+    def stream_raw_query(self, query):
+        """Yields the results of a raw query one at a time, as the database returns them"""
+        yield from self.execute_raw_query(query)
+
+    def split_script(self, script):
+        """Splits a script typed in the query editor into statements"""
+        return split_statements(script)
+
+    def execute_script(self, statements, transaction=False):
+        """
+        Executes statements one after the other and yields, for each one, a dict with the
+        "statement", its result "rows" (or None), the number of "affected" rows (or None),
+        the "elapsed" seconds and an "error" message. Stops at the first error. In a
+        transaction, an error rolls back every statement of the script.
+        """
+        if transaction:
+            raise NotImplementedError("Transactions are not supported by this database")
+        for statement in statements:
+            started_at = time.perf_counter()
+            try:
+                rows = self.execute_raw_query(statement)
+            except Exception as e:
+                yield {"statement": statement, "rows": None, "affected": None, "elapsed": time.perf_counter() - started_at, "error": str(e)}
+                return
+            yield {"statement": statement, "rows": rows, "affected": None, "elapsed": time.perf_counter() - started_at, "error": None}
+
     @abstractmethod
     def get_syntax_highlighter(self):
         """Returns a syntax highlighter for the query editor"""
@@ -0,0 +1,58 @@
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+
+DIGEST_KIND = "documents-sha1"  # Digests of this kind are comparable whatever the database
+DIGEST_MODULO = 2 ** 64
+
+
+def canonical_json(document):
+    """
+    Returns a text representation of a document that is the same for equal documents
+    read from any database: keys are sorted, numbers compare by value (a DECIMAL or INT
+    column equals the same double) and other types (dates, ObjectId...) are written as text.
+    """
+    return json.dumps(_normalize(document), sort_keys=True, default=_canonical_value, ensure_ascii=False)
+
+
+def _normalize(value):
+    """Returns a value with its numbers written the same way whatever their type: integral ones as int"""
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, decimal.Decimal) and value.is_finite():
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def _canonical_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def document_hash(document):
+    """Returns a 64-bit hash of the canonical form of a document"""
+    return int.from_bytes(hashlib.sha1(canonical_json(document).encode()).digest()[:8], "big")
+
+
+def digest_documents(documents):
+    """
+    Returns the digest of a set of documents as a dict with the "kind", "count" and "digest".
+    The digest is the sum of the document hashes, so it does not depend on their order.
+    """
+    count = 0
+    total = 0
+    for document in documents:
+        count += 1
+        total = (total + document_hash(document)) % DIGEST_MODULO
+    return {"kind": DIGEST_KIND, "count": count, "digest": total}
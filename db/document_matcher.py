@@ -0,0 +1,215 @@
+import datetime
+import decimal
+import re
+from db.lazy_value import LazyValue, TruncatedValue, expand_value
+
+MISSING = object()  # Marks a field that is not present in a document
+
+# Operators that matches() can evaluate
+SUPPORTED_OPERATORS = {
+    "$and", "$or", "$nor", "$eq", "$ne", "$gt", "$gte", "$lt", "$lte",
+    "$in", "$nin", "$exists", "$not", "$regex", "$options", "$size", "$all",
+}
+
+
+class TruncatedValueError(Exception):
+    """Raised when a filter reaches a value only read as a preview, which only the server can test"""
+
+
+def is_supported(query):
+    """Checks if every operator of a MongoDB-style filter can be evaluated by matches()"""
+    if isinstance(query, dict):
+        return all(
+            (not key.startswith("$") or key in SUPPORTED_OPERATORS) and is_supported(value)
+            for key, value in query.items()
+        )
+    if isinstance(query, (list, tuple)):
+        return all(is_supported(item) for item in query)
+    return True
+
+
+def get_path(document, path):
+    """
+    Returns the value at a dotted path of a document. As in MongoDB, a field of an array of
+    documents is the list of that field in each of them (e.g. "items.sku"), so a condition
+    on it matches if any element does. Raises TruncatedValueError rather than reading a
+    truncated value in full, which would take one query per document.
+    """
+    return _walk(document, path.split("."))
+
+
+def _walk(value, parts):
+    value = _local_value(value)
+    if not parts:
+        return value
+    part, rest = parts[0], parts[1:]
+    if isinstance(value, dict):
+        return _walk(value[part], rest) if part in value else MISSING
+    if not isinstance(value, list):
+        return MISSING
+    if part.isdigit():
+        return _walk(value[int(part)], rest) if int(part) < len(value) else MISSING
+    found = []
+    for item in value:
+        item = _local_value(item)
+        if not isinstance(item, dict):
+            continue
+        item_value = _walk(item, parts)
+        if isinstance(item_value, list):
+            found.extend(item_value)
+        elif item_value is not MISSING:
+            found.append(item_value)
+    return found if found else MISSING
+
+
+def _local_value(value):
+    """Returns a value decoded locally (a LazyValue is decoded, a TruncatedValue cannot be)"""
+    if isinstance(value, TruncatedValue):
+        raise TruncatedValueError(f"{value.kind} value read as a preview")
+    return expand_value(value)
+
+
+def matches(document, query):
+    """
+    Checks if a document matches a MongoDB-style filter. Returns None when the filter tests
+    a value read as a preview: only a query to the server can tell.
+    """
+    try:
+        return _matches(document, query)
+    except TruncatedValueError:
+        return None
+
+
+def _matches(document, query):
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches(document, sub_query) for sub_query in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(document, sub_query) for sub_query in condition):
+                return False
+        elif key == "$nor":
+            if any(_matches(document, sub_query) for sub_query in condition):
+                return False
+        elif not _match_condition(get_path(document, key), condition):
+            return False
+    return True
+
+
+def _match_condition(value, condition):
+    """Checks a field value against a condition (a plain value or a dict of operators)"""
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        return all(
+            _match_operator(value, operator, argument, condition)
+            for operator, argument in condition.items() if operator != "$options"
+        )
+    return _equals(value, condition)
+
+
+def _match_operator(value, operator, argument, condition):
+    """Evaluates one query operator"""
+    if operator == "$eq":
+        return _equals(value, argument)
+    if operator == "$ne":
+        return not _equals(value, argument)
+    if operator in ("$gt", "$gte", "$lt", "$lte"):
+        return any(_compare(item, operator, argument) for item in _candidates(value))
+    if operator == "$in":
+        return any(_equals(value, item) for item in argument)
+    if operator == "$nin":
+        return not any(_equals(value, item) for item in argument)
+    if operator == "$exists":
+        return (value is not MISSING) == bool(argument)
+    if operator == "$not":
+        return not _match_condition(value, argument)
+    if operator == "$regex":
+        flags = 0
+        for option in condition.get("$options", ""):
+            flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}.get(option, 0)
+        pattern = re.compile(argument, flags)
+        return any(isinstance(item, str) and pattern.search(item) for item in _candidates(value))
+    if operator == "$size":
+        return isinstance(value, list) and len(value) == argument
+    if operator == "$all":
+        return isinstance(value, list) and all(any(_same(element, item) for element in value) for item in argument)
+    raise ValueError(f"Unsupported operator: {operator}")
+
+
+def _candidates(value):
+    """Returns the values a condition is tested against, arrays match if any element does"""
+    if value is MISSING:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _equals(value, expected):
+    """Checks equality the way MongoDB does, a missing field equals None"""
+    if value is MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return any(_same(item, expected) for item in value)
+    return _same(value, expected)
+
+
+def _same(value, expected):
+    """Checks equality without mixing booleans and numbers, which MongoDB keeps apart (True does not equal 1)"""
+    if isinstance(value, bool) or isinstance(expected, bool):
+        return isinstance(value, bool) and isinstance(expected, bool) and value == expected
+    if isinstance(value, dict) and isinstance(expected, dict):
+        return value.keys() == expected.keys() and all(_same(value[key], expected[key]) for key in value)
+    if isinstance(value, list) and isinstance(expected, list):
+        return len(value) == len(expected) and all(_same(item, other) for item, other in zip(value, expected))
+    return value == expected
+
+
+def _compare(value, operator, argument):
+    """Compares two values, values of incompatible types (booleans and numbers included) never match"""
+    if isinstance(value, bool) != isinstance(argument, bool):
+        return False
+    try:
+        if operator == "$gt":
+            return value > argument
+        if operator == "$gte":
+            return value >= argument
+        if operator == "$lt":
+            return value < argument
+        return value <= argument
+    except TypeError:
+        return False
+
+
+def sort_key(value, descending=False):
+    """
+    Returns a key that orders values of any type consistently, following the
+    MongoDB order of types: null, numbers, strings, objects, binary,
+    ObjectId, booleans and dates. Like MongoDB, an array sorts by its smallest
+    element, or by its largest one in a descending sort.
+    """
+    if value is None or value is MISSING:
+        return (0, 0)
+    if isinstance(value, LazyValue):
+        value = value.expand()  # Nested values kept encoded sort like the decoded ones
+    elif isinstance(value, TruncatedValue):
+        value = value.preview if value.kind != "binary" else b""  # Sorted by their start, without reading them in full
+    if isinstance(value, list):
+        if not value:
+            return (0, -1)  # An empty array sorts before null
+        keys = [sort_key(item) for item in value]
+        return max(keys) if descending else min(keys)
+    if isinstance(value, bool):
+        return (7, value)
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, dict):
+        return (3, repr(value))
+    if isinstance(value, bytes):
+        return (5, value)
+    if type(value).__name__ == "ObjectId":
+        return (6, str(value))
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return (8, value.isoformat())
+    return (9, str(value))
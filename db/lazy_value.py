@@ -0,0 +1,84 @@
+_NOT_FETCHED = object()  # Value of a TruncatedValue that was not read in full yet
+
+
+class LazyValue(bytes):
+    """
+    A nested document or array kept in the encoding of its database until it is expanded,
+    so browsing wide documents does not decode values the grid only shows as text.
+    Its text is a size badge; expand() returns the decoded value.
+    """
+    __slots__ = ()
+
+    def is_array(self):
+        """Checks if the value is an array rather than a document"""
+        raise NotImplementedError
+
+    def expand(self):
+        """Returns the decoded value"""
+        raise NotImplementedError
+
+    def size(self):
+        """Returns the encoded size in bytes"""
+        return len(self)
+
+    def __str__(self):
+        return f"[… {format_size(self.size())}]" if self.is_array() else f"{{… {format_size(self.size())}}}"
+
+    __repr__ = __str__
+
+
+class TruncatedValue:
+    """
+    The start of a large string, array or binary value, read instead of the value to browse
+    a collection. Its text is the preview with a size badge; expand() reads the full value
+    from the database, once.
+    """
+    __slots__ = ("preview", "size", "kind", "_fetch", "_value")
+
+    def __init__(self, preview, size, kind, fetch):
+        """
+        Args:
+            preview: The start of the value (None for binaries).
+            size (int): Length of the full value: characters, items or bytes.
+            kind (str): "string", "array" or "binary".
+            fetch: Function reading the full value.
+        """
+        self.preview = preview
+        self.size = size
+        self.kind = kind
+        self._fetch = fetch
+        self._value = _NOT_FETCHED
+
+    def expand(self):
+        """Returns the full value, read from the database the first time"""
+        if self._value is _NOT_FETCHED:
+            self._value = self._fetch()
+        return self._value
+
+    def __str__(self):
+        if self.kind == "string":
+            return f"{self.preview}… [{self.size:,} chars]"
+        if self.kind == "array":
+            return f"{str(self.preview)[:-1]}, … [{self.size:,} items]"
+        return f"[binary {format_size(self.size)}]"
+
+    __repr__ = __str__
+
+
+def format_size(size):
+    """Returns a size in bytes as a short text"""
+    if size < 1024:
+        return f"{size} B"
+    return f"{size / 1024:.1f} KB" if size < 1024 * 1024 else f"{size / 1024 / 1024:.1f} MB"
+
+
+def expand_value(value):
+    """Returns a value kept encoded (LazyValue) decoded, or a truncated one (TruncatedValue) in full, other values as they are"""
+    return value.expand() if isinstance(value, (LazyValue, TruncatedValue)) else value
+
+
+def expand_document(document):
+    """Returns a document whose lazy and truncated values are expanded, or the document itself if it has none"""
+    if not any(isinstance(value, (LazyValue, TruncatedValue)) for value in document.values()):
+        return document
+    return {field: expand_value(value) for field, value in document.items()}
@@ -1,5 +1,8 @@
 import ast
+import random
+from collections import Counter
 from db.abstract_client import AbstractClient
+from db.document_matcher import get_path, is_supported, matches, sort_key
 
 
 class MockClient(AbstractClient):
@@ -38,20 +41,18 @@ class MockClient(AbstractClient):
             return list(self.databases[database_name].keys())
         return []
 
-    def fetch_documents(self, database_name, collection_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0):
+    def fetch_documents(self, database_name, collection_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0, lazy=False):
         """Fetches simulated documents"""
         if database_name in self.databases:
             collection = self.databases[database_name].get(collection_name, [])
             if filter_query:
                 query = ast.literal_eval(filter_query)
-                collection = [doc for doc in collection if all(doc.get(key) == value for key, value in query.items())]
-            if skip:
-                collection = collection[skip:]
+                collection = [doc for doc in collection if matches(doc, query)]
 
             if order_by:
-                collection.sort(key=lambda doc: doc.get(order_by), reverse=sort_order < 0)
+                collection = sorted(collection, key=lambda doc: sort_key(get_path(doc, order_by), sort_order < 0), reverse=sort_order < 0)
 
-            return collection[:limit]  # Limits the number of results
+            return collection[skip:skip + limit]  # Skips and limits the number of results
         return []
 
     def insert_document(self, database_name, collection_name, document):
@@ -61,6 +62,14 @@ class MockClient(AbstractClient):
             return len(self.databases[database_name][collection_name]) - 1
         return None
 
+    def insert_documents(self, database_name, collection_name, documents, skip_duplicates=False):
+        """Inserts simulated documents in one step"""
+        if database_name in self.databases:
+            documents = list(documents)
+            self.databases[database_name].setdefault(collection_name, []).extend(documents)
+            return len(documents)
+        return 0
+
     def delete_document(self, database_name, collection_name, document):
         """Deletes simulated documents"""
         if database_name in self.databases:
@@ -91,15 +100,49 @@ class MockClient(AbstractClient):
         }
 
     def get_collection_schema(self, database_name, collection_name, sample_size=10):
-        """Returns the schema of a simulated collection"""
-        if database_name in self.databases:
-            collection = self.databases[database_name].get(collection_name, [])
-            schema = {}
-            for doc in collection[:sample_size]:
-                for field, value in doc.items():
-                    schema[field] = type(value)
-            return schema
-        return {}
+        """Returns the schema of a simulated collection, using the most frequent type of each field"""
+        types = {}
+        for doc in self.sample_documents(database_name, collection_name, sample_size):
+            for field, value in doc.items():
+                types.setdefault(field, Counter())[type(value)] += 1
+        return {field: counter.most_common(1)[0][0] for field, counter in types.items()}
+
+    def fetch_range(self, database_name, collection_name, key_field, lower=None, upper=None):
+        """Returns the simulated documents whose key is in [lower, upper), sorted by key"""
+        documents = [
+            doc for doc in self.databases.get(database_name, {}).get(collection_name, [])
+            if key_field in doc
+            and (lower is None or sort_key(doc[key_field]) >= sort_key(lower))
+            and (upper is None or sort_key(doc[key_field]) < sort_key(upper))
+        ]
+        return sorted(documents, key=lambda doc: sort_key(doc[key_field]))
+
+    def get_collection_stats(self, database_name):
+        """Returns the statistics of the simulated collections, sized by the length of their text"""
+        stats = []
+        for collection_name, collection in self.databases.get(database_name, {}).items():
+            data_size = sum(len(repr(doc)) for doc in collection)
+            stats.append({
+                "collection": collection_name, "count": len(collection), "estimated": False,
+                "avg_size": data_size // len(collection) if collection else 0, "data_size": data_size,
+                "storage_size": data_size, "free_size": 0, "index_size": 0, "indexes": 0, "error": None,
+            })
+        return stats
+
+    def sample_documents(self, database_name, collection_name, sample_size=100, batch_size=50):
+        """Yields a random sample of simulated documents"""
+        collection = self.databases.get(database_name, {}).get(collection_name, [])
+        yield from random.sample(collection, min(sample_size, len(collection)))
+
+    def compile_local_filter(self, filter_query):
+        """Returns a function that evaluates a filter on documents already loaded, or None if it is not supported"""
+        try:
+            query = ast.literal_eval(filter_query)
+        except Exception:
+            return None
+        if not isinstance(query, dict) or not is_supported(query):
+            return None
+        return lambda document: matches(document, query)
 
     def execute_raw_query(self, query):
         """Executes a raw query and returns the results"""
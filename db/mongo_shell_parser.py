@@ -0,0 +1,90 @@
+import ast
+
+# Shell (camelCase) method and option names, and their PyMongo equivalents
+METHOD_NAMES = {
+    "findOne": "find_one",
+    "insertOne": "insert_one",
+    "insertMany": "insert_many",
+    "updateOne": "update_one",
+    "updateMany": "update_many",
+    "replaceOne": "replace_one",
+    "deleteOne": "delete_one",
+    "deleteMany": "delete_many",
+    "countDocuments": "count_documents",
+    "estimatedDocumentCount": "estimated_document_count",
+    "createIndex": "create_index",
+    "dropIndex": "drop_index",
+    "getIndexes": "index_information",
+    "batchSize": "batch_size",
+    "maxTimeMS": "max_time_ms",
+}
+
+# Shell literals that are not Python names
+LITERAL_NAMES = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+
+
+class MongoShellSyntaxError(ValueError):
+    """Raised when a raw query is not a valid shell-style call chain"""
+
+
+def parse_command(command, constructors=None):
+    """
+    Parses a shell-style command such as
+    database.collection.find({"a": 1}, {"name": 1}).sort({"a": -1}).limit(50)
+    into (database_name, collection_name, calls), where calls is a list of
+    (method, args, kwargs) in chain order with PyMongo method names.
+    Arguments may use true/false/null, keyword arguments (allowDiskUse=true) and
+    the constructors given, e.g. {"ObjectId": bson.ObjectId}.
+    """
+    command = command.strip().rstrip(";").strip()
+    call_start = command.find("(")
+    if call_start == -1:
+        raise MongoShellSyntaxError("Query must be in the format: database_name.collection_name.operation(params)")
+    path = command[:call_start].split(".")
+    if len(path) < 3 or not all(part.strip() for part in path):
+        raise MongoShellSyntaxError("Query must be in the format: database_name.collection_name.operation(params)")
+    database_name = path[0].strip()
+    collection_name = ".".join(path[1:-1]).strip()  # Collection names may contain dots
+    method = path[-1].strip()
+
+    try:
+        tree = ast.parse(f"_.{method}{command[call_start:]}", mode="eval")
+    except SyntaxError as e:
+        raise MongoShellSyntaxError(f"Invalid query syntax: {e.msg}")
+
+    calls = []
+    node = tree.body
+    while isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Attribute):
+            raise MongoShellSyntaxError("Only chained method calls are supported")
+        args = [_literal(argument, constructors or {}) for argument in node.args]
+        kwargs = {keyword.arg: _literal(keyword.value, constructors or {}) for keyword in node.keywords}
+        name = node.func.attr
+        calls.append((METHOD_NAMES.get(name, name), args, kwargs))
+        node = node.func.value
+    if not (isinstance(node, ast.Name) and node.id == "_"):
+        raise MongoShellSyntaxError("Only chained method calls are supported")
+    calls.reverse()
+    return database_name, collection_name, calls
+
+
+def _literal(node, constructors):
+    """Evaluates a literal argument, without running any other code"""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Dict):
+        if any(key is None for key in node.keys):
+            raise MongoShellSyntaxError("Spread (**) is not supported in queries")
+        return {_literal(key, constructors): _literal(value, constructors) for key, value in zip(node.keys, node.values)}
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = [_literal(item, constructors) for item in node.elts]
+        return values if isinstance(node, ast.List) else tuple(values)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _literal(node.operand, constructors)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Name) and node.id in LITERAL_NAMES:
+        return LITERAL_NAMES[node.id]
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in constructors and not node.keywords:
+        return constructors[node.func.id](*[_literal(argument, constructors) for argument in node.args])
+    raise MongoShellSyntaxError(f"Unsupported value in query: {ast.unparse(node)}")
@@ -1,25 +1,231 @@
 import ast
 import datetime
+import decimal
+import struct
+import time
+from collections import Counter
 import bson
-from pymongo import MongoClient
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient, InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
 import pymongo
+from pymongo.command_cursor import CommandCursor
+from pymongo.cursor import Cursor
 from db.abstract_client import AbstractClient
+from db.document_matcher import is_supported, matches
+from db.lazy_value import LazyValue, TruncatedValue, expand_document
+from db.mongo_shell_parser import parse_command
+from db.script_splitter import split_statements
 from db.syntax_highlight import syntax_highlight
 
 
+# Constructors allowed in raw queries
+RAW_QUERY_CONSTRUCTORS = {
+    "ObjectId": bson.objectid.ObjectId,
+    "ISODate": lambda value: datetime.datetime.fromisoformat(value.replace("Z", "+00:00")),
+}
+
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+DUPLICATE_KEY_ERROR = 11000
+BSON_DOCUMENT, BSON_ARRAY = 0x03, 0x04
+# Size of the values of fixed size, by BSON element type
+BSON_FIXED_SIZES = {0x01: 8, 0x06: 0, 0x07: 12, 0x08: 1, 0x09: 8, 0x0A: 0, 0x10: 4, 0x11: 8, 0x12: 8, 0x13: 16, 0x7F: 0, 0xFF: 0}
+
+
+def _bson_value_end(data, element_type, start):
+    """Returns the offset after the value of an element starting at start"""
+    size = BSON_FIXED_SIZES.get(element_type)
+    if size is not None:
+        return start + size
+    if element_type in (0x02, 0x0D, 0x0E):  # String, code and symbol: length of the text that follows
+        return start + 4 + struct.unpack_from("<i", data, start)[0]
+    if element_type in (BSON_DOCUMENT, BSON_ARRAY, 0x0F):  # Length including itself
+        return start + struct.unpack_from("<i", data, start)[0]
+    if element_type == 0x05:  # Binary: length, subtype, data
+        return start + 5 + struct.unpack_from("<i", data, start)[0]
+    if element_type == 0x0B:  # Regular expression: pattern and options as C strings
+        return data.index(b"\0", data.index(b"\0", start) + 1) + 1
+    if element_type == 0x0C:  # DBPointer: string and ObjectId
+        return start + 4 + struct.unpack_from("<i", data, start)[0] + 12
+    raise ValueError(f"Unknown BSON element type {element_type:#x}")
+
+
+class LazyBSONValue(LazyValue):
+    """A nested document or array kept as BSON: its element type byte followed by the encoded value"""
+    __slots__ = ()
+
+    def is_array(self):
+        return self[0] == BSON_ARRAY
+
+    def size(self):
+        return len(self) - 1
+
+    def expand(self):
+        value = bson.decode(self[1:])
+        return list(value.values()) if self.is_array() else value
+
+    def first_field(self):
+        """Returns the name of the first field of the encoded document, or None if it is empty"""
+        if len(self) <= 6:
+            return None
+        return self[6:self.index(b"\0", 6)].decode()
+
+
+def decode_lazily(raw, min_size):
+    """
+    Decodes a document read as raw BSON except for its nested documents and arrays larger than
+    min_size bytes, which are kept as LazyBSONValue. The other fields are decoded in one call.
+    """
+    if len(raw) <= min_size:
+        return bson.decode(raw)
+    names = []
+    lazy = {}
+    decoded_elements = bytearray()
+    position, end = 4, len(raw) - 1
+    while position < end:
+        element_type = raw[position]
+        name_end = raw.index(b"\0", position + 1)
+        name = raw[position + 1:name_end].decode()
+        value_start = name_end + 1
+        value_end = _bson_value_end(raw, element_type, value_start)
+        names.append(name)
+        if element_type in (BSON_DOCUMENT, BSON_ARRAY) and value_end - value_start > min_size:
+            lazy[name] = LazyBSONValue(raw[position:position + 1] + raw[value_start:value_end])
+        else:
+            decoded_elements += raw[position:value_end]
+        position = value_end
+    decoded = bson.decode(struct.pack("<i", len(decoded_elements) + 5) + bytes(decoded_elements) + b"\0")
+    return {name: lazy[name] if name in lazy else decoded[name] for name in names}
+
+
+PREVIEW_MARKER = "__nvm_preview__"  # Key of the documents standing for a truncated value in browse results
+PREVIEW_ARRAY_ITEMS = 10  # Items shown of a truncated array
+
+
+def preview_stage(length):
+    """
+    Returns the $replaceRoot stage replacing the strings and binaries longer than length, and the
+    arrays of more than PREVIEW_ARRAY_ITEMS items, with {PREVIEW_MARKER: kind, "preview", "size"}
+    """
+    value = "$$field.v"
+
+    def preview(kind, start, size):
+        return {PREVIEW_MARKER: kind, "preview": start, "size": size}
+
+    return {"$replaceRoot": {"newRoot": {"$arrayToObject": {"$map": {
+        "input": {"$objectToArray": "$$ROOT"},
+        "as": "field",
+        "in": {"k": "$$field.k", "v": {"$switch": {
+            "branches": [
+                # $and stops at the type check, so the size operators only see values of their type
+                {"case": {"$and": [{"$eq": [{"$type": value}, "string"]}, {"$gt": [{"$strLenCP": value}, length]}]},
+                 "then": preview("string", {"$substrCP": [value, 0, length]}, {"$strLenCP": value})},
+                {"case": {"$and": [{"$eq": [{"$type": value}, "array"]}, {"$gt": [{"$size": value}, PREVIEW_ARRAY_ITEMS]}]},
+                 "then": preview("array", {"$slice": [value, PREVIEW_ARRAY_ITEMS]}, {"$size": value})},
+                {"case": {"$and": [{"$eq": [{"$type": value}, "binData"]}, {"$gt": [{"$binarySize": value}, length]}]},
+                 "then": preview("binary", None, {"$binarySize": value})},
+            ],
+            "default": value,
+        }}},
+    }}}}}
+
+
+# Cursor methods and find() options (shell or PyMongo names) -> find() keyword arguments
+FIND_OPTIONS = {
+    "sort": "sort",
+    "limit": "limit",
+    "skip": "skip",
+    "projection": "projection",
+    "hint": "hint",
+    "batch_size": "batch_size",
+    "max_time_ms": "max_time_ms",
+    "maxTimeMS": "max_time_ms",
+    "batchSize": "batch_size",
+    "comment": "comment",
+    "collation": "collation",
+    "allowDiskUse": "allow_disk_use",
+    "allow_disk_use": "allow_disk_use",
+}
+
+# aggregate() options (PyMongo names) -> aggregate command options
+AGGREGATE_OPTIONS = {
+    "allow_disk_use": "allowDiskUse",
+    "batch_size": "batchSize",
+    "max_time_ms": "maxTimeMS",
+}
+
+
+def _sort_spec(args):
+    """Converts the arguments of sort() ({"a": -1}, ("a", -1) or [("a", -1)]) to a PyMongo sort list"""
+    if len(args) == 2:
+        return [(args[0], args[1])]
+    spec = args[0]
+    if isinstance(spec, dict):
+        return list(spec.items())
+    if isinstance(spec, str):
+        return [(spec, 1)]
+    return [tuple(item) for item in spec]
+
+
 class MongoDBClient(AbstractClient):
-    def __init__(self, uri: str = "mongodb://localhost:27017"):
+    # Options of the tuning profiles, passed to MongoClient: name -> (type, description)
+    TUNING_OPTIONS = {
+        "compressors": (str, "Wire compression, e.g. zstd,snappy,zlib"),
+        "zlibCompressionLevel": (int, "zlib level, -1 to 9"),
+        "maxPoolSize": (int, "Maximum connections in the pool"),
+        "minPoolSize": (int, "Connections kept open in the pool"),
+        "maxIdleTimeMS": (int, "Idle time before a pooled connection is closed"),
+        "readPreference": (str, "primary, primaryPreferred, secondary, secondaryPreferred or nearest"),
+        "socketTimeoutMS": (int, "Time to wait for a reply before failing"),
+        "connectTimeoutMS": (int, "Time to wait for a new connection"),
+        "serverSelectionTimeoutMS": (int, "Time to wait for a suitable server"),
+        "lazy_decoding": (bool, "Browse without decoding large nested values until opened"),
+        "lazy_min_size": (int, "Bytes from which a nested value is decoded lazily"),
+        "preview_length": (int, "Characters of a long value shown when browsing, 0 to read values in full"),
+    }
+    TUNING_PRESETS = {
+        "Remote (WAN)": {
+            "compressors": "zstd,snappy,zlib",
+            "readPreference": "secondaryPreferred",
+            "maxPoolSize": 10,
+            "connectTimeoutMS": 10000,
+            "serverSelectionTimeoutMS": 10000,
+            "socketTimeoutMS": 60000,
+        },
+    }
+
+    def __init__(self, uri: str = "mongodb://localhost:27017", lazy_decoding: bool = False, lazy_min_size: int = 1024, preview_length: int = 200, options=None):
+        """
+        Initializes the client.
+        Args:
+            uri (str): The connection string.
+            lazy_decoding (bool): Keep the nested values of browsed documents encoded until they are opened.
+            lazy_min_size (int): Encoded size from which a nested value is kept encoded.
+            preview_length (int): Characters (or bytes) of a string (or binary) read when browsing, 0 to read them in full.
+            options (dict): Other options of the tuning profile, passed to MongoClient.
+        """
         self.uri = uri
+        self.lazy_decoding = lazy_decoding
+        self.lazy_min_size = lazy_min_size
+        self.preview_length = preview_length
+        self.options = options or {}
         self.client = None
 
     def connect(self):
         """Connects to MongoDB and returns the client"""
         try:
-            self.client = MongoClient(self.uri)
+            self.client = MongoClient(self.uri, **self.options)
             return self.client
         except Exception as e:
             raise Exception(f"Error connecting to MongoDB: {e}")
 
+    def close(self):
+        """Closes the MongoDB client and its connection pool"""
+        if self.client:
+            self.client.close()
+            self.client = None
+
     def list_database_names(self):
         """Lists all available databases"""
         if not self.client:
@@ -33,8 +239,13 @@ class MongoDBClient(AbstractClient):
         db = self.client[database_name]
         return db.list_collection_names()
 
-    def fetch_documents(self, database_name, collection_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0):
-        """Fetches documents from a collection"""
+    def fetch_documents(self, database_name, collection_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0, lazy=False):
+        """
+        Fetches documents from a collection. With lazy set, long strings, arrays and binaries are
+        truncated by the server (TruncatedValue, read in full when expanded) and, with lazy decoding
+        enabled, the documents are read as raw BSON and their large nested values are only decoded
+        when expanded.
+        """
         if not self.client:
             raise Exception("Client not connected to MongoDB.")
         if filter_query is not None:
@@ -44,16 +255,58 @@ class MongoDBClient(AbstractClient):
                 raise ValueError(f"Error parsing filter query: {e}")
 
         db = self.client[database_name]
+        collection = db[collection_name]
+        if lazy and self.lazy_decoding:
+            collection = collection.with_options(codec_options=RAW_CODEC_OPTIONS)
+
+        s_order = pymongo.ASCENDING if sort_order == 1 else pymongo.DESCENDING
+        if lazy and self.preview_length > 0:
+            pipeline = [{"$match": filter_query or {}}]
+            if order_by:
+                pipeline.append({"$sort": {order_by: s_order}})
+            pipeline.append({"$skip": skip})
+            if limit:
+                pipeline.append({"$limit": limit})
+            pipeline.append(preview_stage(self.preview_length))
+            documents = list(collection.aggregate(pipeline))
+        elif order_by:
+            documents = list(collection
+                             .find(filter_query or {})
+                             .sort(order_by, s_order)
+                             .skip(skip)
+                             .limit(limit))
+        else:
+            documents = list(collection.find(filter_query or {}).skip(skip).limit(limit))
+        if lazy and self.lazy_decoding:
+            documents = [decode_lazily(document.raw, self.lazy_min_size) for document in documents]
+        if lazy and self.preview_length > 0:
+            for document in documents:
+                self._replace_previews(database_name, collection_name, document)
+        return documents
+
+    def _replace_previews(self, database_name, collection_name, document):
+        """Replaces the previews of a browsed document with TruncatedValue reading the full value by _id"""
+        for field, value in list(document.items()):
+            if isinstance(value, LazyBSONValue) and value.first_field() == PREVIEW_MARKER:
+                value = value.expand()  # The preview of an array of large items, kept encoded by decode_lazily
+            if isinstance(value, dict) and PREVIEW_MARKER in value:
+                document[field] = TruncatedValue(
+                    value["preview"], value["size"], value[PREVIEW_MARKER],
+                    self._value_reader(database_name, collection_name, "_id", document.get("_id"), field)
+                )
 
-        if order_by:
-            s_order = pymongo.ASCENDING if sort_order == 1 else pymongo.DESCENDING
-            return list(db[collection_name]
-                        .find(filter_query or {})
-                        .sort(order_by, s_order)
-                        .skip(skip)
-                        .limit(limit))
+    def _value_reader(self, database_name, collection_name, key_field, key, field):
+        """Returns a function reading the full value of a field of one document"""
+        return lambda: self.fetch_field_value(database_name, collection_name, key_field, key, field)
 
-        return list(db[collection_name].find(filter_query or {}).skip(skip).limit(limit))
+    def fetch_field_value(self, database_name, collection_name, key_field, key, field):
+        """Returns the value of one field of the document whose key_field is key, reading only that field"""
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        document = self.client[database_name][collection_name].find_one({key_field: key}, {field: 1})
+        if document is None or field not in document:
+            raise Exception(f"The document with {key_field} {key} no longer has a field '{field}'")
+        return document[field]
 
     def insert_document(self, database_name, collection_name, document):
         """Inserts a document into a collection"""
@@ -61,22 +314,110 @@ class MongoDBClient(AbstractClient):
             raise Exception("Client not connected to MongoDB.")
         db = self.client[database_name]
 
-        return db[collection_name].insert_one(document).inserted_id
+        return db[collection_name].insert_one(expand_document(document)).inserted_id
+
+    def insert_documents(self, database_name, collection_name, documents, skip_duplicates=False):
+        """
+        Inserts documents with one unordered insert_many, the server may apply them in parallel.
+        With skip_duplicates, documents whose _id (or unique key) exists are left out.
+        """
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        try:
+            return len(self.client[database_name][collection_name].insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # Unordered: every other document was inserted
+            if skip_duplicates and all(error.get("code") == DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                return e.details.get("nInserted", 0)
+            raise
 
     def delete_document(self, database_name, collection_name, document):
         """Deletes a document from a collection"""
         if not self.client:
             raise Exception("Client not connected to MongoDB.")
         db = self.client[database_name]
-        return db[collection_name].delete_one(document).deleted_count > 0
+        return db[collection_name].delete_one(expand_document(document)).deleted_count > 0
 
     def update_document(self, database_name, collection_name, filter_query, property):
         """Updates a document in a collection"""
         if not self.client:
             raise Exception("Client not connected to MongoDB.")
         db = self.client[database_name]
-        new_values = {"$set": property}
-        return db[collection_name].update_one(filter_query, new_values).modified_count > 0
+        new_values = {"$set": expand_document(property)}
+        return db[collection_name].update_one(expand_document(filter_query), new_values).modified_count > 0
+
+    def delete_documents(self, database_name, collection_name, key_field, keys):
+        """Deletes the documents whose key is one of keys with a single delete_many"""
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        db = self.client[database_name]
+        return db[collection_name].delete_many({key_field: {"$in": list(keys)}}).deleted_count
+
+    def update_documents(self, database_name, collection_name, key_field, keys, property):
+        """Updates the documents whose key is one of keys with a single update_many"""
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        db = self.client[database_name]
+        return db[collection_name].update_many({key_field: {"$in": list(keys)}}, {"$set": property}).matched_count
+
+    def bulk_write(self, database_name, collection_name, operations, ordered=True):
+        """
+        Executes the operations in a single bulk_write and maps its errors back to each operation.
+        A bulk write only reports total counts, so the documents targeted by the updates and deletes
+        are looked up first, with one query, to tell which of them match nothing.
+        """
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        collection = self.client[database_name][collection_name]
+        matched = self._matched_operations(collection, operations)
+        requests = []
+        for operation in operations:
+            if operation["op"] == "insert":
+                requests.append(InsertOne(expand_document(operation["document"])))
+            elif operation["op"] == "update":
+                requests.append(UpdateOne(expand_document(operation["filter"]), {"$set": expand_document(operation["update"])}))
+            else:
+                requests.append(DeleteOne(expand_document(operation["filter"])))
+
+        results = [
+            {"status": "ok", "error": None, "count": 1 if operation["op"] == "insert" or index in matched else 0}
+            for index, operation in enumerate(operations)
+        ]
+        try:
+            collection.bulk_write(requests, ordered=ordered)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            for write_error in write_errors:
+                results[write_error["index"]] = {"status": "error", "error": write_error.get("errmsg"), "count": 0}
+            if ordered and write_errors:
+                # An ordered bulk write stops at its first error
+                for index in range(write_errors[0]["index"] + 1, len(results)):
+                    results[index] = {"status": "skipped", "error": None, "count": 0}
+        return results
+
+    @staticmethod
+    def _matched_operations(collection, operations):
+        """
+        Returns the indexes of the update and delete operations whose filter matches a document.
+        The check is best-effort: it reads the documents before the bulk write, so a document
+        changed by another client between the two is still counted, and a conflict missed.
+        Filters are evaluated with the local matcher, which follows dotted paths.
+        """
+        targets = [(index, expand_document(operation["filter"])) for index, operation in enumerate(operations) if operation["op"] != "insert"]
+        if not targets:
+            return set()
+        fields = {field for _, filter_query in targets for field in filter_query}
+        # Operators at the top of a filter may test any field, their documents are read in full
+        projection = None if any(field.startswith("$") for field in fields) else {field: 1 for field in fields}
+        found = list(collection.find({"$or": [filter_query for _, filter_query in targets]}, projection))
+        return {
+            index for index, filter_query in targets
+            if any(matches(document, filter_query) for document in found)
+        }
+
+    def get_primary_key(self, database_name, collection_name):
+        """Returns the primary key of a collection, always _id"""
+        return "_id"
 
     def get_type_converters(self):
         """Returns a dictionary with data types and associated conversion functions"""
@@ -88,93 +429,260 @@ class MongoDBClient(AbstractClient):
             dict: lambda value: ast.literal_eval(value),
             bson.objectid.ObjectId: lambda value: bson.objectid.ObjectId(value),
             str: lambda value: value,
-            datetime: lambda value: datetime.fromisoformat(value),
+            datetime.datetime: lambda value: datetime.datetime.fromisoformat(value),
         }
 
+    def to_storable(self, value):
+        """Returns a value in a form BSON can encode (e.g. a DECIMAL of MySQL as Decimal128)"""
+        if isinstance(value, decimal.Decimal):
+            return bson.decimal128.Decimal128(value)
+        if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+            return datetime.datetime.combine(value, datetime.time())
+        if isinstance(value, (datetime.time, datetime.timedelta)):
+            return str(value)
+        if isinstance(value, dict):
+            return {key: self.to_storable(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple, set)):
+            return [self.to_storable(item) for item in value]
+        return value
+
     def get_collection_schema(self, database_name, collection_name, sample_size=10):
-        """Returns the schema of a collection"""
+        """Returns the schema of a collection, using the most frequent type of each field in a random sample"""
+        types = {}
+        for doc in self.sample_documents(database_name, collection_name, sample_size):
+            for field, value in doc.items():
+                types.setdefault(field, Counter())[type(value)] += 1
+        return {field: counter.most_common(1)[0][0] for field, counter in types.items()}
+
+    def sample_documents(self, database_name, collection_name, sample_size=100, batch_size=50):
+        """Yields a random sample of documents drawn by the server with $sample"""
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        collection = self.client[database_name][collection_name]
+        yield from collection.aggregate([{"$sample": {"size": sample_size}}], batchSize=batch_size)
+
+    def fetch_range(self, database_name, collection_name, key_field, lower=None, upper=None):
+        """Returns the documents whose key is in [lower, upper), sorted by key (a range only matches keys of the type of its bounds)"""
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        bounds = {}
+        if lower is not None:
+            bounds["$gte"] = lower
+        if upper is not None:
+            bounds["$lt"] = upper
+        query = {key_field: bounds} if bounds else {}
+        return list(self.client[database_name][collection_name].find(query).sort(key_field, pymongo.ASCENDING))
+
+    def stream_range(self, database_name, collection_name, key_field, lower=None, upper=None, batch_size=1000):
+        """Yields the documents whose key is in [lower, upper) from a server cursor returning batch_size documents per round trip"""
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        bounds = {}
+        if lower is not None:
+            bounds["$gte"] = lower
+        if upper is not None:
+            bounds["$lt"] = upper
+        query = {key_field: bounds} if bounds else {}
+        cursor = self.client[database_name][collection_name].find(query).sort(key_field, pymongo.ASCENDING).batch_size(batch_size)
+        with cursor:  # Closes the server cursor if the reader stops early
+            yield from cursor
+
+    def get_collection_stats(self, database_name):
+        """Returns the size statistics of every collection of a database, from $collStats (summed over the shards)"""
         if not self.client:
             raise Exception("Client not connected to MongoDB.")
         db = self.client[database_name]
-        collection = db[collection_name]
-        documents = collection.find().limit(sample_size)
-        schema = {}
-        for doc in documents:
-            for field, value in doc.items():
-                # If the field is already in the schema, ensure consistency
-                if field in schema:
-                    if schema[field] != type(value):
-                        schema[field] = object  # Fallback to generic type if inconsistent
-                else:
-                    # Add new field to schema
-                    schema[field] = type(value)
-        return schema
+        stats = []
+        for collection_name in db.list_collection_names(filter={"type": "collection"}):  # Views have no storage
+            row = {
+                "collection": collection_name, "count": 0, "estimated": False, "avg_size": 0, "data_size": 0,
+                "storage_size": 0, "free_size": 0, "index_size": 0, "indexes": 0, "error": None,
+            }
+            try:
+                for shard in db[collection_name].aggregate([{"$collStats": {"storageStats": {}}}]):
+                    storage = shard["storageStats"]
+                    row["count"] += storage.get("count", 0)
+                    row["data_size"] += storage.get("size", 0)
+                    row["storage_size"] += storage.get("storageSize", 0)
+                    row["free_size"] += storage.get("freeStorageSize", 0)
+                    row["index_size"] += storage.get("totalIndexSize", 0)
+                    row["indexes"] = max(row["indexes"], storage.get("nindexes", 0))
+            except Exception as e:
+                row["error"] = str(e)  # e.g. not authorized on this collection
+            row["avg_size"] = row["data_size"] // row["count"] if row["count"] else 0
+            stats.append(row)
+        return stats
 
-    def execute_raw_query(self, raw_command):
+    def watch_collection(self, database_name, collection_name, filter_query=None, document_keys=None, stop_event=None, resume_token=None):
         """
-        Executes a MongoDB operation in the format: database_name.collection_name.operation(params).
-        Example input: nosql_manager_test.products.insert_one({"id": 104, "name": "Keyboard", "price": 75.0, "stock": 20})
+        Yields the changes of a collection from a change stream, starting after resume_token
+        if one is given. Inserts and updates are filtered on the server with filter_query;
+        updates of the documents in document_keys are always sent so they can be removed
+        when they stop matching, and so is every delete, which carries no document to filter.
         """
         if not self.client:
             raise Exception("Client not connected to MongoDB.")
+        query = ast.literal_eval(filter_query) if filter_query else {}
+        if query:
+            match = {"$and": [
+                {"operationType": {"$in": ["insert", "update", "replace"]}},
+                self._prefix_fields(query, "fullDocument."),
+            ]}
+            watched = [match, {"operationType": "delete"}]
+            if document_keys:
+                watched.append({"operationType": {"$in": ["update", "replace"]}, "documentKey._id": {"$in": list(document_keys)}})
+            match = {"$or": watched}
+        else:
+            match = {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}
 
-        try:
-            # Split the raw_command into parts: database, collection, and operation
-            parts = raw_command.split(".", 2)
-            if len(parts) < 3:
-                raise ValueError("Query must be in the format: database_name.collection_name.operation(params)")
+        collection = self.client[database_name][collection_name]
+        with collection.watch(
+            [{"$match": match}], full_document="updateLookup", max_await_time_ms=500, resume_after=resume_token
+        ) as stream:
+            while stream.alive and not (stop_event and stop_event.is_set()):
+                change = stream.try_next()
+                if change is None:
+                    continue
+                operation = change["operationType"]
+                yield {
+                    "operation": "update" if operation == "replace" else operation,
+                    "key": change["documentKey"],
+                    "document": change.get("fullDocument"),
+                    "token": change["_id"],
+                }
 
-            database_name, collection_name, operation_call = parts
+    @classmethod
+    def _prefix_fields(cls, query, prefix):
+        """Prefixes the field names of a filter, keeping the logical operators"""
+        prefixed = {}
+        for key, value in query.items():
+            if key in ("$and", "$or", "$nor"):
+                prefixed[key] = [cls._prefix_fields(sub_query, prefix) for sub_query in value]
+            else:
+                prefixed[f"{prefix}{key}"] = value
+        return prefixed
 
-            # Extract the operation and parameters
-            operation, params = operation_call.split("(", 1)
-            params = params.rstrip(")")  # Remove the closing parenthesis
+    def compile_local_filter(self, filter_query):
+        """Returns a function that evaluates a filter on documents already loaded, or None if it is not supported"""
+        try:
+            query = ast.literal_eval(filter_query)
+        except Exception:
+            return None
+        if not isinstance(query, dict) or not is_supported(query):
+            return None
+        return lambda document: matches(document, query)
 
-            # Parse the parameters into a Python dictionary or list
-            if params.strip():
-                params = ast.literal_eval(params)  # Safely convert string to dict or list
-            else:
-                params = {}
-
-            # Access the database and collection
-            db = self.client[database_name]
-            collection = db[collection_name]
-
-            # Dynamically call the MongoDB collection operation
-            if hasattr(collection, operation):
-                method = getattr(collection, operation)
-
-                # Check if params is a dict (e.g., for find, insert, update, etc.)
-                if isinstance(params, dict):
-                    result = method(params)  # Pass as a positional argument
-                elif isinstance(params, list):
-                    result = method(*params)  # Unpack as multiple positional arguments
-                elif isinstance(params, tuple):
-                    # If params are tuple-based (e.g., `update_one`), unpack them
-                    result = method(*params)
-                else:
-                    result = method()
+    def execute_raw_query(self, raw_command, session=None):
+        """
+        Executes a shell-style MongoDB command: database_name.collection_name.operation(params),
+        optionally followed by cursor methods, e.g. shop.products.find({"stock": 0}).sort({"price": -1}).limit(50).
+        The operation runs in session (and its transaction) if one is given.
+        """
+        return list(self.stream_raw_query(raw_command, session))
 
-                if isinstance(result, pymongo.cursor.Cursor):
-                    return list(result)  # Convert cursor to list
-                else:
-                    # Dynamically collect attributes from the result object
-                    attributes = [{
-                        "acknowledged": getattr(result, "acknowledged", None),
-                        "inserted_id": str(getattr(result, "inserted_id", None)),
-                        "matched_count": getattr(result, "matched_count", None),
-                        "modified_count": getattr(result, "modified_count", None),
-                        "deleted_count": getattr(result, "deleted_count", None),
-                    }]
-
-                    # Filter out None values for cleaner results
-                    return attributes
-            else:
-                raise ValueError(f"Unsupported operation: {operation}")
+    def stream_raw_query(self, raw_command, session=None):
+        """
+        Yields the results of a raw command as the server returns them. Cursor options
+        (sort, limit, skip, projection, hint, batch size, maxTimeMS) are sent to the server
+        with the query, so only the requested documents are transferred.
+        """
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+
+        try:
+            database_name, collection_name, calls = parse_command(raw_command, RAW_QUERY_CONSTRUCTORS)
+            collection = self.client[database_name][collection_name]
+            result = self._run_calls(collection, calls, session)
 
+            if isinstance(result, (Cursor, CommandCursor)):
+                with result:  # Closes the server cursor if the reader stops early
+                    yield from result
+            elif isinstance(result, dict):
+                yield result
+            elif isinstance(result, list):
+                for value in result:
+                    yield value if isinstance(value, dict) else {"value": value}
+            elif isinstance(result, (int, float, str)):
+                yield {"result": result}
+            elif result is not None:
+                # Dynamically collect attributes from the result object
+                yield {
+                    "acknowledged": getattr(result, "acknowledged", None),
+                    "inserted_id": str(getattr(result, "inserted_id", None)),
+                    "matched_count": getattr(result, "matched_count", None),
+                    "modified_count": getattr(result, "modified_count", None),
+                    "deleted_count": getattr(result, "deleted_count", None),
+                }
         except Exception as e:
             raise Exception(f"Error executing raw query: {e}")
 
+    def _run_calls(self, collection, calls, session=None):
+        """Runs a parsed call chain on a collection"""
+        method, args, kwargs = calls[0]
+        modifiers = calls[1:]
+        session_args = {"session": session} if session else {}
+
+        if method == "find":
+            options = {FIND_OPTIONS.get(key, key): value for key, value in kwargs.items()}
+            if len(args) > 1:
+                options["projection"] = args[1]
+            for name, modifier_args, _ in modifiers:
+                if name not in FIND_OPTIONS.values() and name not in FIND_OPTIONS:
+                    raise ValueError(f"Unsupported cursor method: {name}")
+                option = FIND_OPTIONS.get(name, name)
+                if option == "sort":
+                    options["sort"] = _sort_spec(modifier_args)
+                elif option == "hint" and isinstance(modifier_args[0], dict):
+                    options["hint"] = list(modifier_args[0].items())
+                else:
+                    options[option] = modifier_args[0]
+            return collection.find(args[0] if args else {}, **options, **session_args)
+
+        if modifiers:
+            raise ValueError(f"Cursor methods cannot follow {method}")
+        if method == "aggregate":
+            options = dict(args[1]) if len(args) > 1 else {}
+            options.update(kwargs)
+            options = {AGGREGATE_OPTIONS.get(key, key): value for key, value in options.items()}
+            return collection.aggregate(args[0] if args else [], **options, **session_args)
+
+        operation = getattr(collection, method, None) if not method.startswith("_") else None
+        if not callable(operation):
+            raise ValueError(f"Unsupported operation: {method}")
+        return operation(*args, **kwargs, **session_args)
+
+    def split_script(self, script):
+        """Splits a script into operations, one per line unless brackets are still open"""
+        return split_statements(script, line_comments=("//",), separate_on_newline=True, keep_comments=False)
+
+    def execute_script(self, statements, transaction=False):
+        """Executes operations one after the other, in one multi-document transaction if asked (replica sets only)"""
+        if not self.client:
+            raise Exception("Client not connected to MongoDB.")
+        session = None
+        committed = False
+        if transaction:
+            session = self.client.start_session()
+            session.start_transaction()
+        try:
+            for statement in statements:
+                started_at = time.perf_counter()
+                try:
+                    rows = self.execute_raw_query(statement, session)
+                except Exception as e:
+                    error = f"{e} (the script was rolled back)" if transaction else str(e)
+                    yield {"statement": statement, "rows": None, "affected": None, "elapsed": time.perf_counter() - started_at, "error": error}
+                    return
+                yield {"statement": statement, "rows": rows, "affected": None, "elapsed": time.perf_counter() - started_at, "error": None}
+            if session:
+                session.commit_transaction()
+                committed = True
+        finally:
+            if session:
+                if not committed and session.in_transaction:
+                    session.abort_transaction()
+                session.end_session()
+
     def get_syntax_highlighter(self):
         """Returns a syntax highlighter for the query editor"""
         return syntax_highlight(
@@ -182,7 +690,9 @@ class MongoDBClient(AbstractClient):
                 "find", "insert_one", "insert_many", "update_one",
                 "update_many", "delete_one", "delete_many", "aggregate",
                 "count_documents", "distinct", "bulk_write", "create_index",
-                "drop_index", "list_indexes", "watch"
+                "drop_index", "list_indexes", "watch", "find_one",
+                "sort", "limit", "skip", "projection", "hint", "batchSize", "maxTimeMS",
+                "allowDiskUse", "true", "false", "null", "ObjectId", "ISODate"
             ],
             operators=[
                 "$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin",
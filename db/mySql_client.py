@@ -1,99 +1,502 @@
+import datetime
+import decimal
+import json
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlparse
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import ClientFlag, Error
 from db.abstract_client import AbstractClient
+from db.lazy_value import TruncatedValue, expand_document
 from db.syntax_highlight import syntax_highlight
 
 
+MAX_IDENTIFIER_LENGTH = 64
+POOL_WAIT_SECONDS = 1  # How often a thread waiting for a pooled connection checks that the client is still open
+# Values of these types are sent as they are, the others (documents, arrays, ObjectId...) as text
+SQL_TYPES = (str, int, float, bool, decimal.Decimal, datetime.date, datetime.time, datetime.timedelta, bytes, bytearray)
+# Column type, without its length and attributes -> Python type of its values. Types left out
+# (JSON, TIME, binary...) are sent as the text typed by the user and parsed by the server.
+COLUMN_TYPES = {
+    "tinyint": int, "smallint": int, "mediumint": int, "int": int, "integer": int, "bigint": int, "year": int,
+    "decimal": decimal.Decimal, "numeric": decimal.Decimal, "float": float, "double": float, "real": float,
+    "date": datetime.date, "datetime": datetime.datetime, "timestamp": datetime.datetime,
+    "char": str, "varchar": str, "tinytext": str, "text": str, "mediumtext": str, "longtext": str, "enum": str, "set": str,
+}
+# Column types read as a preview when browsing -> kind of TruncatedValue
+PREVIEW_COLUMN_TYPES = {
+    "text": "string", "mediumtext": "string", "longtext": "string", "json": "string",
+    "blob": "binary", "mediumblob": "binary", "longblob": "binary",
+}
+
+
+def _normalize_type(declared_type):
+    """Returns a declared column type as lowercase text"""
+    if isinstance(declared_type, (bytes, bytearray)):
+        declared_type = declared_type.decode()  # DESCRIBE returns bytes with some connector versions
+    return declared_type.strip().lower()
+
+
+def base_type(declared_type):
+    """Returns the name of a column type without its length and attributes (e.g. "int" for "int(11) unsigned")"""
+    return _normalize_type(declared_type).split("(")[0].split(" ")[0]
+
+
+def column_type(declared_type):
+    """Returns the Python type of the values of a column from its declared type (e.g. "int(11) unsigned"), or None"""
+    declared_type = _normalize_type(declared_type)
+    if declared_type.startswith("tinyint(1)") or declared_type in ("bool", "boolean"):
+        return bool
+    return COLUMN_TYPES.get(base_type(declared_type))
+
+
+def quote_identifier(name):
+    """Quotes a database, table or column name with backticks, rejecting names MySQL cannot have"""
+    if not isinstance(name, str) or not name or len(name) > MAX_IDENTIFIER_LENGTH or "\0" in name or name != name.rstrip():
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return "`" + name.replace("`", "``") + "`"
+
+
 class MySQLClient(AbstractClient):
-    def __init__(self, uri: str = "mysql://root@localhost:3306"):
+    # Options of the tuning profiles: name -> (type, description). pool_size and statement_cache_size
+    # are used by the client, the others are passed to mysql.connector.connect
+    TUNING_OPTIONS = {
+        "pool_size": (int, "Maximum connections in the pool"),
+        "statement_cache_size": (int, "Prepared statements kept per connection"),
+        "compress": (bool, "Compress the client/server protocol"),
+        "use_pure": (bool, "false to use the C extension when it is installed"),
+        "connection_timeout": (int, "Seconds to wait for a new connection"),
+        "read_timeout": (int, "Seconds to wait for a reply before failing"),
+        "write_timeout": (int, "Seconds to wait for a request to be sent"),
+        "preview_length": (int, "Characters of a TEXT, JSON or BLOB value shown when browsing, 0 to read values in full"),
+    }
+    TUNING_PRESETS = {
+        "Remote (WAN)": {"compress": True, "use_pure": False, "connection_timeout": 10, "read_timeout": 60},
+    }
+
+    def __init__(self, uri: str = "mysql://root@localhost:3306", pool_size: int = 4, statement_cache_size: int = 32, preview_length: int = 200, options=None):
+        """
+        Initializes the client.
+        Args:
+            uri (str): The connection string.
+            pool_size (int): Maximum number of connections opened at the same time.
+            statement_cache_size (int): Number of prepared statements kept per connection.
+            preview_length (int): Characters (or bytes) of a TEXT, JSON (or BLOB) value read when browsing, 0 to read them in full.
+            options (dict): Other options of the tuning profile, passed to mysql.connector.connect.
+        """
         self.uri = uri
+        self.pool_size = pool_size
+        self.statement_cache_size = statement_cache_size
+        self.preview_length = preview_length
+        self._preview_plans = {}  # (database, table) -> (primary key, [(column, preview kind or None)])
+        self.options = options or {}
         self.connection = None
+        self._closed = False  # Set by close(): borrowed connections are closed when they are returned
+        self._idle_connections = queue.LifoQueue()
+        self._open_connections = 0
+        self._pool_lock = threading.Lock()
+        self._statements = {}  # id of a pooled connection -> OrderedDict of SQL -> (cached SQL string, prepared cursor)
 
     def connect(self):
         """Parses the URI and connects to the MySQL database"""
         try:
-            # Parse URI for connection details
-            from urllib.parse import urlparse
-            parsed = urlparse(self.uri)
-
-            self.connection = mysql.connector.connect(
-                host=parsed.hostname,
-                port=parsed.port or 3306,
-                user=parsed.username,
-                password=parsed.password,
-                database=parsed.path.lstrip("/") or None
-            )
+            self._closed = False
+            self.connection = self._open_connection()
             if self.connection.is_connected():
+                self._open_connections = 1
+                self._idle_connections.put(self.connection)
                 print("Connected to MySQL")
                 return self.connection
         except Error as e:
             raise Exception(f"Error connecting to MySQL: {e}")
 
+    def _open_connection(self):
+        """Opens a new connection using the details of the URI"""
+        parsed = urlparse(self.uri)
+        return mysql.connector.connect(
+            host=parsed.hostname,
+            port=parsed.port or 3306,
+            user=parsed.username,
+            password=parsed.password,
+            database=parsed.path.lstrip("/") or None,
+            # UPDATE reports the rows it matched, not only those it changed, so an edit
+            # that keeps a value is not mistaken for a row that no longer exists
+            client_flags=[ClientFlag.FOUND_ROWS],
+            **self.options
+        )
+
+    @contextmanager
+    def _borrow_connection(self):
+        """
+        Takes a connection from the pool for exclusive use, opening a new one while
+        the pool is below pool_size and waiting for a free one otherwise.
+        """
+        if not self.connection:
+            raise Exception("Client not connected to MySQL.")
+        try:
+            connection = self._idle_connections.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                can_open = self._open_connections < self.pool_size
+                if can_open:
+                    self._open_connections += 1
+            if can_open:
+                try:
+                    connection = self._open_connection()
+                except Exception:
+                    with self._pool_lock:
+                        self._open_connections -= 1
+                    raise
+            else:
+                connection = self._wait_for_connection()
+        try:
+            if not connection.is_connected():
+                # Statements prepared on the lost session no longer exist on the server
+                self._statements.pop(id(connection), None)
+                connection.reconnect()
+            yield connection
+        finally:
+            with self._pool_lock:
+                returned = not self._closed
+                if returned:
+                    self._idle_connections.put(connection)
+            if not returned:
+                self._statements.pop(id(connection), None)
+                connection.close()
+
+    def _wait_for_connection(self):
+        """Waits for a connection to be returned to the pool, failing if the client is closed meanwhile"""
+        while True:
+            try:
+                return self._idle_connections.get(timeout=POOL_WAIT_SECONDS)
+            except queue.Empty:
+                if self._closed:
+                    raise Exception("Client not connected to MySQL.")
+
+    def close(self):
+        """Closes the MySQL connections of the pool, those in use are closed when they are returned"""
+        with self._pool_lock:
+            self._closed = True
+            idle_connections = []
+            while True:
+                try:
+                    idle_connections.append(self._idle_connections.get_nowait())
+                except queue.Empty:
+                    break
+            self._open_connections = 0
+        self._statements.clear()
+        for connection in idle_connections:
+            connection.close()
+        self.connection = None
+
+    def _execute(self, connection, statement, params=()):
+        """
+        Executes a statement through a prepared cursor cached per connection and per
+        statement text, so the server parses and plans each statement shape once.
+        Only the parameters change between calls.
+        """
+        statements = self._statements.setdefault(id(connection), OrderedDict())
+        cached = statements.pop(statement, None)
+        if cached is None:
+            cached = (statement, connection.cursor(prepared=True))
+        # The connector only reuses the prepared statement when it is given the same string object
+        statement, cursor = cached
+        try:
+            cursor.execute(statement, params)
+        except Exception:
+            cursor.close()
+            raise
+        statements[statement] = cached  # Most recently used last
+        while len(statements) > self.statement_cache_size:
+            statements.popitem(last=False)[1][1].close()
+        return cursor
+
+    def _execute_many(self, connection, statement, params):
+        """
+        Executes a statement once per set of parameters and returns the number of rows each one
+        matched. A batch of INSERTs goes through executemany, which sends it as one multi-row
+        INSERT; other statements (and a single INSERT) run one by one through their cached
+        prepared cursor.
+        """
+        if len(params) > 1 and statement.startswith("INSERT"):
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(statement, params)
+            finally:
+                cursor.close()
+            return [1] * len(params)
+        return [self._execute(connection, statement, values).rowcount for values in params]
+
+    @staticmethod
+    def _fetch_dicts(cursor):
+        """Fetches the remaining rows of a cursor as dictionaries"""
+        columns = cursor.column_names
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _table(database_name, table_name):
+        """Returns the quoted name of a table"""
+        return f"{quote_identifier(database_name)}.{quote_identifier(table_name)}"
+
+    @staticmethod
+    def _sort_direction(sort_order):
+        """Maps the sort order of the browser (1 / -1) or an SQL keyword to ASC or DESC"""
+        if sort_order in (-1, "-1") or str(sort_order).upper() == "DESC":
+            return "DESC"
+        return "ASC"
+
     def list_database_names(self):
         """Lists all available databases"""
-        if not self.connection or not self.connection.is_connected():
-            raise Exception("Client not connected to MySQL.")
-        cursor = self.connection.cursor()
-        cursor.execute("SHOW DATABASES")
-        return [db[0] for db in cursor.fetchall()]
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SHOW DATABASES")
+            return [db[0] for db in cursor.fetchall()]
 
     def list_collection_names(self, database_name: str):
         """Lists all tables in a database"""
-        if not self.connection or not self.connection.is_connected():
-            raise Exception("Client not connected to MySQL.")
-        cursor = self.connection.cursor()
-        cursor.execute(f"USE {database_name}")
-        cursor.execute("SHOW TABLES")
-        return [table[0] for table in cursor.fetchall()]
-
-    def fetch_documents(self, database_name, table_name, order_by=None, sort_order="ASC", filter_query=None, limit=10, skip=0):
-        """Fetches records from a table"""
-        if not self.connection or not self.connection.is_connected():
-            raise Exception("Client not connected to MySQL.")
-        query = f"SELECT * FROM {database_name}.{table_name}"
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"SHOW TABLES FROM {quote_identifier(database_name)}")
+            return [table[0] for table in cursor.fetchall()]
+
+    def fetch_documents(self, database_name, table_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0, lazy=False):
+        """
+        Fetches records from a table, binding the page as parameters so every page reuses one prepared
+        statement. With lazy set, TEXT, JSON and BLOB columns are read as previews of preview_length
+        characters (or bytes): longer values are TruncatedValue, read in full by primary key when expanded.
+        """
+        table = self._table(database_name, table_name)
+        columns, previews = None, []
+        if lazy and self.preview_length > 0:
+            primary_key, columns = self._preview_plan(database_name, table_name)
+            previews = [(column, kind) for column, kind in columns if kind] if primary_key else []
+        if previews:
+            select = ", ".join(
+                f"LEFT({quote_identifier(column)}, {int(self.preview_length)}) AS {quote_identifier(column)}" if kind else quote_identifier(column)
+                for column, kind in columns
+            ) + ", " + ", ".join(
+                f"{'CHAR_LENGTH' if kind == 'string' else 'LENGTH'}({quote_identifier(column)})" for column, kind in previews
+            )
+        else:
+            select = "*"
+        query = f"SELECT {select} FROM {table}"
         if filter_query:
+            # The filter is free SQL typed by the user, it is part of the statement shape
             query += f" WHERE {filter_query}"
         if order_by:
-            query += f" ORDER BY {order_by} {sort_order}"
-        query += f" LIMIT {limit} OFFSET {skip}"
-        cursor = self.connection.cursor(dictionary=True)
-        cursor.execute(query)
-        return cursor.fetchall()
+            # Qualified, so a previewed column is sorted by its full value rather than by its preview
+            query += f" ORDER BY {table}.{quote_identifier(order_by)} {self._sort_direction(sort_order)}"
+        query += " LIMIT %s OFFSET %s"
+        try:
+            with self._borrow_connection() as connection:
+                cursor = self._execute(connection, query, (int(limit), int(skip)))
+                if not previews:
+                    return self._fetch_dicts(cursor)
+                rows = cursor.fetchall()
+        except Exception:
+            self._preview_plans.pop((database_name, table_name), None)  # The table may have changed
+            raise
+        names = [column for column, _ in columns]
+        records = []
+        for row in rows:
+            record = dict(zip(names, row[:len(names)]))
+            for (column, kind), size in zip(previews, row[len(names):]):
+                if size is not None and size > self.preview_length:
+                    record[column] = TruncatedValue(
+                        record[column] if kind == "string" else None, size, kind,
+                        self._value_reader(database_name, table_name, primary_key, record[primary_key], column)
+                    )
+            records.append(record)
+        return records
+
+    def _preview_plan(self, database_name, table_name):
+        """Returns the primary key of a table and its columns with the kind of preview of each (None for none), cached"""
+        key = (database_name, table_name)
+        plan = self._preview_plans.get(key)
+        if plan is None:
+            columns = [
+                (column, PREVIEW_COLUMN_TYPES.get(base_type(declared_type)))
+                for column, declared_type in self.get_collection_schema(database_name, table_name).items()
+            ]
+            plan = self._preview_plans[key] = (self.get_primary_key(database_name, table_name), columns)
+        return plan
+
+    def _value_reader(self, database_name, table_name, key_field, key, column):
+        """Returns a function reading the full value of a column of one record"""
+        return lambda: self.fetch_field_value(database_name, table_name, key_field, key, column)
+
+    def fetch_field_value(self, database_name, table_name, key_field, key, column):
+        """Returns the value of one column of the record whose key_field is key"""
+        query = f"SELECT {quote_identifier(column)} FROM {self._table(database_name, table_name)} WHERE {quote_identifier(key_field)} = %s"
+        with self._borrow_connection() as connection:
+            rows = self._execute(connection, query, (key,)).fetchall()
+        if not rows:
+            raise Exception(f"The record with {key_field} {key} no longer exists")
+        return rows[0][0]
 
     def insert_document(self, database_name, table_name, document):
         """Inserts a record into a table"""
-        if not self.connection or not self.connection.is_connected():
-            raise Exception("Client not connected to MySQL.")
-        keys = ", ".join(document.keys())
+        document = expand_document(document)
+        keys = ", ".join(quote_identifier(key) for key in document.keys())
         values = ", ".join(["%s"] * len(document))
-        query = f"INSERT INTO {database_name}.{table_name} ({keys}) VALUES ({values})"
-        cursor = self.connection.cursor()
-        cursor.execute(query, tuple(document.values()))
-        self.connection.commit()
-        return cursor.lastrowid
+        query = f"INSERT INTO {self._table(database_name, table_name)} ({keys}) VALUES ({values})"
+        with self._borrow_connection() as connection:
+            cursor = self._execute(connection, query, tuple(document.values()))
+            connection.commit()
+            return cursor.lastrowid
+
+    def insert_documents(self, database_name, table_name, records, skip_duplicates=False):
+        """
+        Inserts records with one multi-row INSERT, the columns are those of every record
+        (missing values are NULL). Not prepared, as its text changes with the number of records.
+        With skip_duplicates, records whose primary or unique key exists are left as they are
+        (ON DUPLICATE KEY UPDATE with no change, unlike INSERT IGNORE other errors still fail).
+        Returns the number of records inserted. The connections report a skipped duplicate as
+        an affected row (FOUND_ROWS), so the records whose primary key already exists are
+        counted first and left out; duplicates of other unique keys are still counted.
+        """
+        records = list(records)
+        if not records:
+            return 0
+        columns = list(dict.fromkeys(key for record in records for key in record))
+        row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        query = (
+            f"INSERT INTO {self._table(database_name, table_name)} ({', '.join(quote_identifier(column) for column in columns)}) "
+            f"VALUES {', '.join([row] * len(records))}"
+        )
+        if skip_duplicates:
+            query += f" ON DUPLICATE KEY UPDATE {quote_identifier(columns[0])} = {quote_identifier(columns[0])}"
+        params = tuple(record.get(column) for record in records for column in columns)
+        primary_key = self.get_primary_key(database_name, table_name) if skip_duplicates else None
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor()
+            try:
+                existing = 0
+                keys = [record[primary_key] for record in records if record.get(primary_key) is not None]
+                if keys:
+                    cursor.execute(
+                        f"SELECT COUNT(*) FROM {self._table(database_name, table_name)} "
+                        f"WHERE {quote_identifier(primary_key)} IN ({', '.join(['%s'] * len(keys))})",
+                        tuple(keys)
+                    )
+                    existing = cursor.fetchone()[0]
+                cursor.execute(query, params)
+                connection.commit()
+                return cursor.rowcount - existing
+            finally:
+                cursor.close()
 
     def delete_document(self, database_name, table_name, document):
         """Deletes a record from a table"""
-        if not self.connection or not self.connection.is_connected():
-            raise Exception("Client not connected to MySQL.")
-        where_clause = " AND ".join([f"{key} = %s" for key in document.keys()])
-        query = f"DELETE FROM {database_name}.{table_name} WHERE {where_clause}"
-        cursor = self.connection.cursor()
-        cursor.execute(query, tuple(document.values()))
-        self.connection.commit()
-        return cursor.rowcount > 0
+        document = expand_document(document)
+        where_clause = " AND ".join([f"{quote_identifier(key)} = %s" for key in document.keys()])
+        query = f"DELETE FROM {self._table(database_name, table_name)} WHERE {where_clause}"
+        with self._borrow_connection() as connection:
+            cursor = self._execute(connection, query, tuple(document.values()))
+            connection.commit()
+            return cursor.rowcount > 0
 
     def update_document(self, database_name, table_name, filter_query, property):
         """Updates records in a table"""
-        if not self.connection or not self.connection.is_connected():
-            raise Exception("Client not connected to MySQL.")
-        set_clause = ", ".join([f"{key} = %s" for key in property.keys()])
-        str_filter_query = " AND ".join([f"{key} = %s" for key in filter_query.keys()])
-        query = f"UPDATE {database_name}.{table_name} SET {set_clause} WHERE {str_filter_query}"
-        cursor = self.connection.cursor()
-        cursor.execute(query, tuple(property.values()) + tuple(filter_query.values()))
-        self.connection.commit()
-        return cursor.rowcount > 0
+        filter_query, property = expand_document(filter_query), expand_document(property)
+        set_clause = ", ".join([f"{quote_identifier(key)} = %s" for key in property.keys()])
+        str_filter_query = " AND ".join([f"{quote_identifier(key)} = %s" for key in filter_query.keys()])
+        query = f"UPDATE {self._table(database_name, table_name)} SET {set_clause} WHERE {str_filter_query}"
+        with self._borrow_connection() as connection:
+            cursor = self._execute(connection, query, tuple(property.values()) + tuple(filter_query.values()))
+            connection.commit()
+            return cursor.rowcount > 0
+
+    def delete_documents(self, database_name, table_name, key_field, keys):
+        """Deletes the records whose key is one of keys with a single DELETE ... WHERE key IN (...)"""
+        keys = list(keys)
+        placeholders = ", ".join(["%s"] * len(keys))
+        query = f"DELETE FROM {self._table(database_name, table_name)} WHERE {quote_identifier(key_field)} IN ({placeholders})"
+        with self._borrow_connection() as connection:
+            cursor = self._execute(connection, query, tuple(keys))
+            connection.commit()
+            return cursor.rowcount
+
+    def update_documents(self, database_name, table_name, key_field, keys, property):
+        """Updates the records whose key is one of keys with a single UPDATE ... WHERE key IN (...)"""
+        keys = list(keys)
+        set_clause = ", ".join([f"{quote_identifier(key)} = %s" for key in property.keys()])
+        placeholders = ", ".join(["%s"] * len(keys))
+        query = f"UPDATE {self._table(database_name, table_name)} SET {set_clause} WHERE {quote_identifier(key_field)} IN ({placeholders})"
+        with self._borrow_connection() as connection:
+            cursor = self._execute(connection, query, tuple(property.values()) + tuple(keys))
+            connection.commit()
+            return cursor.rowcount
+
+    def bulk_write(self, database_name, table_name, operations, ordered=True):
+        """
+        Executes the operations in a single transaction, batching consecutive inserts with the
+        same columns through executemany and running the other operations through prepared
+        statements. The transaction is rolled back
+        on the first error, so the writes are always all-or-nothing whatever the value of ordered.
+        """
+        batches = []  # (statement, [params], [operation indexes])
+        for index, operation in enumerate(operations):
+            statement, params = self._write_statement(database_name, table_name, operation)
+            if batches and batches[-1][0] == statement:
+                batches[-1][1].append(params)
+                batches[-1][2].append(index)
+            else:
+                batches.append((statement, [params], [index]))
+
+        results = [{"status": "ok", "error": None, "count": 0} for _ in operations]
+        with self._borrow_connection() as connection:
+            # Autocommit is off, so every statement runs in the same transaction until commit
+            try:
+                for statement, params, indexes in batches:
+                    try:
+                        counts = self._execute_many(connection, statement, params)
+                    except Exception as e:
+                        for index in indexes:
+                            results[index] = {"status": "error", "error": str(e), "count": 0}
+                        raise
+                    for index, count in zip(indexes, counts):
+                        results[index]["count"] = count
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                for result in results:
+                    if result["status"] == "ok":
+                        result["status"] = "rolled back"
+                        result["count"] = 0
+        return results
+
+    def _write_statement(self, database_name, table_name, operation):
+        """Returns the SQL statement and the parameters of a bulk write operation"""
+        table = self._table(database_name, table_name)
+        if operation["op"] == "insert":
+            document = expand_document(operation["document"])
+            keys = ", ".join(quote_identifier(key) for key in document.keys())
+            values = ", ".join(["%s"] * len(document))
+            return f"INSERT INTO {table} ({keys}) VALUES ({values})", tuple(document.values())
+        filter_query = expand_document(operation["filter"])
+        # Null-safe comparison, so rows with NULL columns can be matched
+        where_clause = " AND ".join([f"{quote_identifier(key)} <=> %s" for key in filter_query.keys()])
+        if operation["op"] == "update":
+            update = expand_document(operation["update"])
+            set_clause = ", ".join([f"{quote_identifier(key)} = %s" for key in update.keys()])
+            return (
+                f"UPDATE {table} SET {set_clause} WHERE {where_clause} LIMIT 1",
+                tuple(update.values()) + tuple(filter_query.values())
+            )
+        return f"DELETE FROM {table} WHERE {where_clause} LIMIT 1", tuple(filter_query.values())
+
+    def get_primary_key(self, database_name, table_name):
+        """Returns the primary key column of a table, or None if it has none or a composite one"""
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(f"SHOW KEYS FROM {self._table(database_name, table_name)} WHERE Key_name = 'PRIMARY'")
+            rows = cursor.fetchall()
+        return rows[0]["Column_name"] if len(rows) == 1 else None
 
     def get_type_converters(self):
         """Returns a dictionary with data types and associated conversion functions"""
@@ -103,42 +506,258 @@ class MySQLClient(AbstractClient):
             bool: lambda value: value.lower() in ["true", "1"],
             dict: lambda value: eval(value),
             str: lambda value: value,
+            decimal.Decimal: lambda value: decimal.Decimal(value),
+            datetime.datetime: lambda value: datetime.datetime.fromisoformat(value),
+            datetime.date: lambda value: datetime.date.fromisoformat(value),
         }
 
+    def get_column_types(self, database_name, table_name):
+        """Returns the declared type of each column of a table as lowercase text (e.g. "varchar(32)")"""
+        return {
+            column: _normalize_type(declared_type)
+            for column, declared_type in self.get_collection_schema(database_name, table_name).items()
+        }
+
+    def get_declared_types(self, database_name, table_name):
+        """Returns the Python type of each column of a table, str for the types sent as text (JSON, TIME...)"""
+        return {
+            column: column_type(declared_type) or str
+            for column, declared_type in self.get_column_types(database_name, table_name).items()
+        }
+
+    def to_storable(self, value):
+        """Returns a value in a form MySQL can store: documents and arrays as JSON, other unknown types as text"""
+        if value is None or isinstance(value, SQL_TYPES):
+            return value
+        if isinstance(value, (dict, list, tuple, set)):
+            return json.dumps(value if not isinstance(value, (tuple, set)) else list(value), default=str, ensure_ascii=False)
+        return str(value)
+
     def get_collection_schema(self, database_name, table_name, sample_size=10):
         """Returns the schema of a table"""
-        if not self.connection or not self.connection.is_connected():
-            raise Exception("Client not connected to MySQL.")
-        query = f"DESCRIBE {database_name}.{table_name}"
-        cursor = self.connection.cursor(dictionary=True)
-        cursor.execute(query)
+        query = f"DESCRIBE {self._table(database_name, table_name)}"
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query)
+            rows = cursor.fetchall()
         schema = {}
-        for row in cursor.fetchall():
+        for row in rows:
             schema[row["Field"]] = row["Type"]
         return schema
 
+    @staticmethod
+    def _range_condition(key_field, lower, upper):
+        """Returns the WHERE clause and the parameters selecting the keys in [lower, upper)"""
+        conditions, params = [], []
+        if lower is not None:
+            conditions.append(f"{quote_identifier(key_field)} >= %s")
+            params.append(lower)
+        if upper is not None:
+            conditions.append(f"{quote_identifier(key_field)} < %s")
+            params.append(upper)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), tuple(params)
+
+    def fetch_range(self, database_name, table_name, key_field, lower=None, upper=None):
+        """Returns the records whose key is in [lower, upper), sorted by key"""
+        where, params = self._range_condition(key_field, lower, upper)
+        query = f"SELECT * FROM {self._table(database_name, table_name)}{where} ORDER BY {quote_identifier(key_field)}"
+        with self._borrow_connection() as connection:
+            return self._fetch_dicts(self._execute(connection, query, params))
+
+    def stream_range(self, database_name, table_name, key_field, lower=None, upper=None, batch_size=1000):
+        """
+        Yields the records whose key is in [lower, upper) from an unbuffered cursor, fetching
+        batch_size rows at a time. The pooled connection is held until the generator is closed.
+        """
+        where, params = self._range_condition(key_field, lower, upper)
+        query = f"SELECT * FROM {self._table(database_name, table_name)}{where} ORDER BY {quote_identifier(key_field)}"
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor(buffered=False)
+            try:
+                cursor.execute(query, params)
+                columns = cursor.column_names
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(zip(columns, row))
+            finally:
+                if connection.unread_result:
+                    connection.consume_results()  # The reader stopped early, the connection goes back to the pool
+                cursor.close()
+
+    def chunk_digest(self, database_name, table_name, key_field, lower=None, upper=None, server_side=True, ignore_fields=None):
+        """
+        Returns the digest of the records whose key is in [lower, upper). The server sums the
+        first 64 bits of the MD5 of every row (its columns in name order, with NULL markers,
+        without ignore_fields), so only the count and the sum are transferred. Server digests
+        can only be compared with those of a table with the same columns.
+        """
+        if not server_side:
+            return super().chunk_digest(database_name, table_name, key_field, lower, upper, ignore_fields=ignore_fields)
+        columns = sorted(column for column in self.get_collection_schema(database_name, table_name) if column not in (ignore_fields or ()))
+        values = ", ".join(quote_identifier(column) for column in columns)
+        nulls = ", ".join(f"ISNULL({quote_identifier(column)})" for column in columns)
+        row_hash = f"CAST(CONV(SUBSTRING(MD5(CONCAT_WS('#', {values}, CONCAT({nulls}))), 1, 16), 16, 10) AS UNSIGNED)"
+        where, params = self._range_condition(key_field, lower, upper)
+        query = f"SELECT COUNT(*), COALESCE(SUM({row_hash}), 0) FROM {self._table(database_name, table_name)}{where}"
+        with self._borrow_connection() as connection:
+            count, total = self._execute(connection, query, params).fetchone()
+        return {"kind": "mysql-md5:" + ",".join(columns), "count": count, "digest": int(total) % 2 ** 64}
+
+    def get_collection_stats(self, database_name):
+        """
+        Returns the size statistics of every table of a database, from information_schema.TABLES
+        and STATISTICS. Row counts are InnoDB estimates, and MySQL 8 caches these values
+        (information_schema_stats_expiry), so they may lag behind recent writes.
+        """
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT TABLE_NAME, TABLE_ROWS, AVG_ROW_LENGTH, DATA_LENGTH, INDEX_LENGTH, DATA_FREE "
+                "FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'",
+                (database_name,)
+            )
+            tables = cursor.fetchall()
+            cursor.execute(
+                "SELECT TABLE_NAME, COUNT(DISTINCT INDEX_NAME) FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = %s GROUP BY TABLE_NAME",
+                (database_name,)
+            )
+            indexes = dict(cursor.fetchall())
+            cursor.close()
+        stats = []
+        for name, rows, avg_size, data_size, index_size, free_size in tables:
+            data_size, free_size = data_size or 0, free_size or 0
+            stats.append({
+                "collection": name, "count": rows or 0, "estimated": True, "avg_size": avg_size or 0, "data_size": data_size,
+                "storage_size": data_size + free_size, "free_size": free_size, "index_size": index_size or 0,
+                "indexes": indexes.get(name, 0), "error": None,
+            })
+        return stats
+
+    def sample_documents(self, database_name, table_name, sample_size=100, batch_size=50):
+        """
+        Yields a random sample of records, scanning the table with a sampling rate based on its
+        estimated size. The whole table is scanned, oversampling a little, and sample_size of
+        the rows read are kept at random, so the last rows of the table are sampled too.
+        """
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+                (database_name, table_name)
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            estimated_rows = (row[0] if row else 0) or 0
+
+            query = f"SELECT * FROM {self._table(database_name, table_name)}"
+            if estimated_rows > sample_size:
+                # Oversample a little as the estimate is not exact; no LIMIT, which would stop the scan early
+                query += " WHERE RAND() < %s"
+                params = (min(1.0, 1.5 * sample_size / estimated_rows),)
+            else:
+                query += " LIMIT %s"
+                params = (sample_size,)
+
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, params)
+            try:
+                sample = []
+                seen = 0
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        # Reservoir sampling: every row read has the same chance to be kept
+                        seen += 1
+                        if len(sample) < sample_size:
+                            sample.append(row)
+                        else:
+                            index = random.randrange(seen)
+                            if index < sample_size:
+                                sample[index] = row
+            finally:
+                cursor.fetchall()  # Drain unread rows so the pooled connection stays usable
+                cursor.close()
+        yield from sample
+
     def execute_raw_query(self, query):
         """Executes a raw SQL query and returns the results."""
-        if not self.connection or not self.connection.is_connected():
-            raise Exception("Client not connected to MySQL.")
-
         try:
-            # Create a cursor with dictionary=True to return rows as dictionaries
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query)
+            with self._borrow_connection() as connection:
+                # Create a cursor with dictionary=True to return rows as dictionaries
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(query)
 
-            # Fetch all rows
-            results = cursor.fetchall()
+                # Fetch all rows
+                results = cursor.fetchall()
 
-            # Close the cursor
-            cursor.close()
-            self.connection.commit()
+                # Close the cursor
+                cursor.close()
+                connection.commit()
 
             return results
         except Exception as e:
             # Raise a more descriptive error
             raise Exception(f"Error executing raw query: {e}")
 
+    def stream_raw_query(self, query, batch_size=1000):
+        """
+        Yields the results of a raw SQL query from an unbuffered cursor, fetching batch_size rows
+        at a time. The pooled connection is held until the generator is closed.
+        """
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            try:
+                try:
+                    cursor.execute(query)
+                except Exception as e:
+                    raise Exception(f"Error executing raw query: {e}")
+                while cursor.with_rows:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+                connection.commit()
+            finally:
+                if connection.unread_result:
+                    connection.consume_results()  # The reader stopped early, the connection goes back to the pool
+                cursor.close()
+
+    def execute_script(self, statements, transaction=False):
+        """
+        Executes statements on one connection, committing each one, or all of them at the
+        end in a transaction. Statements that cause an implicit commit in MySQL (such as
+        CREATE or ALTER) cannot be rolled back.
+        """
+        with self._borrow_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            committed = False
+            try:
+                for statement in statements:
+                    started_at = time.perf_counter()
+                    try:
+                        cursor.execute(statement)
+                        rows = cursor.fetchall() if cursor.with_rows else None
+                        affected = cursor.rowcount if rows is None else None
+                        if not transaction:
+                            connection.commit()
+                    except Exception as e:
+                        error = f"{e} (the script was rolled back)" if transaction else str(e)
+                        yield {"statement": statement, "rows": None, "affected": None, "elapsed": time.perf_counter() - started_at, "error": error}
+                        return
+                    yield {"statement": statement, "rows": rows, "affected": affected, "elapsed": time.perf_counter() - started_at, "error": None}
+                connection.commit()
+                committed = True
+            finally:
+                if transaction and not committed:
+                    connection.rollback()  # Failed or stopped before the end
+                cursor.close()
+
     def get_syntax_highlighter(self):
         """Returns a syntax highlighter for the query editor"""
         return syntax_highlight(
@@ -1,3 +1,4 @@
+import threading
 from business.config import Config
 
 
@@ -8,7 +9,8 @@ class Repository:
         and the selected database name.
         """
         self.client = client
-        self.database_name = database_name
+        self._default_database_name = database_name
+        self._local = threading.local()
 
     def connect(self):
         """Connects to the client"""
@@ -18,17 +20,26 @@ class Repository:
             Config.get_instance().set_last_connection(self.client.uri)
         return True
 
+    def close(self):
+        """Closes the client connection"""
+        self.client.close()
+
+    @property
+    def database_name(self):
+        """The selected database name, kept per thread so background workers can share the repository"""
+        return getattr(self._local, "database_name", self._default_database_name)
+
     def set_database_name(self, database_name):
         """Sets the database name"""
-        self.database_name = database_name
+        self._local.database_name = database_name
 
     def list_database_names(self):
         """Lists the names of the databases through the client"""
         return self.client.list_database_names()
 
-    def fetch_documents(self, collection_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0):
+    def fetch_documents(self, collection_name, order_by=None, sort_order=1, filter_query=None, limit=10, skip=0, lazy=False):
         """Fetches documents in a collection through the client"""
-        return self.client.fetch_documents(self.database_name, collection_name, order_by, sort_order, filter_query, limit, skip)
+        return self.client.fetch_documents(self.database_name, collection_name, order_by, sort_order, filter_query, limit, skip, lazy)
 
     def insert_document(self, collection_name, document):
         """Inserts a document into a collection through the client"""
@@ -46,6 +57,58 @@ class Repository:
         """Updates a document in a collection through the client"""
         return self.client.update_document(self.database_name, collection_name, filter_query, update_query)
 
+    def insert_documents(self, collection_name, documents, skip_duplicates=False):
+        """Inserts documents into a collection in one call through the client"""
+        return self.client.insert_documents(self.database_name, collection_name, documents, skip_duplicates)
+
+    def get_key_boundaries(self, collection_name, key_field, chunk_count):
+        """Returns the keys splitting a collection into chunk_count key ranges through the client"""
+        return self.client.get_key_boundaries(self.database_name, collection_name, key_field, chunk_count)
+
+    def fetch_range(self, collection_name, key_field, lower=None, upper=None):
+        """Returns the documents of a key range through the client"""
+        return self.client.fetch_range(self.database_name, collection_name, key_field, lower, upper)
+
+    def stream_range(self, collection_name, key_field, lower=None, upper=None, batch_size=1000):
+        """Returns an iterator over the documents of a key range through the client"""
+        return self.client.stream_range(self.database_name, collection_name, key_field, lower, upper, batch_size)
+
+    def chunk_digest(self, collection_name, key_field, lower=None, upper=None, server_side=True, ignore_fields=None):
+        """Returns the digest of the documents of a key range through the client"""
+        return self.client.chunk_digest(self.database_name, collection_name, key_field, lower, upper, server_side, ignore_fields)
+
+    def get_collection_stats(self):
+        """Returns the size statistics of the collections of the database through the client"""
+        return self.client.get_collection_stats(self.database_name)
+
+    def delete_documents(self, collection_name, key_field, keys):
+        """Deletes the documents with the given keys through the client"""
+        return self.client.delete_documents(self.database_name, collection_name, key_field, keys)
+
+    def update_documents(self, collection_name, key_field, keys, update_query):
+        """Updates the documents with the given keys through the client"""
+        return self.client.update_documents(self.database_name, collection_name, key_field, keys, update_query)
+
+    def bulk_write(self, collection_name, operations, ordered=True):
+        """Executes several write operations at once through the client"""
+        return self.client.bulk_write(self.database_name, collection_name, operations, ordered)
+
+    def get_primary_key(self, collection_name):
+        """Returns the primary key field of a collection through the client"""
+        return self.client.get_primary_key(self.database_name, collection_name)
+
+    def get_column_types(self, collection_name):
+        """Returns the declared types of the fields through the client"""
+        return self.client.get_column_types(self.database_name, collection_name)
+
+    def get_declared_types(self, collection_name):
+        """Returns the types of the fields declared by the database through the client"""
+        return self.client.get_declared_types(self.database_name, collection_name)
+
+    def to_storable(self, value):
+        """Returns a value in a form the database can store through the client"""
+        return self.client.to_storable(value)
+
     def get_type_converters(self):
         """Returns the client's type converters"""
         return self.client.get_type_converters()
@@ -54,6 +117,30 @@ class Repository:
         """Returns the schema of a collection"""
         return self.client.get_collection_schema(self.database_name, collection_name, sample_size)
 
+    def sample_documents(self, collection_name, sample_size=100, batch_size=50):
+        """Yields a random sample of documents of a collection"""
+        return self.client.sample_documents(self.database_name, collection_name, sample_size, batch_size)
+
+    def watch_collection(self, collection_name, filter_query=None, document_keys=None, stop_event=None, resume_token=None):
+        """Yields the changes made to a collection through the client"""
+        return self.client.watch_collection(self.database_name, collection_name, filter_query, document_keys, stop_event, resume_token)
+
+    def compile_local_filter(self, filter_query):
+        """Returns the client's local evaluator for a filter, or None"""
+        return self.client.compile_local_filter(filter_query)
+
+    def stream_raw_query(self, query):
+        """Yields the results of a raw query through the client"""
+        return self.client.stream_raw_query(query)
+
+    def split_script(self, script):
+        """Splits a script into statements through the client"""
+        return self.client.split_script(script)
+
+    def execute_script(self, statements, transaction=False):
+        """Executes statements one after the other through the client"""
+        return self.client.execute_script(statements, transaction)
+
     def execute_raw_query(self, query):
         """Executes a raw query through the client"""
         return self.client.execute_raw_query(query)
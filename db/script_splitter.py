@@ -0,0 +1,88 @@
+QUOTES = ("'", '"', "`")
+OPENING_BRACKETS = "([{"
+CLOSING_BRACKETS = ")]}"
+
+
+def split_statements(script, line_comments=("--", "#"), block_comments=(("/*", "*/"),), separate_on_newline=False, keep_comments=True):
+    """
+    Splits a script into statements on the semicolons that are not inside a string,
+    a quoted identifier or a comment. With separate_on_newline, a line break outside
+    of any bracket also ends a statement (for shell-like languages such as the MongoDB
+    one). Statements made only of comments are dropped, and the comments of the other
+    statements are removed unless keep_comments is set.
+    """
+    statements = []
+    current = []  # Characters of the current statement
+    has_code = False  # Whether the current statement has something other than comments and blanks
+    depth = 0
+    index = 0
+    length = len(script)
+
+    def finish():
+        text = "".join(current).strip()
+        if has_code and text:
+            statements.append(text)
+        current.clear()
+
+    while index < length:
+        char = script[index]
+
+        if char in QUOTES:
+            end = _string_end(script, index)
+            current.append(script[index:end])
+            has_code = True
+            index = end
+            continue
+
+        line_comment = next((marker for marker in line_comments if script.startswith(marker, index)), None)
+        if line_comment:
+            end = script.find("\n", index)
+            end = length if end == -1 else end
+            if keep_comments:
+                current.append(script[index:end])
+            index = end
+            continue
+
+        block_comment = next((pair for pair in block_comments if script.startswith(pair[0], index)), None)
+        if block_comment:
+            end = script.find(block_comment[1], index + len(block_comment[0]))
+            end = length if end == -1 else end + len(block_comment[1])
+            current.append(script[index:end] if keep_comments else " ")
+            index = end
+            continue
+
+        if char == ";" or (separate_on_newline and char == "\n" and depth == 0):
+            finish()
+            has_code = False
+            index += 1
+            continue
+
+        if char in OPENING_BRACKETS:
+            depth += 1
+        elif char in CLOSING_BRACKETS:
+            depth = max(depth - 1, 0)
+        if not char.isspace():
+            has_code = True
+        current.append(char)
+        index += 1
+
+    finish()
+    return statements
+
+
+def _string_end(script, start):
+    """Returns the index after the closing quote of the string starting at start"""
+    quote = script[start]
+    index = start + 1
+    while index < len(script):
+        char = script[index]
+        if char == "\\" and quote != "`":
+            index += 2  # Escaped character
+            continue
+        if char == quote:
+            if script.startswith(quote * 2, index):
+                index += 2  # Doubled quote inside the string
+                continue
+            return index + 1
+        index += 1
+    return len(script)  # Unterminated string, it runs to the end of the script
@@ -1,12 +1,10 @@
 import tkinter as tk
 from tkinter import messagebox
 from business.config import Config
-from db.mock_client import MockClient
-from db.mongodb_client import MongoDBClient
-from db.mySql_client import MySQLClient
-from db.repository import Repository
+from business.connection_manager import ConnectionManager, MOCK_CONNECTION
+from business.metadata_cache import MetadataCache
+from business.query_history import QueryHistory
 from ui.connection_window import ConnectionWindow
-from business.business_manager import BusinessManager
 from ui.main_window import MainWindow
 
 
@@ -24,29 +22,26 @@ def main():
     if not connection_string and not is_mock:
         raise Exception("No connection string provided")
 
+    metadata_cache = MetadataCache()
+    query_history = QueryHistory()
+    connections = ConnectionManager(metadata_cache=metadata_cache, query_history=query_history)
     try:
-        # Create the database client
+        # Open the first connection, more can be added from the main window
         if is_mock:
-            client = MockClient("")
-        else:
-            if connection_string.startswith("mongodb"):
-                client = MongoDBClient(connection_string)
-            elif connection_string.startswith("mysql"):
-                client = MySQLClient(connection_string)
-            else:
-                raise Exception("Invalid connection string")
-
-        repository = Repository(client, None)
-        manager = BusinessManager(repository)
-        manager.connect()
+            connection_string = MOCK_CONNECTION
+        connections.open(connection_string)
 
         # Start the main interface
         main_root = tk.Tk()
-        MainWindow(main_root, manager)  # Pass the manager to the main UI
+        MainWindow(main_root, connections, connection_string)  # Pass the connections to the main UI
         main_root.mainloop()
     except Exception as e:
         print(f"Error: {e}")
         messagebox.showerror("Error", f"An error occurred: {e}")
+    finally:
+        connections.close_all()
+        metadata_cache.close()
+        query_history.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+POLL_INTERVAL_MS = 100
+
+# Column -> (heading, key of the statistics row)
+COLUMNS = {
+    "collection": ("collection", "collection"),
+    "count": ("documents", "count"),
+    "avg_size": ("avg size", "avg_size"),
+    "data_size": ("data", "data_size"),
+    "storage_size": ("storage", "storage_size"),
+    "index_size": ("indexes", "index_size"),
+    "indexes": ("# indexes", "indexes"),
+    "fragmentation": ("free", "fragmentation"),
+}
+
+
+def format_size(size):
+    """Return a size in bytes as a short human-readable text"""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(size) < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_stat(row, key):
+    """Return the text of a value of a statistics row"""
+    value = row.get(key)
+    if key == "collection":
+        return value
+    if row.get("error"):
+        return "" if key != "count" else "error"
+    if key == "count":
+        return f"~{value}" if row.get("estimated") else str(value)
+    if key == "indexes":
+        return str(value)
+    if key == "fragmentation":
+        return f"{value:.0%}"
+    return format_size(value)
+
+
+class CollectionStatsWindow:
+    def __init__(self, parent, manager, database_name, on_open=None):
+        """
+        Initialize the window listing the size statistics of every collection of a database.
+        Args:
+            on_open: Called with the collection name when a row is double-clicked.
+        """
+        self.manager = manager
+        self.database_name = database_name
+        self.on_open = on_open
+        self.stats = []
+        self.sort_key = "storage_size"
+        self.sort_descending = True
+        self.results = queue.Queue()
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Collection statistics: {database_name}")
+        self.window.geometry("800x400")
+
+        self.setup_ui()
+        cached = manager.get_cached_collection_stats(database_name)
+        if cached is not None:
+            self.show_stats(*cached)
+        if cached is None or not manager.collection_stats.is_fresh(cached[1]):
+            self.load_stats(refresh=True)
+
+    def setup_ui(self):
+        """Set up the UI components of the window."""
+        bottom_frame = tk.Frame(self.window)
+        bottom_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_label = tk.Label(bottom_frame, text="", anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.refresh_button = tk.Button(bottom_frame, text="Refresh", command=lambda: self.load_stats(refresh=True))
+        self.refresh_button.pack(side=tk.RIGHT, padx=5, pady=2)
+
+        self.stats_table = ttk.Treeview(self.window, columns=list(COLUMNS), show="headings")
+        for column, (heading, key) in COLUMNS.items():
+            self.stats_table.heading(column, text=heading, command=lambda key=key: self.sort_by(key))
+            self.stats_table.column(column, anchor="w" if column == "collection" else "e", width=90, stretch=True)
+        self.stats_table.column("collection", width=180)
+        self.stats_table.pack(fill=tk.BOTH, expand=True)
+        self.stats_table.bind("<Double-1>", self.open_collection)
+
+    def load_stats(self, refresh=False):
+        """Fetch the statistics in the background."""
+        self.refresh_button.config(state=tk.DISABLED)
+        self.status_label.config(text="Loading statistics...")
+
+        def fetch():
+            try:
+                self.results.put(self.manager.get_collection_stats(self.database_name, refresh))
+            except Exception as e:
+                self.results.put(e)
+
+        threading.Thread(target=fetch, daemon=True).start()
+        self.window.after(POLL_INTERVAL_MS, self.poll_stats)
+
+    def poll_stats(self):
+        """Show the statistics once they are fetched."""
+        if not self.window.winfo_exists():
+            return
+        try:
+            result = self.results.get_nowait()
+        except queue.Empty:
+            self.window.after(POLL_INTERVAL_MS, self.poll_stats)
+            return
+        self.refresh_button.config(state=tk.NORMAL)
+        if isinstance(result, Exception):
+            self.status_label.config(text=f"Error loading statistics: {result}")
+            return
+        self.show_stats(*result)
+
+    def show_stats(self, stats, fetched_at):
+        """Fill the table with statistics fetched at fetched_at."""
+        self.stats = stats
+        self.show_rows()
+        age = int(time.time() - fetched_at)
+        total = sum(row["storage_size"] + row["index_size"] for row in stats if not row.get("error"))
+        self.status_label.config(text=f"{len(stats)} collections, {format_size(total)} with indexes, fetched {age} s ago")
+
+    def show_rows(self):
+        """Show the rows in the current sort order."""
+        self.stats_table.delete(*self.stats_table.get_children())
+        rows = sorted(
+            self.stats,
+            key=lambda row: (row.get(self.sort_key) is None, row.get(self.sort_key) or 0) if self.sort_key != "collection" else row["collection"],
+            reverse=self.sort_descending
+        )
+        for row in rows:
+            self.stats_table.insert("", "end", values=[format_stat(row, key) for _, key in COLUMNS.values()])
+
+    def sort_by(self, key):
+        """Sort the rows by a column, clicking the same column again reverses the order."""
+        if key == self.sort_key:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_key = key
+            self.sort_descending = key != "collection"
+        self.show_rows()
+
+    def open_collection(self, event):
+        """Open the double-clicked collection in the main window."""
+        item = self.stats_table.identify_row(event.y)
+        if item and self.on_open:
+            self.on_open(self.stats_table.item(item, "values")[0])
@@ -0,0 +1,142 @@
+import queue
+import tkinter as tk
+from tkinter import ttk, messagebox
+from business.collection_diff import CollectionDiff
+from business.connection_manager import MOCK_CONNECTION
+
+POLL_INTERVAL_MS = 100
+MAX_SHOWN_DIFFERENCES = 10000  # Differences listed in the table, the others are only counted
+
+
+class CompareWindow:
+    def __init__(self, parent, connections, connection_string, database_name, collection_name):
+        """
+        Initialize the window comparing a collection with another one.
+        Args:
+            connections (ConnectionManager): The open connections, the other collection can be on any of them.
+            connection_string (str): Connection of the collection used as the reference.
+        """
+        self.connections = connections
+        self.connection_string = connection_string
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self.diff = None
+        self.shown = 0
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Compare: {database_name} > {collection_name}")
+        self.window.geometry("900x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Set up the UI components of the window."""
+        form = tk.Frame(self.window, bd=1, relief=tk.RAISED)
+        form.pack(side=tk.TOP, fill=tk.X)
+        tk.Label(form, text="with connection:").grid(row=0, column=0, sticky="e", padx=2)
+        self.target_connection = ttk.Combobox(form, values=self.connections.open_connections(), width=40)
+        self.target_connection.set(self.connection_string)
+        self.target_connection.grid(row=0, column=1, columnspan=3, sticky="we", padx=2, pady=2)
+        tk.Label(form, text="database:").grid(row=1, column=0, sticky="e", padx=2)
+        self.target_database = tk.Entry(form)
+        self.target_database.insert(0, self.database_name)
+        self.target_database.grid(row=1, column=1, sticky="we", padx=2)
+        tk.Label(form, text="collection:").grid(row=1, column=2, sticky="e", padx=2)
+        self.target_collection = tk.Entry(form)
+        self.target_collection.insert(0, self.collection_name)
+        self.target_collection.grid(row=1, column=3, sticky="we", padx=2)
+        tk.Label(form, text="key field:").grid(row=2, column=0, sticky="e", padx=2)
+        self.key_field = tk.Entry(form)
+        self.key_field.grid(row=2, column=1, sticky="we", padx=2)
+        tk.Label(form, text="ignore fields:").grid(row=2, column=2, sticky="e", padx=2)
+        self.ignore_fields = tk.Entry(form)
+        self.ignore_fields.grid(row=2, column=3, sticky="we", padx=2, pady=2)
+        self.compare_button = tk.Button(form, text="Compare", command=self.start_compare)
+        self.compare_button.grid(row=0, column=4, padx=2)
+        self.cancel_button = tk.Button(form, text="Cancel", command=self.cancel_compare, state=tk.DISABLED)
+        self.cancel_button.grid(row=1, column=4, padx=2)
+        form.grid_columnconfigure(1, weight=1)
+        form.grid_columnconfigure(3, weight=1)
+
+        self.status_label = tk.Label(self.window, text="Empty key field: the primary key. Ignore fields: comma-separated.", anchor="w")
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+
+        columns = ("status", "key", "source", "target")
+        self.result_table = ttk.Treeview(self.window, columns=columns, show="headings")
+        for col in columns:
+            self.result_table.heading(col, text=col)
+            self.result_table.column(col, anchor="w", stretch=True)
+        self.result_table.column("status", width=80, stretch=False)
+        self.result_table.column("key", width=120, stretch=False)
+        self.result_table.pack(fill=tk.BOTH, expand=True)
+
+    def start_compare(self):
+        """Start comparing the collections in the background."""
+        target_connection = self.target_connection.get().strip()
+        target_database = self.target_database.get().strip()
+        target_collection = self.target_collection.get().strip()
+        if not target_connection or not target_database or not target_collection:
+            messagebox.showerror("Error", "Choose the connection, database and collection to compare with.", parent=self.window)
+            return
+        try:
+            source = self.connections.open(self.connection_string)
+            target = self.connections.open(MOCK_CONNECTION if target_connection == "mock" else target_connection)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error connecting: {e}", parent=self.window)
+            return
+
+        ignore_fields = [field.strip() for field in self.ignore_fields.get().split(",") if field.strip()]
+        self.result_table.delete(*self.result_table.get_children())
+        self.shown = 0
+        self.diff = CollectionDiff(
+            source, self.database_name, self.collection_name, target, target_database, target_collection,
+            key_field=self.key_field.get().strip() or None, ignore_fields=ignore_fields
+        )
+        self.diff.start()
+        self.compare_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.status_label.config(text="Comparing...")
+        self.window.after(POLL_INTERVAL_MS, self.poll_results)
+
+    def cancel_compare(self):
+        """Cancel the running comparison."""
+        if self.diff:
+            self.diff.cancel()
+
+    def poll_results(self):
+        """Move the differences found by the workers into the table."""
+        if not self.window.winfo_exists():
+            return
+        diff = self.diff
+        while True:
+            try:
+                difference = diff.results.get_nowait()
+            except queue.Empty:
+                break
+            if self.shown < MAX_SHOWN_DIFFERENCES:
+                self.result_table.insert("", "end", values=(
+                    difference["status"], str(difference["key"]), str(difference["source"] or ""), str(difference["target"] or "")
+                ))
+                self.shown += 1
+
+        status = (
+            f"{diff.chunks_done} of {diff.chunks_total} chunks compared, {diff.chunks_mismatched} read in full, "
+            f"{diff.documents_compared} documents, {diff.differences} differences"
+        )
+        if not diff.finished:
+            self.status_label.config(text=status)
+            self.window.after(POLL_INTERVAL_MS, self.poll_results)
+            return
+        self.compare_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        if diff.error:
+            self.status_label.config(text=f"Error: {diff.error}")
+        elif diff.differences > self.shown:
+            self.status_label.config(text=f"{status} (first {self.shown} shown)")
+        else:
+            self.status_label.config(text=status if diff.differences else f"{status}: the collections match")
+
+    def close(self):
+        """Cancel the comparison and close the window."""
+        self.cancel_compare()
+        self.window.destroy()
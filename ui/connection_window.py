@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from business.config import Config
+from ui.tuning_window import TuningWindow
 
 
 class ConnectionWindow:
@@ -46,6 +47,9 @@ class ConnectionWindow:
         mock_button = tk.Button(button_frame, text="Use Mock_data", command=self.mock)
         mock_button.pack(side=tk.LEFT, padx=5)
 
+        tuning_button = tk.Button(button_frame, text="Tuning...", command=self.open_tuning_window)
+        tuning_button.pack(side=tk.LEFT, padx=5)
+
     def on_connection_selected(self, event):
         """Populate the entry field when a saved connection is selected."""
         selected_connection = self.connection_options.get()
@@ -63,6 +67,17 @@ class ConnectionWindow:
             # Close the window after validation
             self.root.destroy()
 
+    def open_tuning_window(self):
+        """Edit the performance options of the connection string in the entry field."""
+        connection_string = self.connection_entry.get().strip()
+        if not connection_string:
+            messagebox.showerror("Error", "Connection string not provided")
+            return
+        try:
+            TuningWindow(self.root, connection_string)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error opening the tuning options: {e}")
+
     def cancel(self):
         """Close the window without saving the connection."""
         self.root.destroy()
@@ -0,0 +1,118 @@
+import queue
+import tkinter as tk
+from tkinter import ttk, messagebox
+from business.database_search import DatabaseSearch
+
+POLL_INTERVAL_MS = 100
+
+
+class DatabaseSearchWindow:
+    def __init__(self, parent, manager, database_name, on_open=None):
+        """
+        Initialize the Database Search Window.
+        Args:
+            on_open: Called with (collection_name, query) when a result is double-clicked.
+        """
+        self.manager = manager
+        self.database_name = database_name
+        self.on_open = on_open
+        self.search = None
+        self.matches = 0
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Search database: {database_name}")
+        self.window.geometry("600x400")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Set up the UI components of the window."""
+        input_frame = tk.Frame(self.window, bd=1, relief=tk.RAISED)
+        input_frame.pack(side=tk.TOP, fill=tk.X)
+
+        tk.Label(input_frame, text="filter:").pack(side=tk.LEFT, padx=2)
+        self.query_field = tk.Entry(input_frame)
+        self.query_field.pack(side=tk.LEFT, padx=2, expand=True, fill=tk.X)
+        tk.Label(input_frame, text="only with field:").pack(side=tk.LEFT, padx=2)
+        self.field_field = tk.Entry(input_frame, width=10)
+        self.field_field.pack(side=tk.LEFT, padx=2)
+        self.search_button = tk.Button(input_frame, text="Search", command=self.start_search)
+        self.search_button.pack(side=tk.LEFT, padx=2)
+        self.cancel_button = tk.Button(input_frame, text="Cancel", command=self.cancel_search, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=2)
+
+        self.status_label = tk.Label(self.window, text="", anchor="w")
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+
+        columns = ("collection", "status", "hits", "time")
+        self.result_table = ttk.Treeview(self.window, columns=columns, show="headings")
+        for col in columns:
+            self.result_table.heading(col, text=col)
+            self.result_table.column(col, anchor="w", stretch=True)
+        self.result_table.pack(fill=tk.BOTH, expand=True)
+        self.result_table.bind("<Double-1>", self.open_result)
+
+    def start_search(self):
+        """Start searching every collection of the database."""
+        query = self.query_field.get().strip()
+        if not query:
+            messagebox.showerror("Error", "Filter cannot be empty.")
+            return
+
+        self.result_table.delete(*self.result_table.get_children())
+        self.matches = 0
+        self.search = DatabaseSearch(self.manager, self.database_name, query, field=self.field_field.get().strip() or None)
+        self.search.start()
+        self.search_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.status_label.config(text="Searching...")
+        self.window.after(POLL_INTERVAL_MS, self.poll_results)
+
+    def cancel_search(self):
+        """Cancel the running search."""
+        if self.search:
+            self.search.cancel()
+
+    def poll_results(self):
+        """Move the results completed by the workers into the table."""
+        if not self.window.winfo_exists():
+            return
+        search = self.search
+        while True:
+            try:
+                result = search.results.get_nowait()
+            except queue.Empty:
+                break
+            if result["collection"] is None:
+                messagebox.showerror("Error", f"Error searching database: {result['error']}")
+                continue
+            if result["status"] == "skipped":
+                continue
+            elapsed = f"{result['elapsed']:.2f}s" if result["elapsed"] is not None else ""
+            status = result["error"] or result["status"]
+            # Matches are shown first
+            index = "end"
+            if result["status"] == "match":
+                index = 0
+                self.matches += 1
+            self.result_table.insert("", index, values=(result["collection"], status, len(result["documents"]), elapsed))
+
+        if search.finished and search.results.empty():
+            self.search_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_label.config(text=f"Done: {self.matches} matching collections")
+        else:
+            self.window.after(POLL_INTERVAL_MS, self.poll_results)
+
+    def open_result(self, event):
+        """Open the double-clicked collection in the main window with the same filter."""
+        row_id = self.result_table.identify_row(event.y)
+        if not row_id or not self.on_open:
+            return
+        collection_name = self.result_table.item(row_id, "values")[0]
+        self.on_open(collection_name, self.search.query)
+
+    def close(self):
+        """Cancel the search and close the window."""
+        self.cancel_search()
+        self.window.destroy()
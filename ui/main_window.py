@@ -1,24 +1,56 @@
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from ui.add_row_panel import AddRowPanel
+from ui.collection_stats_window import CollectionStatsWindow, format_size, format_stat
+from ui.compare_window import CompareWindow
 from ui.confirmation_window import ConfirmationWindow
+from ui.connection_window import ConnectionWindow
+from ui.database_search_window import DatabaseSearchWindow
+from ui.pending_changes_window import PendingChangesWindow
+from ui.progress_window import ProgressWindow
 from ui.raw_query_window import RawQueryWindow
+from business.connection_manager import MOCK_CONNECTION
+from business.live_view import LiveView
+from business.pending_changes import PendingChanges
+from business.bulk_operation import BulkOperation
+from business.data_generator import DataGenerator, spec_for_collection
+from business.data_seeder import DataSeeder
+from business.result_page import ResultPage
+
+IDLE_CHECK_INTERVAL_MS = 60000
+LIVE_POLL_INTERVAL_MS = 250
+TREE_POLL_INTERVAL_MS = 100
 
 
 class MainWindow:
-    def __init__(self, root, manager):
+    def __init__(self, root, connections, connection_string):
         self.root = root
-        self.manager = manager
+        self.connections = connections
+        self.connection_nodes = {}  # Tree node -> connection string
+        self.selected_connection = connection_string
+        self.manager = connections.open(connection_string)
         self.current_path = "root"  # Initial path in the toolbar
         self.selected_db = None
         self.selected_collection = None
         self.selected_document = None
-        self.documents = []
+        self.documents = ResultPage()
         self.data_types = {}
         self.query_field = None
         self.take_field = None
         self.skip_field = None
         self.sort_order = -1
+        self.complete_result = None  # Every document matching complete_query, when a single page held them all
+        self.complete_query = None
+        self.current_query = None
+        self.current_order_by = None
+        self.current_take = 100
+        self.live_view = None
+        self.live_predicate = None
+        self.pending_changes = {}  # (connection, database, collection) -> PendingChanges
+        self.stats_node = None  # (connection, database, collection) shown in the statistics pane
+        self.stats_loading = set()  # (connection, database) whose statistics are being fetched
 
         self.setup_ui()
 
@@ -36,8 +68,17 @@ class MainWindow:
         add_button.pack(side=tk.RIGHT, padx=10, pady=5)
         delete_button = tk.Button(self.toolbar, text="Delete Row", command=self.delete_row)
         delete_button.pack(side=tk.RIGHT, padx=10, pady=5)
+        self.pending_button = tk.Button(self.toolbar, text="Pending Changes", command=self.open_pending_changes_window)
+        self.pending_button.pack(side=tk.RIGHT, padx=10, pady=5)
+        self.stage_var = tk.BooleanVar(value=False)
+        stage_check = tk.Checkbutton(self.toolbar, text="Stage changes", variable=self.stage_var)
+        stage_check.pack(side=tk.RIGHT, padx=10, pady=5)
         raw_query_button = tk.Button(self.toolbar, text="Raw Query", command=self.open_raw_query_window)
         raw_query_button.pack(side=tk.RIGHT, padx=10, pady=5)
+        disconnect_button = tk.Button(self.toolbar, text="Disconnect", command=self.disconnect)
+        disconnect_button.pack(side=tk.RIGHT, padx=10, pady=5)
+        new_connection_button = tk.Button(self.toolbar, text="New Connection", command=self.new_connection)
+        new_connection_button.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Utility Section (Below Toolbar)
         self.utility_section = tk.Frame(self.root, bd=1, relief=tk.RAISED)
@@ -47,6 +88,10 @@ class MainWindow:
         self.left_utility = tk.Frame(self.utility_section, width=200)
         self.left_utility.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
+        # Live updates of the open collection
+        self.live_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.left_utility, text="Live updates", variable=self.live_var, command=self.toggle_live_view).pack(side=tk.LEFT, padx=2)
+
         # Right Utility Section
         self.right_utility = tk.Frame(self.utility_section)
         self.right_utility.pack(side=tk.RIGHT, fill=tk.X, expand=True)
@@ -54,7 +99,7 @@ class MainWindow:
         tk.Button(
             self.right_utility,
             text=">>",
-            command=lambda: self.search(
+            command=lambda: self.apply_view(
                 query=self.query_field.get(),
                 skip=self.skip_field.get(),
                 take=self.take_field.get()
@@ -75,8 +120,17 @@ class MainWindow:
         # Sidebar (Left)
         self.sidebar = tk.Frame(self.root, width=200, bd=1, relief=tk.SUNKEN)
         self.tree = ttk.Treeview(self.sidebar)
-        self.tree.heading("#0", text="Data Bases", anchor=tk.W)
+        self.tree.heading("#0", text="Connections", anchor=tk.W)
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)  # Event on selecting in the tree
+        self.tree.bind("<Button-3>", self.on_tree_right_click)
+        self.database_menu = tk.Menu(self.root, tearoff=0)
+        self.database_menu.add_command(label="Search database", command=self.open_database_search_window)
+        self.database_menu.add_command(label="Collection statistics", command=self.open_collection_stats_window)
+        self.collection_menu = tk.Menu(self.root, tearoff=0)
+        self.collection_menu.add_command(label="Generate documents...", command=self.generate_documents)
+        self.collection_menu.add_command(label="Compare with...", command=self.open_compare_window)
+        self.stats_label = tk.Label(self.sidebar, text="", justify=tk.LEFT, anchor="w", wraplength=190)
+        self.stats_label.pack(side=tk.BOTTOM, fill=tk.X, padx=2, pady=2)
         self.tree.pack(fill=tk.BOTH, expand=True)
         self.sidebar.pack(side=tk.LEFT, fill=tk.Y)
 
@@ -85,7 +139,7 @@ class MainWindow:
         self.main_view.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
         # Configure TreeView
-        self.data_table = ttk.Treeview(self.main_view, show="headings")
+        self.data_table = ttk.Treeview(self.main_view, show="headings", selectmode="extended")
         self.data_table.grid(row=0, column=0, sticky="nsew")
 
         # Add scroll bars
@@ -96,44 +150,355 @@ class MainWindow:
 
         self.data_table.configure(yscrollcommand=scroll_y.set, xscrollcommand=scroll_x.set)
         self.data_table.bind("<Double-1>", self.on_cell_double_click)
+        self.data_table.bind("<Button-3>", self.on_data_right_click)
+        self.selection_menu = tk.Menu(self.root, tearoff=0)
+        self.data_table.tag_configure("pending", background="#fff3b0")
+        self.data_table.tag_configure("deleted", foreground="gray", background="#f4c7c3")
 
         # Configure TreeView and scroll bars expansion
         self.main_view.grid_rowconfigure(0, weight=1)  # Allow TreeView to expand vertically
         self.main_view.grid_columnconfigure(0, weight=1)  # Allow TreeView to expand horizontally
 
-        # Fill the tree with databases
-        self.populate_tree()
+        # Fill the tree with the first connection
+        self.add_connection_node(self.selected_connection, self.manager)
+
+        # Periodically release connections that are no longer used
+        self.root.after(IDLE_CHECK_INTERVAL_MS, self.close_idle_connections)
+
+    def add_connection_node(self, connection_string, manager):
+        """Add a connection to the tree with its databases and collections"""
+        connection_node = self.tree.insert("", "end", text=self.connection_label(connection_string), open=True)
+        self.connection_nodes[connection_node] = connection_string
+        self.populate_tree(connection_node, manager)
+
+    @staticmethod
+    def connection_label(connection_string):
+        """Return the text shown in the sidebar for a connection"""
+        return "Mock data" if connection_string == MOCK_CONNECTION else connection_string
+
+    def populate_tree(self, connection_node, manager):
+        """Fill the tree from the metadata cache at once, then with the databases and collections listed in the background"""
+        cached_tree = manager.get_cached_database_tree()
+        if cached_tree is not None:
+            self.apply_database_tree(connection_node, cached_tree)
+
+        results = queue.Queue()
+
+        def list_databases():
+            try:
+                results.put(manager.get_database_tree())
+            except Exception as e:
+                results.put(e)
+
+        def apply_result():
+            try:
+                result = results.get_nowait()
+            except queue.Empty:
+                self.root.after(TREE_POLL_INTERVAL_MS, apply_result)
+                return
+            if connection_node not in self.connection_nodes:
+                return  # Disconnected in the meantime
+            if isinstance(result, Exception):
+                if cached_tree is None:
+                    messagebox.showerror("Error", f"Error loading databases: {result}")
+                else:
+                    print(f"Error refreshing databases: {result}")
+                return
+            self.apply_database_tree(connection_node, result)
+
+        threading.Thread(target=list_databases, daemon=True).start()
+        self.root.after(TREE_POLL_INTERVAL_MS, apply_result)
+
+    def apply_database_tree(self, connection_node, database_tree):
+        """Update the databases and collections of a connection node, only adding and removing what changed"""
+        self.apply_tree_level(connection_node, list(database_tree))
+        for db_node in self.tree.get_children(connection_node):
+            self.apply_tree_level(db_node, database_tree[self.tree.item(db_node, "text")])
+
+    def apply_tree_level(self, parent, names):
+        """Make the children of a tree node match a list of names, keeping the nodes that did not change"""
+        existing = {self.tree.item(node, "text"): node for node in self.tree.get_children(parent)}
+        for name, node in existing.items():
+            if name not in names:
+                self.tree.delete(node)
+        for index, name in enumerate(names):
+            node = existing.get(name)
+            if node is None:
+                self.tree.insert(parent, index, text=name, open=False)
+            elif self.tree.index(node) != index:
+                self.tree.move(node, parent, index)
 
-    def populate_tree(self):
-        """Fill the tree with databases and collections"""
+    def new_connection(self):
+        """Open the connection window and add the new connection to the sidebar"""
+        connection_window = ConnectionWindow(tk.Toplevel(self.root))
+        connection_window.root.wait_window()
+        connection_string = MOCK_CONNECTION if connection_window.is_mock else connection_window.connection_string
+        if not connection_string:
+            return
+        if connection_string in self.connection_nodes.values():
+            messagebox.showinfo("Info", "This connection is already open")
+            return
         try:
-            databases = self.manager.get_databases()
-            for db in databases:
-                db_node = self.tree.insert("", "end", text=db, open=False)
-                collections = self.manager.get_collections(db)
-                for collection in collections:
-                    self.tree.insert(db_node, "end", text=collection)
+            manager = self.connections.open(connection_string)
+            self.add_connection_node(connection_string, manager)
         except Exception as e:
-            messagebox.showerror("Error", f"Error loading databases: {e}")
+            messagebox.showerror("Error", f"Error connecting: {e}")
+
+    def disconnect(self):
+        """Close the selected connection and remove it from the sidebar"""
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showerror("Error", "Select a connection first")
+            return
+        connection_node = self.get_connection_node(selection[0])
+        connection_string = self.connection_nodes.pop(connection_node)
+        self.connections.close(connection_string)
+        self.tree.delete(connection_node)
+        if connection_string == self.selected_connection:
+            self.selected_connection = None
+            self.manager = None
+            self.clear_selection()
+
+    def close_idle_connections(self):
+        """Close idle connections, keeping the active one open"""
+        self.connections.close_idle(keep=self.selected_connection)
+        self.root.after(IDLE_CHECK_INTERVAL_MS, self.close_idle_connections)
+
+    def get_connection_node(self, item):
+        """Return the connection node an item of the tree belongs to"""
+        while self.tree.parent(item):
+            item = self.tree.parent(item)
+        return item
+
+    def clear_selection(self):
+        """Reset the selected database, collection and the data table"""
+        self.selected_db = None
+        self.selected_collection = None
+        self.documents = ResultPage()
+        self.complete_result = None
+        self.stop_live_view()
+        self.data_table.delete(*self.data_table.get_children())
+        self.data_table["columns"] = []
+        self.current_path = "root"
+        self.path_label.config(text=f"Path: {self.current_path}")
 
     def on_tree_select(self, event):
         """Handle tree selection"""
-        selected_item = self.tree.selection()[0]  # Get the selected item
+        selection = self.tree.selection()
+        if not selection:
+            return
+        selected_item = selection[0]  # Get the selected item
         item_text = self.tree.item(selected_item, "text")  # Item text
 
-        # Check if the item is a collection (has a parent)
+        # Switch to the connection the item belongs to, reconnecting if it was closed
+        connection_node = self.get_connection_node(selected_item)
+        connection_string = self.connection_nodes[connection_node]
+        try:
+            self.manager = self.connections.open(connection_string)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error connecting: {e}")
+            return
+        if connection_string != self.selected_connection:
+            self.selected_connection = connection_string
+            self.clear_selection()
+
+        connection_label = self.tree.item(connection_node, "text")
         parent = self.tree.parent(selected_item)
-        if parent:
+        if not parent:
+            self.selected_db = None
+            self.selected_collection = None
+            self.current_path = f"{connection_label}"
+            self.path_label.config(text=f"Path: {self.current_path}")
+            self.stats_node = None
+            self.stats_label.config(text="")
+        elif parent != connection_node:
+            # The item is a collection (its parent is a database)
             self.selected_db = self.tree.item(parent, "text")
             self.selected_collection = item_text
-            self.current_path = f"root > {self.selected_db} > {self.selected_collection}"
+            self.current_path = f"{connection_label} > {self.selected_db} > {self.selected_collection}"
             self.path_label.config(text=f"Path: {self.current_path}")
             self.search(query=None, skip=0, take=10)
+            # Profile the schema in the background so adding and editing rows do not wait for it
+            self.manager.prefetch_schema(self.selected_db, self.selected_collection)
+            self.show_node_stats(self.selected_db, self.selected_collection)
         else:
             self.selected_db = item_text
             self.selected_collection = None
-            self.current_path = f"root > {self.selected_db}"
+            self.current_path = f"{connection_label} > {self.selected_db}"
             self.path_label.config(text=f"Path: {self.current_path}")
+            self.show_node_stats(self.selected_db)
+
+    def show_node_stats(self, database_name, collection_name=None):
+        """Show the sizes of the selected database or collection under the tree, fetching them in the background when missing or stale"""
+        manager = self.manager
+        connection_string = self.selected_connection
+        node = (connection_string, database_name, collection_name)
+        self.stats_node = node
+        try:
+            cached = manager.get_cached_collection_stats(database_name)
+        except Exception as e:
+            print(f"Error reading cached statistics: {e}")
+            cached = None
+        self.apply_node_stats(node, cached)
+        if (cached is not None and manager.collection_stats.is_fresh(cached[1])) or (connection_string, database_name) in self.stats_loading:
+            return
+
+        self.stats_loading.add((connection_string, database_name))
+        results = queue.Queue()
+
+        def fetch_stats():
+            try:
+                results.put(manager.get_collection_stats(database_name, refresh=True))
+            except Exception as e:
+                results.put(e)
+
+        def apply_result():
+            try:
+                result = results.get_nowait()
+            except queue.Empty:
+                self.root.after(TREE_POLL_INTERVAL_MS, apply_result)
+                return
+            self.stats_loading.discard((connection_string, database_name))
+            if self.stats_node is None or self.stats_node[:2] != (connection_string, database_name):
+                return  # Another database was selected in the meantime
+            if isinstance(result, Exception):
+                print(f"Error loading statistics: {result}")
+                if cached is None:
+                    self.stats_label.config(text="")
+                return
+            self.apply_node_stats(self.stats_node, result)
+
+        threading.Thread(target=fetch_stats, daemon=True).start()
+        self.root.after(TREE_POLL_INTERVAL_MS, apply_result)
+
+    def apply_node_stats(self, node, cached):
+        """Fill the statistics pane with the (statistics, fetched_at) of the database of a node"""
+        _, database_name, collection_name = node
+        if cached is None:
+            self.stats_label.config(text="Loading statistics...")
+            return
+        stats = cached[0]
+        if collection_name is None:
+            valid = [row for row in stats if not row.get("error")]
+            lines = [
+                f"Collections: {len(stats)}",
+                f"Documents: {'~' if any(row['estimated'] for row in valid) else ''}{sum(row['count'] for row in valid)}",
+                f"Data: {format_size(sum(row['data_size'] for row in valid))}",
+                f"Storage: {format_size(sum(row['storage_size'] for row in valid))}",
+                f"Indexes: {format_size(sum(row['index_size'] for row in valid))}",
+            ]
+        else:
+            row = next((row for row in stats if row["collection"] == collection_name), None)
+            if row is None:
+                self.stats_label.config(text="No statistics for this collection")
+                return
+            if row.get("error"):
+                self.stats_label.config(text=f"Statistics unavailable: {row['error']}")
+                return
+            lines = [
+                f"Documents: {format_stat(row, 'count')}",
+                f"Average size: {format_stat(row, 'avg_size')}",
+                f"Data: {format_stat(row, 'data_size')}",
+                f"Storage: {format_stat(row, 'storage_size')} ({format_stat(row, 'fragmentation')} free)",
+                f"Indexes: {row['indexes']}, {format_stat(row, 'index_size')}",
+            ]
+        self.stats_label.config(text="\n".join(lines))
+
+    def on_tree_right_click(self, event):
+        """Show the database (or collection) actions when a database (or collection) node is right-clicked"""
+        item = self.tree.identify_row(event.y)
+        if not item or item in self.connection_nodes:
+            return
+        self.tree.selection_set(item)
+        self.tree.update()  # Apply the selection before the menu opens
+        if self.tree.parent(item) in self.connection_nodes:
+            self.database_menu.tk_popup(event.x_root, event.y_root)
+        else:
+            self.collection_menu.tk_popup(event.x_root, event.y_root)
+
+    def open_database_search_window(self):
+        """Open the search over every collection of the selected database"""
+        if not self.selected_db:
+            messagebox.showerror("Error", "Select a database first")
+            return
+        connection_string = self.selected_connection
+        database_name = self.selected_db
+        DatabaseSearchWindow(
+            self.root,
+            self.manager,
+            database_name,
+            on_open=lambda collection, query: self.show_collection(connection_string, database_name, collection, query)
+        )
+
+    def open_compare_window(self):
+        """Compare the selected collection with another collection of any open connection"""
+        if not self.selected_collection:
+            return
+        CompareWindow(self.root, self.connections, self.selected_connection, self.selected_db, self.selected_collection)
+
+    def generate_documents(self):
+        """Load synthetic documents shaped like the selected collection, showing the insert throughput at the end"""
+        if not self.selected_collection:
+            return
+        count = simpledialog.askinteger(
+            "Generate Documents",
+            f"Number of documents to generate in '{self.selected_collection}' from its schema:",
+            parent=self.root, minvalue=1, initialvalue=10000
+        )
+        if not count:
+            return
+        try:
+            spec = spec_for_collection(self.manager, self.selected_db, self.selected_collection)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error reading the schema: {e}")
+            return
+        if not spec:
+            messagebox.showerror("Error", "The collection has no documents to take the schema from")
+            return
+
+        def show_throughput():
+            report = seeder.report()
+            if not seeder.error:
+                messagebox.showinfo(
+                    "Generate Documents",
+                    f"{report['inserted']} documents inserted in {report['elapsed']:.1f}s "
+                    f"({report['documents_per_second']:.0f} documents/s)"
+                )
+            self.refresh()
+
+        self.local_page_changed()
+        seeder = DataSeeder(self.manager, self.selected_db, self.selected_collection, DataGenerator(spec), count)
+        ProgressWindow(self.root, "Generating documents", seeder, on_done=show_throughput)
+
+    def open_collection_stats_window(self):
+        """Open the sortable sizes of every collection of the selected database"""
+        if not self.selected_db:
+            messagebox.showerror("Error", "Select a database first")
+            return
+        connection_string = self.selected_connection
+        database_name = self.selected_db
+        CollectionStatsWindow(
+            self.root,
+            self.manager,
+            database_name,
+            on_open=lambda collection: self.show_collection(connection_string, database_name, collection)
+        )
+
+    def show_collection(self, connection_string, database_name, collection_name, query=None):
+        """Open a collection in the data table, optionally with a filter"""
+        try:
+            self.manager = self.connections.open(connection_string)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error connecting: {e}")
+            return
+        self.selected_connection = connection_string
+        self.selected_db = database_name
+        self.selected_collection = collection_name
+        self.current_path = f"{self.connection_label(connection_string)} > {database_name} > {collection_name}"
+        self.path_label.config(text=f"Path: {self.current_path}")
+        self.query_field.delete(0, tk.END)
+        self.query_field.insert(0, query or "")
+        self.search(query=query, skip=0, take=self.take_field.get())
 
     def populate_data_table(self):
         """Load the selected collection data into the main table"""
@@ -148,8 +513,8 @@ class MainWindow:
             self.data_table["columns"] = []
 
             if self.documents:
-                # Configure columns dynamically from the first document's keys
-                columns = list(self.documents[0].keys())  # Get document keys
+                # Configure columns dynamically from the keys of every document, in order of appearance
+                columns = self.documents.columns
                 self.data_table["columns"] = columns
 
                 # Configure headers and columns
@@ -158,55 +523,360 @@ class MainWindow:
                     self.data_table.column(col, anchor="w", stretch=True)
 
                 # Insert data into the table
-                for doc in self.documents:
-                    row = [str(doc[col]) for col in columns]
-                    self.data_table.insert("", "end", values=row)
+                for index in range(len(self.documents)):
+                    self.data_table.insert("", "end", values=self.row_values(index))
+
+            self.show_pending_changes()
 
             # Force table update
             self.data_table.update_idletasks()
         except Exception as e:
             messagebox.showerror("Error", f"Error: loading data: {e}")
 
+    def row_values(self, index):
+        """Return the texts shown in the grid for a row of the page"""
+        return [self.documents.cell_text(index, col) for col in self.data_table["columns"]]
+
+    def has_new_columns(self):
+        """Check if the page has fields that are not columns of the grid"""
+        return not set(self.documents.columns) <= set(self.data_table["columns"])
+
+    def find_row(self, key):
+        """Return the index of the row whose fields match the key, or None"""
+        for index in range(len(self.documents)):
+            if all(self.documents.value(index, field) == value for field, value in key.items()):
+                return index
+        return None
+
+    def append_grid_row(self, document):
+        """Add a document to the page and a single item to the grid"""
+        self.documents.append(document)
+        if self.has_new_columns():
+            self.populate_data_table()
+        else:
+            self.data_table.insert("", "end", values=self.row_values(len(self.documents) - 1))
+
+    def insert_grid_row(self, index, document):
+        """Insert a document in the page and a single item in the grid before index"""
+        self.documents.insert(index, document)
+        if self.has_new_columns():
+            self.populate_data_table()
+        else:
+            self.data_table.insert("", index, values=self.row_values(index))
+
+    def replace_grid_row(self, index, document):
+        """Replace a document of the page and update its grid item"""
+        self.documents.replace(index, document)
+        if self.has_new_columns():
+            self.populate_data_table()
+        else:
+            self.data_table.item(self.data_table.get_children()[index], values=self.row_values(index))
+
+    def remove_grid_row(self, index):
+        """Remove a document from the page and its item from the grid"""
+        self.documents.remove(index)
+        self.data_table.delete(self.data_table.get_children()[index])
+
+    def set_grid_value(self, index, field, value):
+        """Set one field of a row in the page and refresh its grid item"""
+        self.documents.set_value(index, field, value)
+        self.data_table.item(self.data_table.get_children()[index], values=self.row_values(index))
+
+    def local_page_changed(self):
+        """Forget the complete result when the page shown is only a local view of it"""
+        if self.documents is not self.complete_result:
+            self.complete_result = None
+
+    def insert_needs_refresh(self, document):
+        """Check if a new document may belong to another position or page than the end of the current one"""
+        if self.current_order_by or len(self.documents) >= self.current_take:
+            return True
+        if self.current_query:
+            predicate = self.manager.compile_local_filter(self.current_query)
+            return predicate is None or predicate(document) is not True
+        return False
+
+    def refresh(self):
+        """Query the server again for the current view"""
+        self.search(
+            order_by=self.current_order_by,
+            sort_order=self.sort_order,
+            query=self.query_field.get(),
+            skip=self.skip_field.get(),
+            take=self.take_field.get()
+        )
+
+    def get_pending_changes(self):
+        """Return the staged changes of the selected collection"""
+        key = (self.selected_connection, self.selected_db, self.selected_collection)
+        if key not in self.pending_changes:
+            self.pending_changes[key] = PendingChanges(self.manager, self.selected_db, self.selected_collection)
+        return self.pending_changes[key]
+
+    def update_pending_button(self):
+        """Show the number of staged changes of the selected collection"""
+        key = (self.selected_connection, self.selected_db, self.selected_collection)
+        count = len(self.pending_changes.get(key, []))
+        self.pending_button.config(text=f"Pending Changes ({count})" if count else "Pending Changes")
+
+    def show_pending_changes(self):
+        """Show the staged changes of the selected collection on the loaded page"""
+        self.update_pending_button()
+        key = (self.selected_connection, self.selected_db, self.selected_collection)
+        pending = self.pending_changes.get(key)
+        if not pending:
+            return
+        items = self.data_table.get_children()
+        inserted = [change["values"] for change in pending.changes if change["op"] == "insert"]
+        for index in range(len(self.documents)):
+            document = self.documents[index]
+            if document in inserted:
+                self.data_table.item(items[index], tags=("pending",))
+                continue
+            change = pending.find(document)
+            if change is None:
+                continue
+            if change["op"] == "delete":
+                self.data_table.item(items[index], tags=("deleted",))
+            else:
+                for field, value in change["values"].items():
+                    self.set_grid_value(index, field, value)
+                self.data_table.item(items[index], tags=("pending",))
+
+    def open_pending_changes_window(self):
+        """Review, commit or discard the staged changes of the selected collection"""
+        if not self.selected_collection:
+            messagebox.showerror("Error", "Select a collection first")
+            return
+        PendingChangesWindow(self.root, self.get_pending_changes(), on_commit=self.refresh)
+
+    def toggle_live_view(self):
+        """Start or stop following the changes of the open collection"""
+        if self.live_var.get():
+            self.start_live_view()
+        else:
+            self.stop_live_view()
+
+    def start_live_view(self, resume_token=None):
+        """Follow the changes of the documents matching the current view, after the change of resume_token if one is given"""
+        self.stop_live_view()
+        if not self.selected_db or not self.selected_collection:
+            return
+        document_keys = None
+        if "_id" in self.documents.columns:
+            document_keys = [self.documents.value(index, "_id") for index in range(len(self.documents))]
+        self.live_view = LiveView(self.manager, self.selected_db, self.selected_collection, self.current_query, document_keys, resume_token)
+        self.live_predicate = self.manager.compile_local_filter(self.current_query) if self.current_query else None
+        self.live_view.start()
+        self.root.after(LIVE_POLL_INTERVAL_MS, self.poll_live_view, self.live_view)
+
+    def stop_live_view(self):
+        """Stop following the changes of the open collection"""
+        if self.live_view:
+            self.live_view.stop()
+            self.live_view = None
+
+    def poll_live_view(self, live_view):
+        """Apply the changes received since the last poll to the page and the grid"""
+        if live_view is not self.live_view:
+            return  # The view was stopped or restarted
+        while not live_view.changes.empty():
+            change = live_view.changes.get_nowait()
+            if self.apply_change(change) and self.current_query:
+                # Watch the updates of the new row too; the changes queued after it are sent again
+                self.start_live_view(change["token"])
+                return
+        if live_view.error:
+            self.stop_live_view()
+            self.live_var.set(False)
+            messagebox.showerror("Error", f"Error following changes: {live_view.error}")
+        elif live_view.running:
+            self.root.after(LIVE_POLL_INTERVAL_MS, self.poll_live_view, live_view)
+
+    def apply_change(self, change):
+        """
+        Apply an insert, update or delete to the grid without querying the collection.
+        Rows are placed by the current sort, and dropped when they fall past the end of
+        the page. Returns True if a document that was not shown was added to the page.
+        """
+        self.local_page_changed()
+        index = self.find_row(change["key"])
+        document = change["document"]
+        if change["operation"] == "delete" or document is None or (self.live_predicate and not self.live_predicate(document)):
+            if index is not None:
+                self.remove_grid_row(index)  # Deleted, or no longer matches the filter
+            return False
+        if index is not None and not self.current_order_by:
+            self.replace_grid_row(index, document)
+            return False
+        if index is not None:
+            self.remove_grid_row(index)  # Placed again, its sort field may have changed
+        if self.current_order_by:
+            position = self.documents.sorted_position(document, self.current_order_by, descending=self.sort_order < 0)
+        else:
+            position = len(self.documents)
+        if position >= self.current_take:
+            return False  # Belongs to a later page
+        self.insert_grid_row(position, document)
+        if len(self.documents) > self.current_take:
+            self.remove_grid_row(len(self.documents) - 1)  # Pushed to the next page
+        return index is None
+
     def add_row(self):
         """Open a panel to add a new row to the collection."""
         if not self.selected_collection:
             messagebox.showerror("Error", "Select a collection first")
             return
 
-        # Data types for the current collection (replace with actual logic)
-        first_document = self.documents[0]
-        data_types = {key: type(value) for key, value in first_document.items()}
+        # Data types for the current collection, from its schema profile
+        try:
+            data_types = self.manager.get_collection_schema(self.selected_db, self.selected_collection)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading the collection schema: {e}")
+            return
 
         # Open the AddRowPanel
         add_panel = AddRowPanel(self.root, data_types)
         new_document = add_panel.show()
 
-        if new_document:
+        if new_document and self.stage_var.get():
+            try:
+                document = self.get_pending_changes().stage_insert(new_document)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error adding document: {e}")
+                return
+            self.local_page_changed()
+            self.append_grid_row(document)
+            self.data_table.item(self.data_table.get_children()[-1], tags=("pending",))
+            self.update_pending_button()
+        elif new_document:
             try:
                 # Insert the new document into the database
-                self.manager.insert_document(self.selected_db, self.selected_collection, new_document)
-                self.search()  # Refresh the table
+                document = self.manager.convert_document(self.selected_db, self.selected_collection, new_document)
+                inserted_id = self.manager.insert_document(self.selected_db, self.selected_collection, document)
             except Exception as e:
                 messagebox.showerror("Error", f"Error adding document: {e}")
+                return
+
+            # Show the acknowledged document without querying the collection again
+            primary_key = self.manager.get_primary_key(self.selected_db, self.selected_collection)
+            if primary_key and primary_key not in document and inserted_id is not None:
+                document = {primary_key: inserted_id, **document}
+            if self.insert_needs_refresh(document):
+                self.refresh()
+            else:
+                self.local_page_changed()
+                self.append_grid_row(document)
 
     def delete_row(self):
-        selected_item = self.data_table.focus()
-        if not selected_item:
+        selected_items = self.data_table.selection()
+        if not selected_items:
             messagebox.showerror("Error", "Select a row first")
             return
+        if len(selected_items) > 1:
+            self.delete_rows(selected_items)
+            return
+        selected_item = selected_items[0]
+
+        row_index = self.data_table.index(selected_item)
+        document = self.documents[row_index]
+
+        if self.stage_var.get():
+            # Staged deletes are confirmed once, when the changes are committed
+            self.get_pending_changes().stage_delete(document)
+            self.data_table.item(selected_item, tags=("deleted",))
+            self.update_pending_button()
+            return
 
         confirm_dialog = ConfirmationWindow(self.root, "Are you sure you want to delete this row?")
         if not confirm_dialog.show():
             return  # If user cancels, do nothing
+        # A full page is refilled from the next one, which needs the server
+        page_was_full = len(self.documents) >= self.current_take
 
+        # Remove the row at once and put it back if the server rejects the delete
+        self.local_page_changed()
+        self.remove_grid_row(row_index)
         try:
-            row_index = self.data_table.index(selected_item)
-            document = self.documents[row_index]
-
             self.manager.delete_document(self.selected_db, self.selected_collection, document)
-            self.search()  # Refresh the table
         except Exception as e:
+            self.documents.insert(row_index, document)
+            self.data_table.insert("", row_index, values=self.row_values(row_index))
             messagebox.showerror("Error", f"Error deleting document: {e}")
+            return
+        if page_was_full:
+            self.refresh()
+
+    def on_data_right_click(self, event):
+        """Show the actions on the selected rows, for the right-clicked column"""
+        row_id = self.data_table.identify_row(event.y)
+        col_id = self.data_table.identify_column(event.x)
+        if not row_id or not col_id.startswith("#"):
+            return
+        if row_id not in self.data_table.selection():
+            self.data_table.selection_set(row_id)
+        items = self.data_table.selection()
+        column_name = self.data_table["columns"][int(col_id[1:]) - 1]
+
+        self.selection_menu.delete(0, tk.END)
+        self.selection_menu.add_command(label=f"Set '{column_name}' on {len(items)} rows...", command=lambda: self.ask_update_rows(items, column_name))
+        self.selection_menu.add_command(label=f"Delete {len(items)} rows", command=self.delete_row)
+        self.selection_menu.tk_popup(event.x_root, event.y_root)
+
+    def ask_update_rows(self, items, column_name):
+        """Ask for the new value of a field of the selected rows"""
+        new_value = simpledialog.askstring("Update rows", f"New value of '{column_name}':", parent=self.root)
+        if new_value is not None:
+            self.update_rows(items, column_name, new_value)
+
+    def delete_rows(self, items):
+        """Delete the selected rows with one confirmation, in chunks of one call each"""
+        indices = sorted(self.data_table.index(item) for item in items)
+        documents = [self.documents[index] for index in indices]
+
+        if self.stage_var.get():
+            pending = self.get_pending_changes()
+            for item, document in zip(items, documents):
+                pending.stage_delete(document)
+                self.data_table.item(item, tags=("deleted",))
+            self.update_pending_button()
+            return
+
+        confirm_dialog = ConfirmationWindow(self.root, f"Are you sure you want to delete the {len(documents)} selected rows?")
+        if not confirm_dialog.show():
+            return
+        self.run_bulk_operation("Deleting rows", documents)
+
+    def update_rows(self, items, column_name, new_value):
+        """Set a field of the selected rows to the same value, in chunks of one call each"""
+        try:
+            value = self.manager.convert_value(self.selected_db, self.selected_collection, column_name, new_value)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error updating documents: {e}")
+            return
+        rows = [(item, self.data_table.index(item)) for item in items]
+        rows = [(item, index) for item, index in rows if column_name in self.documents[index]]
+
+        if self.stage_var.get():
+            pending = self.get_pending_changes()
+            for item, index in rows:
+                pending.stage_update(self.documents[index], column_name, new_value)
+                self.set_grid_value(index, column_name, value)
+                self.data_table.item(item, tags=("pending",))
+            self.local_page_changed()
+            self.update_pending_button()
+            return
+
+        confirm = ConfirmationWindow(self.root, f"Do you want to change the '{column_name}' field to '{new_value}' in the {len(rows)} selected rows?")
+        if not confirm.show():
+            return
+        self.run_bulk_operation("Updating rows", [self.documents[index] for _, index in rows], {column_name: value})
+
+    def run_bulk_operation(self, title, documents, update=None):
+        """Delete (or update) documents in the background, showing the progress, and reload the page at the end"""
+        self.local_page_changed()
+        operation = BulkOperation(self.manager, self.selected_db, self.selected_collection, documents, update)
+        ProgressWindow(self.root, title, operation, on_done=self.refresh)
 
     def on_cell_double_click(self, event):
         """Handle double-click event on a table cell for editing"""
@@ -222,8 +892,8 @@ class MainWindow:
         column_index = int(col_id[1:]) - 1
         column_name = self.data_table["columns"][column_index]
 
-        # Get the current value
-        current_value = self.data_table.item(row_id, "values")[column_index]
+        # Get the current value, in full when the grid shows a size badge
+        current_value = self.documents.edit_text(row_index, column_name)
 
         # Calculate the geometry of the cell
         bbox = self.data_table.bbox(row_id, col_id)
@@ -244,20 +914,56 @@ class MainWindow:
         def save_edit(event=None):
             new_value = entry.get()
 
+            if self.stage_var.get():
+                stage_edit(new_value)
+                return
+
             confirm = ConfirmationWindow(self.root, f"Do you want to change the '{column_name}' field to '{new_value}'?")
             if not confirm.show():
-                self.search()  # Refresh the table
+                entry.destroy()
                 return  # If user cancels, do nothing
             entry.destroy()  # Remove the entry widget
             # Update the local document and database
             document = self.documents[row_index]
-            if column_name in document:
-                document[column_name] = new_value
-                try:
-                    self.manager.update_document(self.selected_db, self.selected_collection, document, column_name)
-                    self.search()  # Refresh the table
-                except Exception as e:
-                    messagebox.showerror("Error", f"Error updating document: {e}")
+            if column_name not in document:
+                return
+            old_value = document[column_name]
+            try:
+                document[column_name] = self.manager.convert_value(self.selected_db, self.selected_collection, column_name, new_value)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error updating document: {e}")
+                return
+
+            # Show the new value at once and restore the old one if the server rejects the update
+            self.local_page_changed()
+            self.set_grid_value(row_index, column_name, document[column_name])
+            try:
+                updated = self.manager.update_document(self.selected_db, self.selected_collection, document, column_name)
+            except Exception as e:
+                self.set_grid_value(row_index, column_name, old_value)
+                messagebox.showerror("Error", f"Error updating document: {e}")
+                return
+            if not updated and old_value != document[column_name]:
+                # The document was changed or removed by someone else since it was loaded
+                messagebox.showwarning("Warning", "The document was not updated, it may have been changed by someone else.")
+                self.refresh()
+            elif column_name == self.current_order_by:
+                self.refresh()  # The row may move to another position or page
+
+        def stage_edit(new_value):
+            entry.destroy()
+            document = self.documents[row_index]
+            if column_name not in document:
+                return
+            try:
+                value = self.get_pending_changes().stage_update(document, column_name, new_value)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error updating document: {e}")
+                return
+            self.local_page_changed()
+            self.set_grid_value(row_index, column_name, value)
+            self.data_table.item(row_id, tags=("pending",))
+            self.update_pending_button()
 
         def cancel_edit(event=None):
             entry.destroy()  # Remove the entry widget without saving
@@ -271,7 +977,53 @@ class MainWindow:
         if not self.documents:
             return
         self.sort_order = -1 * self.sort_order
-        self.search(order_by=column, sort_order=self.sort_order, query=self.query_field.get(), skip=self.skip_field.get(), take=self.take_field.get())
+        self.apply_view(order_by=column, sort_order=self.sort_order, query=self.query_field.get(), skip=self.skip_field.get(), take=self.take_field.get())
+
+    def apply_view(self, order_by=None, sort_order=1, query=None, skip=0, take=100):
+        """Show the documents for a filter, sort and page, without querying the server when the complete result is loaded."""
+        if not self.selected_db or not self.selected_collection:
+            return
+        if query == "":
+            query = None
+        try:
+            skip = int(skip)
+            take = int(take)
+            if self.complete_result is not None:
+                if query == self.complete_query:
+                    self.show_local_result(None, query, order_by, sort_order, skip, take)
+                    return
+                if self.complete_query is None:
+                    # Every document is loaded, so any filter the client can evaluate is applied locally
+                    predicate = self.manager.compile_local_filter(query)
+                    if predicate and self.show_local_result(predicate, query, order_by, sort_order, skip, take):
+                        return
+        except Exception as e:
+            messagebox.showerror("Error", f"Error searching documents: {e}")
+            return
+        self.search(order_by, sort_order, query, skip, take)
+
+    def show_local_result(self, predicate, query, order_by, sort_order, skip, take):
+        """
+        Filter, sort and page the complete result already loaded. Returns False, showing
+        nothing, when the filter tests values only read as a preview: the server must run it.
+        """
+        page = self.complete_result
+        indices = range(len(page))
+        if predicate:
+            results = [(index, predicate(page[index])) for index in indices]
+            if any(result is None for _, result in results):
+                return False
+            indices = [index for index, result in results if result]
+        if order_by:
+            indices = page.sorted_indices(order_by, descending=sort_order < 0, indices=indices)
+        self.documents = page.select(list(indices)[skip:skip + take])
+        self.current_query = query
+        self.current_order_by = order_by
+        self.current_take = take
+        self.populate_data_table()
+        if self.live_var.get():
+            self.start_live_view()
+        return True
 
     def search(self, order_by=None, sort_order=1, query=None, skip=0, take=100):
         """Search for documents in the current collection."""
@@ -283,11 +1035,25 @@ class MainWindow:
             query = None
 
         try:
-            self.documents = self.manager.fetch_documents(self.selected_db, self.selected_collection, order_by, sort_order, query, take, skip)
+            documents = self.manager.fetch_documents(self.selected_db, self.selected_collection, order_by, sort_order, query, take, skip, lazy=True)
+            self.documents = ResultPage.from_documents(documents)
+            # A first page that is not full holds the complete result of the filter
+            complete = skip == 0 and len(self.documents) < take
+            self.complete_result = self.documents if complete else None
+            self.complete_query = query
+            self.current_query = query
+            self.current_order_by = order_by
+            self.current_take = take
             self.populate_data_table()
+            if self.live_var.get():
+                self.start_live_view()
         except Exception as e:
+            self.complete_result = None
             messagebox.showerror("Error", f"Error searching documents: {e}")
 
     def open_raw_query_window(self):
         """Opens the Raw Query Window."""
+        if not self.manager:
+            messagebox.showerror("Error", "Select a connection first")
+            return
         RawQueryWindow(self.root, self.manager)
@@ -0,0 +1,76 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from ui.confirmation_window import ConfirmationWindow
+
+
+class PendingChangesWindow:
+    def __init__(self, parent, pending_changes, on_commit=None):
+        """
+        Initialize the window listing the staged changes of a collection.
+        Args:
+            on_commit: Called after the changes were written or discarded.
+        """
+        self.pending_changes = pending_changes
+        self.on_commit = on_commit
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Pending changes: {pending_changes.database_name} > {pending_changes.collection_name}")
+        self.window.geometry("800x400")
+        self.window.grab_set()  # Prevent interaction with the main window
+
+        self.setup_ui()
+        self.show_changes()
+
+    def setup_ui(self):
+        """Set up the UI components of the window."""
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
+
+        self.ordered_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(button_frame, text="Stop at the first error (ordered)", variable=self.ordered_var).pack(side=tk.LEFT, padx=10)
+        tk.Button(button_frame, text="Close", command=self.window.destroy).pack(side=tk.RIGHT, padx=10)
+        tk.Button(button_frame, text="Discard", command=self.discard).pack(side=tk.RIGHT, padx=10)
+        tk.Button(button_frame, text="Commit", command=self.commit).pack(side=tk.RIGHT, padx=10)
+
+        columns = ("operation", "document", "changes", "result")
+        self.changes_table = ttk.Treeview(self.window, columns=columns, show="headings")
+        for col in columns:
+            self.changes_table.heading(col, text=col)
+            self.changes_table.column(col, anchor="w", stretch=True)
+        self.changes_table.column("operation", width=80, stretch=False)
+        self.changes_table.pack(fill=tk.BOTH, expand=True)
+
+    def show_changes(self, results=None):
+        """Fill the table with the staged changes and, after a commit, their results."""
+        self.changes_table.delete(*self.changes_table.get_children())
+        if results is not None:
+            for change_row, result in results:
+                status = result["status"] if not result["error"] else f"{result['status']}: {result['error']}"
+                self.changes_table.insert("", "end", values=(*change_row, status))
+            return
+        for change_row in self.pending_changes.diff():
+            self.changes_table.insert("", "end", values=(*change_row, ""))
+
+    def commit(self):
+        """Write every staged change at once and show the result of each one."""
+        deletes = self.pending_changes.delete_count()
+        if deletes and not ConfirmationWindow(self.window, f"Are you sure you want to delete {deletes} rows?").show():
+            return
+        diff = self.pending_changes.diff()
+        try:
+            report = self.pending_changes.commit(ordered=self.ordered_var.get())
+        except Exception as e:
+            messagebox.showerror("Error", f"Error committing changes: {e}")
+            return
+        self.show_changes(list(zip(diff, [result for _, result in report])))
+        failed = len(self.pending_changes)
+        if failed:
+            messagebox.showwarning("Warning", f"{failed} changes were not written and are still pending.")
+        if self.on_commit:
+            self.on_commit()
+
+    def discard(self):
+        """Drop every staged change."""
+        self.pending_changes.discard()
+        self.show_changes()
+        if self.on_commit:
+            self.on_commit()
@@ -0,0 +1,43 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+POLL_INTERVAL_MS = 100
+
+
+class ProgressWindow:
+    def __init__(self, parent, title, operation, on_done=None):
+        """
+        Initialize the window following a BulkOperation.
+        Args:
+            on_done: Called when the operation finished, failed or was cancelled.
+        """
+        self.operation = operation
+        self.on_done = on_done
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.geometry("400x120")
+        self.window.grab_set()  # Prevent interaction with the main window
+        self.window.protocol("WM_DELETE_WINDOW", self.operation.cancel)
+
+        self.status_label = tk.Label(self.window, text="Starting...", anchor="w")
+        self.status_label.pack(fill=tk.X, padx=10, pady=5)
+        self.progress_bar = ttk.Progressbar(self.window, maximum=max(operation.total, 1))
+        self.progress_bar.pack(fill=tk.X, padx=10, pady=5)
+        tk.Button(self.window, text="Cancel", command=self.operation.cancel).pack(pady=5)
+
+        self.operation.start()
+        self.window.after(POLL_INTERVAL_MS, self.poll_progress)
+
+    def poll_progress(self):
+        """Show the progress of the operation until it is over."""
+        operation = self.operation
+        self.progress_bar["value"] = operation.processed
+        self.status_label.config(text=f"{operation.processed} of {operation.total} rows sent, {operation.affected} changed")
+        if not operation.finished:
+            self.window.after(POLL_INTERVAL_MS, self.poll_progress)
+            return
+        self.window.destroy()
+        if operation.error:
+            messagebox.showerror("Error", f"Error after {operation.processed} of {operation.total} rows: {operation.error}")
+        if self.on_done:
+            self.on_done()
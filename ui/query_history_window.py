@@ -0,0 +1,96 @@
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk, messagebox
+
+
+class QueryHistoryWindow:
+    def __init__(self, parent, manager, on_select):
+        """
+        Initialize the window listing the raw queries run on a connection.
+        Args:
+            on_select: Called with (query, rows) when an entry is opened, rows is None when the result is not cached.
+        """
+        self.manager = manager
+        self.on_select = on_select
+        self.entries = {}  # Table item -> history entry
+        self.window = tk.Toplevel(parent)
+        self.window.title("Query history")
+        self.window.geometry("800x400")
+
+        self.setup_ui()
+        self.show_entries(self.manager.search_query_history())
+
+    def setup_ui(self):
+        """Set up the UI components of the window."""
+        input_frame = tk.Frame(self.window, bd=1, relief=tk.RAISED)
+        input_frame.pack(side=tk.TOP, fill=tk.X)
+
+        tk.Label(input_frame, text="search:").pack(side=tk.LEFT, padx=2)
+        self.search_field = tk.Entry(input_frame)
+        self.search_field.pack(side=tk.LEFT, padx=2, expand=True, fill=tk.X)
+        self.search_field.bind("<Return>", lambda event: self.search())
+        tk.Button(input_frame, text="Search", command=self.search).pack(side=tk.LEFT, padx=2)
+        tk.Button(input_frame, text="Slowest this week", command=self.show_slowest).pack(side=tk.LEFT, padx=2)
+
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
+        tk.Button(button_frame, text="Close", command=self.window.destroy).pack(side=tk.RIGHT, padx=10)
+        tk.Button(button_frame, text="Open Cached Result", command=self.open_cached_result).pack(side=tk.RIGHT, padx=10)
+        tk.Button(button_frame, text="Copy To Editor", command=self.copy_to_editor).pack(side=tk.RIGHT, padx=10)
+
+        columns = ("executed", "query", "time", "rows", "bytes", "cached")
+        self.history_table = ttk.Treeview(self.window, columns=columns, show="headings", selectmode="browse")
+        for col in columns:
+            self.history_table.heading(col, text=col)
+            self.history_table.column(col, anchor="w", width=80, stretch=False)
+        self.history_table.column("executed", width=130)
+        self.history_table.column("query", width=350, stretch=True)
+        self.history_table.pack(fill=tk.BOTH, expand=True)
+        self.history_table.bind("<Double-1>", lambda event: self.open_cached_result())
+
+    def show_entries(self, entries):
+        """Fill the table with history entries."""
+        self.history_table.delete(*self.history_table.get_children())
+        self.entries = {}
+        for entry in entries:
+            executed = datetime.fromtimestamp(entry["executed_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            status = entry["error"] or ("" if entry["row_count"] is None else entry["row_count"])
+            item = self.history_table.insert("", "end", values=(
+                executed,
+                " ".join(entry["query"].split()),  # One line per query
+                f"{entry['elapsed']:.3f}s",
+                status,
+                entry["bytes"] or "",
+                "yes" if entry["cached"] else "",
+            ))
+            self.entries[item] = entry
+
+    def search(self):
+        """Show the queries containing the search text."""
+        self.show_entries(self.manager.search_query_history(self.search_field.get().strip() or None))
+
+    def show_slowest(self):
+        """Show the slowest queries of the last week."""
+        self.show_entries(self.manager.get_slowest_queries())
+
+    def selected_entry(self):
+        """Return the selected history entry, or None."""
+        selection = self.history_table.selection()
+        if not selection:
+            messagebox.showerror("Error", "Select a query first", parent=self.window)
+            return None
+        return self.entries[selection[0]]
+
+    def copy_to_editor(self):
+        """Put the selected query in the editor without running it."""
+        entry = self.selected_entry()
+        if entry:
+            self.on_select(entry["query"], None)
+
+    def open_cached_result(self):
+        """Show the cached result of the selected query, or put the query in the editor if it is not cached."""
+        entry = self.selected_entry()
+        if not entry:
+            return
+        rows = self.manager.get_cached_query_result(entry["id"]) if entry["cached"] else None
+        self.on_select(entry["query"], rows)
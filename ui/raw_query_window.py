@@ -1,6 +1,14 @@
+import queue
 import tkinter as tk
 import re
-from tkinter import ttk, messagebox
+import time
+from tkinter import ttk, messagebox, filedialog
+from business.result_store import ResultStore
+from business.script_runner import ScriptRunner
+from ui.query_history_window import QueryHistoryWindow
+from ui.result_grid import ResultGrid
+
+POLL_INTERVAL_MS = 100
 
 
 class RawQueryWindow:
@@ -8,9 +16,14 @@ class RawQueryWindow:
         """Initialize the Raw Query Window."""
         self.parent = parent
         self.manager = manager
+        self.results = ResultStore()
+        self.script_runner = None
+        self.script_tabs = []
+        self.grids = {}  # Result tab -> ResultGrid
         self.window = tk.Toplevel(self.parent)
         self.window.title("Raw Query")
         self.window.geometry("800x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
 
         # Fetch highlighting rules from the database client
         self.syntax_highlighter = manager.get_syntax_highlighter()
@@ -53,33 +66,39 @@ class RawQueryWindow:
         query_scroll_x.pack(fill="x")
         self.query_input.configure(xscrollcommand=query_scroll_x.set)
 
+        button_frame = tk.Frame(top_frame)
+        button_frame.pack(fill="x", pady=5)
         execute_button = tk.Button(
-            top_frame,
+            button_frame,
             text="Execute",
             command=self.execute_query
         )
-        execute_button.pack(anchor="e", pady=5)
-
-        # Bottom Section: Query Results (Fixed)
-        bottom_frame = tk.Frame(self.window, bd=1)
-        bottom_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # Wrapper frame for better scrollbar placement
-        result_frame = tk.Frame(bottom_frame)
-        result_frame.pack(fill="both", expand=True)
-
-        scroll_y = ttk.Scrollbar(result_frame, orient="vertical")
-        scroll_y.pack(side=tk.RIGHT, fill="y")
-
-        scroll_x = ttk.Scrollbar(bottom_frame, orient="horizontal")
-        scroll_x.pack(side=tk.BOTTOM, fill="x")
-
-        self.result_table = ttk.Treeview(result_frame, show="headings", yscrollcommand=scroll_y.set, xscrollcommand=scroll_x.set)
-        self.result_table.pack(side=tk.LEFT, fill="both", expand=True)
-
-        # Link scrollbars correctly
-        scroll_y.config(command=self.result_table.yview)
-        scroll_x.config(command=self.result_table.xview)
+        execute_button.pack(side=tk.RIGHT)
+        self.run_script_button = tk.Button(button_frame, text="Run Script", command=self.run_script)
+        self.run_script_button.pack(side=tk.RIGHT, padx=5)
+        self.cancel_script_button = tk.Button(button_frame, text="Stop", command=self.cancel_script, state=tk.DISABLED)
+        self.cancel_script_button.pack(side=tk.RIGHT, padx=5)
+        self.transaction_var = tk.BooleanVar(value=False)
+        transaction_check = tk.Checkbutton(button_frame, text="In one transaction", variable=self.transaction_var)
+        transaction_check.pack(side=tk.RIGHT, padx=5)
+        history_button = tk.Button(button_frame, text="History", command=self.open_history_window)
+        history_button.pack(side=tk.RIGHT, padx=5)
+        export_button = tk.Button(button_frame, text="Export", command=self.export_results)
+        export_button.pack(side=tk.RIGHT, padx=5)
+        self.status_label = tk.Label(button_frame, text="", anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill="x", expand=True)
+
+        # Bottom Section: Query Results, one tab per statement of a script
+        self.result_tabs = ttk.Notebook(self.window)
+        self.result_tabs.pack(fill="both", expand=True, padx=10, pady=10)
+        bottom_frame = tk.Frame(self.result_tabs, bd=1)
+        self.result_tabs.add(bottom_frame, text="Result")
+        self.result_grid = self.create_result_grid(bottom_frame)
+
+    def create_result_grid(self, tab):
+        """Create a result grid in a tab."""
+        grid = self.grids[str(tab)] = ResultGrid(tab)
+        return grid
 
     def execute_query(self):
         """Execute the selected query or the entire input if nothing is selected."""
@@ -96,32 +115,142 @@ class RawQueryWindow:
             return
 
         try:
-            # Clear previous results
-            for item in self.result_table.get_children():
-                self.result_table.delete(item)
-
             # Execute the query using the manager
-            results = self.manager.execute_raw_query(query)
-
-            if not results:
+            # Rows are streamed into a store that spills to disk past result_memory_rows
+            started_at = time.perf_counter()
+            results = self.manager.execute_raw_query_into(query, ResultStore())
+            elapsed = time.perf_counter() - started_at
+            self.show_results(results)
+            self.result_tabs.select(0)
+            self.status_label.config(text=f"{len(results)} rows in {elapsed:.3f}s")
+            if not self.results:
                 messagebox.showinfo("Query Result", "Query executed successfully but returned no data.")
-                return
-
-            # Configure the table columns based on the results
-            columns = list(results[0].keys())  # Assuming each result is a dictionary
-            self.result_table["columns"] = columns
-
-            for col in columns:
-                self.result_table.heading(col, text=col)
-                self.result_table.column(col, anchor="w", stretch=True)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error executing query: {e}")
 
-            # Populate the table with data
-            for row in results:
-                values = [row[col] for col in columns]
-                self.result_table.insert("", "end", values=values)
+    def show_results(self, rows, result_grid=None):
+        """Show a ResultStore or a list of rows in a result grid (the main one by default)."""
+        result_grid = result_grid or self.result_grid
+        results = rows if isinstance(rows, ResultStore) else ResultStore.from_rows(rows)
+        if result_grid is self.result_grid:
+            self.results = results
+        result_grid.show(results)
+
+    def export_results(self):
+        """Write the rows of the selected result tab to a CSV or JSON Lines file."""
+        grid = self.grids.get(self.result_tabs.select())
+        if grid is None or not grid.store:
+            messagebox.showerror("Error", "Select a result tab with rows to export.", parent=self.window)
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.window, defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")]
+        )
+        if not path:
+            return
+        try:
+            grid.store.export(path, "jsonl" if path.endswith(".jsonl") else "csv")
+            self.status_label.config(text=f"{len(grid.store)} rows exported to {path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error exporting results: {e}", parent=self.window)
 
+    def run_script(self):
+        """Run every statement of the selection (or of the entire input) one after the other."""
+        try:
+            script = self.query_input.selection_get()
+        except tk.TclError:
+            script = self.query_input.get("1.0", tk.END)
+        try:
+            self.script_runner = ScriptRunner(self.manager, script, self.transaction_var.get())
         except Exception as e:
-            messagebox.showerror("Error", f"Error executing query: {e}")
+            messagebox.showerror("Error", f"Error reading script: {e}")
+            return
+        if not self.script_runner.statements:
+            messagebox.showerror("Error", "Script cannot be empty.")
+            return
+
+        # Replace the tabs of the previous script with a summary tab
+        for tab in self.script_tabs:
+            self.result_tabs.forget(tab)
+            grid = self.grids.pop(str(tab), None)
+            if grid:
+                grid.close()
+        summary_frame = tk.Frame(self.result_tabs)
+        columns = ("#", "statement", "time", "rows", "status")
+        self.summary_table = ttk.Treeview(summary_frame, columns=columns, show="headings")
+        for col in columns:
+            self.summary_table.heading(col, text=col)
+            self.summary_table.column(col, anchor="w", width=80, stretch=False)
+        self.summary_table.column("statement", width=350, stretch=True)
+        self.summary_table.pack(fill="both", expand=True)
+        self.result_tabs.add(summary_frame, text="Script")
+        self.result_tabs.select(summary_frame)
+        self.script_tabs = [summary_frame]
+
+        self.run_script_button.config(state=tk.DISABLED)
+        self.cancel_script_button.config(state=tk.NORMAL)
+        self.status_label.config(text=f"Running {len(self.script_runner.statements)} statements...")
+        self.script_runner.start()
+        self.window.after(POLL_INTERVAL_MS, self.poll_script, self.script_runner)
+
+    def cancel_script(self):
+        """Stop the script after the running statement."""
+        if self.script_runner:
+            self.script_runner.cancel()
+
+    def poll_script(self, runner):
+        """Show the statements completed by the script runner, each result set in its own tab."""
+        if not self.window.winfo_exists():
+            runner.cancel()
+            return
+        while True:
+            try:
+                result = runner.results.get_nowait()
+            except queue.Empty:
+                break
+            number = result["index"] + 1
+            if result["error"]:
+                count, status = "", result["error"]
+            elif result["rows"] is not None:
+                count, status = len(result["rows"]), "ok"
+                tab = tk.Frame(self.result_tabs)
+                self.show_results(result["rows"], self.create_result_grid(tab))
+                self.result_tabs.add(tab, text=f"{number} ({result['elapsed']:.3f}s)")
+                self.script_tabs.append(tab)
+            else:
+                count, status = result["affected"], "ok"
+            statement = " ".join(result["statement"].split())
+            self.summary_table.insert("", "end", values=(number, statement, f"{result['elapsed']:.3f}s", count, status))
+
+        if not (runner.finished and runner.results.empty()):
+            self.window.after(POLL_INTERVAL_MS, self.poll_script, runner)
+            return
+        self.run_script_button.config(state=tk.NORMAL)
+        self.cancel_script_button.config(state=tk.DISABLED)
+        done = len(self.summary_table.get_children())
+        self.status_label.config(text=f"{done} of {len(runner.statements)} statements run")
+        if runner.error:
+            messagebox.showerror("Error", f"Error running script: {runner.error}")
+
+    def close(self):
+        """Stop the script, delete the spill files of the results and close the window."""
+        self.cancel_script()
+        for grid in self.grids.values():
+            grid.close()
+        self.window.destroy()
+
+    def open_history_window(self):
+        """Open the history of the queries run on this connection."""
+        QueryHistoryWindow(self.window, self.manager, self.open_history_entry)
+
+    def open_history_entry(self, query, rows):
+        """Put a query of the history in the editor, and show its cached result if there is one."""
+        self.query_input.delete("1.0", tk.END)
+        self.query_input.insert("1.0", query)
+        self.highlight_syntax()
+        if rows is not None:
+            self.show_results(rows)
+            self.status_label.config(text=f"{len(rows)} rows (cached result)")
 
     def apply_syntax_highlighting(self):
         """Apply syntax highlighting configuration from the database client."""
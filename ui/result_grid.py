@@ -0,0 +1,108 @@
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+WHEEL_ROWS = 3  # Rows scrolled by one step of the mouse wheel
+
+
+class ResultGrid:
+    """
+    A table showing a ResultStore. Only the rows that fit in the table are inserted in the
+    Treeview; the scrollbar moves this window over the store, so any row can be reached
+    without loading the others.
+    """
+
+    def __init__(self, parent):
+        """Create the table with its scrollbars in a frame."""
+        self.store = None
+        self.first = 0  # Index of the first row shown
+        self.visible_rows = 1
+
+        # Wrapper frame for better scrollbar placement
+        result_frame = tk.Frame(parent)
+        result_frame.pack(fill="both", expand=True)
+
+        self.scroll_y = ttk.Scrollbar(result_frame, orient="vertical", command=self.on_scroll)
+        self.scroll_y.pack(side=tk.RIGHT, fill="y")
+
+        scroll_x = ttk.Scrollbar(parent, orient="horizontal")
+        scroll_x.pack(side=tk.BOTTOM, fill="x")
+
+        self.table = ttk.Treeview(result_frame, show="headings", xscrollcommand=scroll_x.set)
+        self.table.pack(side=tk.LEFT, fill="both", expand=True)
+        scroll_x.config(command=self.table.xview)
+
+        row_height = ttk.Style().lookup("Treeview", "rowheight")
+        self.row_height = int(row_height) if row_height else DEFAULT_ROW_HEIGHT
+        self.table.bind("<Configure>", self.on_resize)
+        self.table.bind("<MouseWheel>", self.on_wheel)
+        self.table.bind("<Button-4>", self.on_wheel)
+        self.table.bind("<Button-5>", self.on_wheel)
+        self.table.bind("<Prior>", lambda event: self.scroll_to(self.first - self.visible_rows))
+        self.table.bind("<Next>", lambda event: self.scroll_to(self.first + self.visible_rows))
+
+    def show(self, store):
+        """Show a result store, deleting the spill file of the one shown before."""
+        if self.store is not None and self.store is not store:
+            self.store.close()
+        self.store = store
+        columns = store.columns
+        self.table["columns"] = columns
+        for col in columns:
+            self.table.heading(col, text=col)
+            self.table.column(col, anchor="w", stretch=True)
+        self.first = 0
+        self.render()
+
+    def render(self):
+        """Insert the rows of the window in the table and update the scrollbar."""
+        self.table.delete(*self.table.get_children())
+        total = len(self.store) if self.store is not None else 0
+        if not total:
+            self.scroll_y.set(0, 1)
+            return
+        columns = self.table["columns"]
+        last = min(self.first + self.visible_rows, total)
+        for index in range(self.first, last):
+            self.table.insert("", "end", values=[self.store.cell_text(index, col) for col in columns])
+        self.scroll_y.set(self.first / total, last / total)
+
+    def scroll_to(self, first):
+        """Show the rows starting at an index."""
+        total = len(self.store) if self.store is not None else 0
+        first = max(0, min(first, total - self.visible_rows))
+        if first != self.first:
+            self.first = first
+            self.render()
+        return "break"
+
+    def on_scroll(self, *args):
+        """Move the window as the scrollbar asks: ("moveto", fraction) or ("scroll", count, "units" or "pages")."""
+        if self.store is None:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.store)))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            self.scroll_to(self.first + (count * self.visible_rows if args[2] == "pages" else count))
+
+    def on_wheel(self, event):
+        """Scroll the window with the mouse wheel (Button-4 and Button-5 on X11)."""
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            return self.scroll_to(self.first - WHEEL_ROWS)
+        return self.scroll_to(self.first + WHEEL_ROWS)
+
+    def on_resize(self, event):
+        """Fit the number of rows shown to the height of the table, less the headings."""
+        visible_rows = max(1, event.height // self.row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            if self.store is not None:
+                self.first = max(0, min(self.first, len(self.store) - visible_rows))
+                self.render()
+
+    def close(self):
+        """Delete the spill file of the store shown."""
+        if self.store is not None:
+            self.store.close()
+            self.store = None
@@ -0,0 +1,94 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from business.config import Config
+from business.connection_manager import client_class
+
+
+class TuningWindow:
+    def __init__(self, parent, connection_string):
+        """
+        Initialize the window editing the tuning profile of a connection.
+        Args:
+            connection_string (str): The connection whose profile is edited.
+        """
+        self.connection_string = connection_string
+        self.client = client_class(connection_string)
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Tuning: {connection_string}")
+        self.window.grab_set()  # Prevent interaction with the connection window
+        self.entries = {}
+
+        self.setup_ui()
+        self.show_profile(Config.get_instance().get_connection_profile(connection_string))
+
+    def setup_ui(self):
+        """Set up the UI components of the window."""
+        if self.client.TUNING_PRESETS:
+            preset_frame = tk.Frame(self.window)
+            preset_frame.pack(fill=tk.X, padx=10, pady=5)
+            tk.Label(preset_frame, text="Preset:").pack(side=tk.LEFT)
+            self.preset_options = ttk.Combobox(preset_frame, values=list(self.client.TUNING_PRESETS), state="readonly")
+            self.preset_options.pack(side=tk.LEFT, padx=5)
+            self.preset_options.bind("<<ComboboxSelected>>", self.on_preset_selected)
+
+        options_frame = tk.Frame(self.window)
+        options_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        for row, (name, (option_type, description)) in enumerate(self.client.TUNING_OPTIONS.items()):
+            tk.Label(options_frame, text=name, anchor="w").grid(row=row, column=0, sticky="w")
+            entry = tk.Entry(options_frame, width=25)
+            entry.grid(row=row, column=1, padx=5, pady=1)
+            hint = f"{description} (true/false)" if option_type is bool else description
+            tk.Label(options_frame, text=hint, anchor="w", fg="gray").grid(row=row, column=2, sticky="w")
+            self.entries[name] = entry
+        if not self.entries:
+            tk.Label(options_frame, text="This connection has no tuning options.").grid(row=0, column=0)
+
+        tk.Label(self.window, text="Empty fields use the driver defaults. Changes apply the next time the connection is opened.", fg="gray").pack(padx=10)
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(pady=5)
+        tk.Button(button_frame, text="Save", command=self.save).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Reset to defaults", command=lambda: self.show_profile({})).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Cancel", command=self.window.destroy).pack(side=tk.LEFT, padx=5)
+
+    def show_profile(self, profile):
+        """Fill the fields with the options of a profile."""
+        for name, entry in self.entries.items():
+            entry.delete(0, tk.END)
+            value = profile.get(name)
+            if value is not None:
+                entry.insert(0, str(value).lower() if isinstance(value, bool) else str(value))
+
+    def on_preset_selected(self, event):
+        """Fill the fields with the selected preset."""
+        self.show_profile(self.client.TUNING_PRESETS[self.preset_options.get()])
+
+    def read_profile(self):
+        """Return the options typed in the fields, converted to their types."""
+        profile = {}
+        for name, entry in self.entries.items():
+            text = entry.get().strip()
+            if not text:
+                continue
+            option_type = self.client.TUNING_OPTIONS[name][0]
+            if option_type is bool:
+                if text.lower() not in ("true", "false", "1", "0", "yes", "no"):
+                    raise ValueError(f"{name} must be true or false")
+                profile[name] = text.lower() in ("true", "1", "yes")
+            elif option_type is int:
+                try:
+                    profile[name] = int(text)
+                except ValueError:
+                    raise ValueError(f"{name} must be a whole number")
+            else:
+                profile[name] = text
+        return profile
+
+    def save(self):
+        """Save the profile of the connection and close the window."""
+        try:
+            profile = self.read_profile()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid option: {e}", parent=self.window)
+            return
+        Config.get_instance().set_connection_profile(self.connection_string, profile)
+        self.window.destroy()